@@ -3,9 +3,21 @@
 ##################################
 
 from strings_with_arrows import string_with_arrows
+from persistent_vector import PVector
 from string import ascii_letters
 import os
 from math import pi
+from collections import OrderedDict, deque
+from functools import cmp_to_key
+from itertools import chain
+import heapq
+import operator
+import copy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 ##################################
 # CONSTANTS
@@ -108,11 +120,23 @@ TT_MINUS = "MINUS"
 TT_MUL = "MUL"
 TT_DIV = "DIV"
 TT_POW = "POW"
+TT_FLOORDIV = "FLOORDIV"
+TT_MOD = "MOD"
+TT_BITAND = "BITAND"
+TT_BITOR = "BITOR"
+TT_LSHIFT = "LSHIFT"
+TT_RSHIFT = "RSHIFT"
+TT_PLUSEQ = "PLUSEQ"
+TT_MINUSEQ = "MINUSEQ"
+TT_MULEQ = "MULEQ"
 TT_EQ = "EQ"
 TT_LPAREN = "LPAREN"
 TT_RPAREN = "RPAREN"
 TT_LSQUARE = "LSQUARE"
 TT_RSQUARE = "RSQUARE"
+TT_LBRACE = "LBRACE"
+TT_RBRACE = "RBRACE"
+TT_COLON = "COLON"
 TT_EE = "EE"
 TT_NE = "NE"
 TT_LT = "LT"
@@ -124,6 +148,13 @@ TT_ARROW = "ARROW"
 TT_NEWLINE = "NEWLINE"
 TT_EOF = "EOF"
 
+# Compound assignment tokens and the operator each one applies
+COMPOUND_ASSIGN_OPS = {
+    TT_PLUSEQ: TT_PLUS,
+    TT_MINUSEQ: TT_MINUS,
+    TT_MULEQ: TT_MUL
+}
+
 KEYWORDS = [
     "var",
     "and",
@@ -134,6 +165,7 @@ KEYWORDS = [
     "elif",
     "else",
     "for",
+    "in",
     "to",
     "step",
     "while",
@@ -141,7 +173,12 @@ KEYWORDS = [
     "end",
     "return",
     "continue",
-    "break"
+    "break",
+    "yield",
+    "memo",
+    "match",
+    "case",
+    "const"
 ]
 
 
@@ -155,7 +192,7 @@ class Token:
             self.pos_end = pos_start.copy()
             self.pos_end.advance()
         if pos_end:
-            self.pos_end = pos_end
+            self.pos_end = pos_end.copy()
 
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
@@ -197,15 +234,21 @@ class Lexer:
             elif self.current_char == '"':
                 tokens.append(self.make_string())
             elif self.current_char == "+":
-                tokens.append(Token(TT_PLUS, pos_start=self.pos))
-                self.advance()
+                tokens.append(self.make_operator(TT_PLUS, {"=": TT_PLUSEQ}))
             elif self.current_char == "-":
                 tokens.append(self.make_minus_or_arrow())
             elif self.current_char == "*":
-                tokens.append(Token(TT_MUL, pos_start=self.pos))
-                self.advance()
+                tokens.append(self.make_operator(TT_MUL, {"=": TT_MULEQ}))
             elif self.current_char == "/":
-                tokens.append(Token(TT_DIV, pos_start=self.pos))
+                tokens.append(self.make_operator(TT_DIV, {"/": TT_FLOORDIV}))
+            elif self.current_char == "%":
+                tokens.append(Token(TT_MOD, pos_start=self.pos))
+                self.advance()
+            elif self.current_char == "&":
+                tokens.append(Token(TT_BITAND, pos_start=self.pos))
+                self.advance()
+            elif self.current_char == "|":
+                tokens.append(Token(TT_BITOR, pos_start=self.pos))
                 self.advance()
             elif self.current_char == "^":
                 tokens.append(Token(TT_POW, pos_start=self.pos))
@@ -222,6 +265,15 @@ class Lexer:
             elif self.current_char == "]":
                 tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
                 self.advance()
+            elif self.current_char == "{":
+                tokens.append(Token(TT_LBRACE, pos_start=self.pos))
+                self.advance()
+            elif self.current_char == "}":
+                tokens.append(Token(TT_RBRACE, pos_start=self.pos))
+                self.advance()
+            elif self.current_char == ":":
+                tokens.append(Token(TT_COLON, pos_start=self.pos))
+                self.advance()
             elif self.current_char == "!":
                 token, error = self.make_not_equals()
                 if error:
@@ -309,6 +361,17 @@ class Lexer:
         token_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
         return Token(token_type, id_str, pos_start, self.pos)
     
+    def make_operator(self, token_type, longer_types):
+        # longer_types maps a second character to the two-character token it makes
+        pos_start = self.pos.copy()
+        self.advance()
+
+        if self.current_char in longer_types:
+            token_type = longer_types[self.current_char]
+            self.advance()
+        
+        return Token(token_type, pos_start=pos_start, pos_end=self.pos)
+    
     def make_minus_or_arrow(self):
         token_type = TT_MINUS
         pos_start = self.pos.copy()
@@ -317,6 +380,9 @@ class Lexer:
         if self.current_char == ">":
             self.advance()
             token_type = TT_ARROW
+        elif self.current_char == "=":
+            self.advance()
+            token_type = TT_MINUSEQ
         
         return Token(token_type, pos_start=pos_start, pos_end=self.pos)
     
@@ -350,6 +416,9 @@ class Lexer:
         if self.current_char == "=":
             self.advance()
             token_type = TT_LTE
+        elif self.current_char == "<":
+            self.advance()
+            token_type = TT_LSHIFT
         
         return Token(token_type, pos_start=pos_start, pos_end=self.pos)
     
@@ -361,6 +430,9 @@ class Lexer:
         if self.current_char == "=":
             self.advance()
             token_type = TT_GTE
+        elif self.current_char == ">":
+            self.advance()
+            token_type = TT_RSHIFT
         
         return Token(token_type, pos_start=pos_start, pos_end=self.pos)
 
@@ -395,19 +467,55 @@ class ListNode:
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+class MapNode:
+    def __init__(self, entry_nodes, pos_start, pos_end):
+        self.entry_nodes = entry_nodes
+
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
 class VarAccessNode:
     def __init__(self, var_name_token):
         self.var_name_token = var_name_token
         self.pos_start = self.var_name_token.pos_start
         self.pos_end = self.var_name_token.pos_end
 
+        # Inline cache of (root symbol table, its version), see SymbolTable.cache_entry()
+        self.cache = None
+
+        # Set for reads of an annotated parameter, see assign_static_types()
+        self.static_type = None
+
 class VarAssignNode:
-    def __init__(self, var_name_token, value_node):
+    def __init__(self, var_name_token, value_node, op_token=None, type_token=None, is_const=False):
         self.var_name_token = var_name_token
         self.value_node = value_node
+        # The operator of a compound assignment like 'var x += 1', else None
+        self.op_token = op_token
+        # The annotation of a declaration like 'var x: int = 1', else None
+        self.type_token = type_token
+        # Set for 'const x = 1', which can't be reassigned
+        self.is_const = is_const
         self.pos_start = self.var_name_token.pos_start
         self.pos_end = self.value_node.pos_end
 
+        # Type feedback for compound assignments, see quicken_bin_op()
+        self.quickened = None
+        self.quicken_misses = 0
+        self.static_type = None
+
+class IndexAssignNode:
+    def __init__(self, list_node, index_node, value_node, op_token=None):
+        self.list_node = list_node
+        self.index_node = index_node
+        self.value_node = value_node
+        self.op_token = op_token
+        self.pos_start = self.list_node.pos_start
+        self.pos_end = self.value_node.pos_end
+
+        self.quickened = None
+        self.quicken_misses = 0
+
 class BinOpNode:
     def __init__(self, left_node, op_token, right_node):
         self.left_node = left_node
@@ -416,10 +524,27 @@ class BinOpNode:
 
         self.pos_start = self.left_node.pos_start
         self.pos_end = self.right_node.pos_end
+
+        # Type feedback filled in by the interpreter, see quicken_bin_op()
+        self.quickened = None
+        self.quicken_misses = 0
+        self.static_type = None
     
     def __repr__(self):
         return f"({self.left_node}, {self.op_token}, {self.right_node})"
 
+class LogicalOpNode:
+    def __init__(self, left_node, op_token, right_node):
+        self.left_node = left_node
+        self.right_node = right_node
+        self.op_token = op_token
+
+        self.pos_start = self.left_node.pos_start
+        self.pos_end = self.right_node.pos_end
+
+    def __repr__(self):
+        return f"({self.left_node}, {self.op_token}, {self.right_node})"
+
 class UnaryOpNode:
     def __init__(self, op_token, node):
         self.op_token = op_token
@@ -439,6 +564,16 @@ class IfNode:
         self.pos_start = self.cases[0][0].pos_start
         self.pos_end = (self.else_case or self.cases[-1])[0].pos_end
 
+class MatchNode:
+    def __init__(self, subject_node, cases, else_case, table, pos_start, pos_end):
+        self.subject_node = subject_node
+        self.cases = cases
+        self.else_case = else_case
+        self.table = table # case label value -> index into cases
+
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
 class ForNode:
     def __init__(self, var_name_token, start_value_node, end_value_node, step_value_node, body_node, should_return_none):
         self.var_name_token = var_name_token
@@ -447,6 +582,20 @@ class ForNode:
         self.step_value_node = step_value_node
         self.body_node = body_node
         self.should_return_none = should_return_none
+        self.result_used = not should_return_none
+        self.tier = TierState()
+
+        self.pos_start = self.var_name_token.pos_start
+        self.pos_end = self.body_node.pos_end
+
+class ForInNode:
+    def __init__(self, var_name_token, iterable_node, body_node, should_return_none):
+        self.var_name_token = var_name_token
+        self.iterable_node = iterable_node
+        self.body_node = body_node
+        self.should_return_none = should_return_none
+        self.result_used = not should_return_none
+        self.tier = TierState()
 
         self.pos_start = self.var_name_token.pos_start
         self.pos_end = self.body_node.pos_end
@@ -456,16 +605,25 @@ class WhileNode:
         self.condition_node = condition_node
         self.body_node = body_node
         self.should_return_none = should_return_none
+        self.result_used = not should_return_none
+        self.tier = TierState()
 
         self.pos_start = self.condition_node.pos_start
         self.pos_end = self.body_node.pos_end
 
 class FuncDefNode:
-    def __init__(self, var_name_token, arg_name_tokens, body_node, should_auto_return):
+    def __init__(self, var_name_token, arg_name_tokens, body_node, should_auto_return, arg_type_tokens=None):
         self.var_name_token = var_name_token
         self.arg_name_tokens = arg_name_tokens
+        # One annotation token or None per argument
+        self.arg_type_tokens = arg_type_tokens or [None] * len(arg_name_tokens)
         self.body_node = body_node
         self.should_auto_return = should_auto_return
+        self.memoized = False
+        self.tier = TierState()
+
+        # For generator functions, the nodes on a path down to a yield
+        self.yielding = None
 
         if self.var_name_token:
             self.pos_start = self.var_name_token.pos_start
@@ -488,6 +646,11 @@ class CallNode:
         else:
             self.pos_end = self.node_to_call.pos_end
 
+        # Set when some argument is a literal, see specialized_callee()
+        self.constant_args = any(literal_node(arg_node) is not None for arg_node in self.arg_nodes)
+        self.specialization = None
+        self.calls = 0
+
 class ReturnNode:
     def __init__(self, node_to_return, pos_start, pos_end):
         self.node_to_return = node_to_return
@@ -495,6 +658,13 @@ class ReturnNode:
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+class YieldNode:
+    def __init__(self, node_to_yield, pos_start, pos_end):
+        self.node_to_yield = node_to_yield
+
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
 class ContinueNode:
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
@@ -633,6 +803,15 @@ class Parser:
                 self.reverse(res.to_reverse_count)
             return res.success(ReturnNode(expr, pos_start, self.current_token.pos_start.copy()))
         
+        if self.current_token.matches(TT_KEYWORD, "yield"):
+            res.register_advancement()
+            self.advance()
+
+            expr = res.register(self.expr())
+            if res.error:
+                return res
+            return res.success(YieldNode(expr, pos_start, self.current_token.pos_start.copy()))
+        
         if self.current_token.matches(TT_KEYWORD, "continue"):
             res.register_advancement()
             self.advance()
@@ -647,7 +826,7 @@ class Parser:
         if res.error:
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
-                "Expected 'return', 'continue', 'break', 'var', 'if', 'for', 'while', 'func', int, float, identifier, '+', '-' or '(', '[' or 'not'"
+                "Expected 'return', 'yield', 'continue', 'break', 'var', 'if', 'for', 'while', 'func', int, float, identifier, '+', '-' or '(', '[' or 'not'"
             ))
         
         return res.success(expr)
@@ -702,6 +881,60 @@ class Parser:
             self.current_token.pos_end.copy()
         ))
 
+    def map_expr(self):
+        res = ParseResult()
+        entry_nodes = []
+        pos_start = self.current_token.pos_start.copy()
+
+        if self.current_token.type != TT_LBRACE:
+            return res.failure(InvalidSyntaxError(
+                self.current_token.pos_start, self.current_token.pos_end,
+                f"Expected '{{'"
+            ))
+        
+        res.register_advancement()
+        self.advance()
+
+        if self.current_token.type != TT_RBRACE:
+            while True:
+                key_node = res.register(self.expr())
+                if res.error:
+                    return res
+
+                if self.current_token.type != TT_COLON:
+                    return res.failure(InvalidSyntaxError(
+                        self.current_token.pos_start, self.current_token.pos_end,
+                        f"Expected ':'"
+                    ))
+                
+                res.register_advancement()
+                self.advance()
+
+                value_node = res.register(self.expr())
+                if res.error:
+                    return res
+                entry_nodes.append((key_node, value_node))
+
+                if self.current_token.type != TT_COMMA:
+                    break
+                res.register_advancement()
+                self.advance()
+
+            if self.current_token.type != TT_RBRACE:
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    f"Expected ',' or '}}'"
+                ))
+        
+        res.register_advancement()
+        self.advance()
+
+        return res.success(MapNode(
+            entry_nodes,
+            pos_start,
+            self.current_token.pos_end.copy()
+        ))
+
     def if_expr(self):
         res = ParseResult()
         all_cases = res.register(self.if_expr_cases("if"))
@@ -821,63 +1054,210 @@ class Parser:
         
         return res.success((cases, else_case))
 
-    def for_expr(self):
+    def match_expr(self):
         res = ParseResult()
+        pos_start = self.current_token.pos_start.copy()
+        cases, table = [], {}
+        else_case = None
 
-        if not self.current_token.matches(TT_KEYWORD, "for"):
+        if not self.current_token.matches(TT_KEYWORD, "match"):
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
-                f"Expected 'for'"
+                f"Expected 'match'"
             ))
         
         res.register_advancement()
         self.advance()
 
-        if self.current_token.type != TT_IDENTIFIER:
+        subject = res.register(self.expr())
+        if res.error:
+            return res
+        
+        if not self.current_token.matches(TT_KEYWORD, "then"):
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
-                f"Expected identifier"
+                f"Expected 'then'"
             ))
         
-        var_name = self.current_token
         res.register_advancement()
         self.advance()
+        self.skip_newlines(res)
+
+        while self.current_token.matches(TT_KEYWORD, "case"):
+            res.register_advancement()
+            self.advance()
+
+            while True:
+                label_start = self.current_token.pos_start
+                label = res.register(self.case_label())
+                if res.error:
+                    return res
+                if label in table:
+                    return res.failure(InvalidSyntaxError(
+                        label_start, self.current_token.pos_start,
+                        "Duplicate case label"
+                    ))
+                table[label] = len(cases)
 
-        if self.current_token.type != TT_EQ:
+                if self.current_token.type != TT_COMMA:
+                    break
+                res.register_advancement()
+                self.advance()
+
+            if not self.current_token.matches(TT_KEYWORD, "then"):
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    f"Expected ',' or 'then'"
+                ))
+            
+            res.register_advancement()
+            self.advance()
+
+            case = res.register(self.case_body())
+            if res.error:
+                return res
+            cases.append(case)
+            self.skip_newlines(res)
+        
+        if self.current_token.matches(TT_KEYWORD, "else"):
+            res.register_advancement()
+            self.advance()
+
+            else_case = res.register(self.case_body())
+            if res.error:
+                return res
+            self.skip_newlines(res)
+        
+        if not self.current_token.matches(TT_KEYWORD, "end"):
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
-                f"Expected '='"
+                f"Expected 'case', 'else' or 'end'"
             ))
         
         res.register_advancement()
         self.advance()
 
-        start_value = res.register(self.expr())
+        return res.success(MatchNode(
+            subject, cases, else_case, table,
+            pos_start, self.current_token.pos_start.copy()
+        ))
+
+    def case_label(self):
+        res = ParseResult()
+        sign = 1
+
+        if self.current_token.type == TT_MINUS:
+            res.register_advancement()
+            self.advance()
+            sign = -1
+        
+        token = self.current_token
+        if token.type in (TT_INT, TT_FLOAT):
+            res.register_advancement()
+            self.advance()
+            return res.success(sign * token.value)
+        
+        if token.type == TT_STRING and sign == 1:
+            res.register_advancement()
+            self.advance()
+            return res.success(token.value)
+        
+        return res.failure(InvalidSyntaxError(
+            token.pos_start, token.pos_end,
+            "Expected int, float or string"
+        ))
+
+    def case_body(self):
+        # A body on the same line is a single statement; otherwise it is a
+        # block that runs until the next 'case', 'else' or 'end'
+        res = ParseResult()
+
+        if self.current_token.type == TT_NEWLINE:
+            res.register_advancement()
+            self.advance()
+
+            statements = res.register(self.statements())
+            if res.error:
+                return res
+            return res.success((statements, True))
+        
+        statement = res.register(self.statement())
         if res.error:
             return res
-        
-        if not self.current_token.matches(TT_KEYWORD, "to"):
+        return res.success((statement, False))
+
+    def skip_newlines(self, res):
+        while self.current_token.type == TT_NEWLINE:
+            res.register_advancement()
+            self.advance()
+
+    def for_expr(self):
+        res = ParseResult()
+
+        if not self.current_token.matches(TT_KEYWORD, "for"):
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
-                f"Expected 'to'"
+                f"Expected 'for'"
             ))
         
         res.register_advancement()
         self.advance()
 
-        end_value = res.register(self.expr())
-        if res.error:
-            return res
+        if self.current_token.type != TT_IDENTIFIER:
+            return res.failure(InvalidSyntaxError(
+                self.current_token.pos_start, self.current_token.pos_end,
+                f"Expected identifier"
+            ))
         
-        if self.current_token.matches(TT_KEYWORD, "step"):
+        var_name = self.current_token
+        res.register_advancement()
+        self.advance()
+
+        if self.current_token.matches(TT_KEYWORD, "in"):
             res.register_advancement()
             self.advance()
 
-            step_value = res.register(self.expr())
+            iterable = res.register(self.expr())
             if res.error:
                 return res
+            make_node = lambda body, should_return_none: ForInNode(var_name, iterable, body, should_return_none)
         else:
-            step_value = None
+            if self.current_token.type != TT_EQ:
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    f"Expected '=' or 'in'"
+                ))
+            
+            res.register_advancement()
+            self.advance()
+
+            start_value = res.register(self.expr())
+            if res.error:
+                return res
+            
+            if not self.current_token.matches(TT_KEYWORD, "to"):
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    f"Expected 'to'"
+                ))
+            
+            res.register_advancement()
+            self.advance()
+
+            end_value = res.register(self.expr())
+            if res.error:
+                return res
+            
+            if self.current_token.matches(TT_KEYWORD, "step"):
+                res.register_advancement()
+                self.advance()
+
+                step_value = res.register(self.expr())
+                if res.error:
+                    return res
+            else:
+                step_value = None
+            make_node = lambda body, should_return_none: ForNode(var_name, start_value, end_value, step_value, body, should_return_none)
             
         if not self.current_token.matches(TT_KEYWORD, "then"):
             return res.failure(InvalidSyntaxError(
@@ -905,13 +1285,13 @@ class Parser:
             res.register_advancement()
             self.advance()
         
-            return res.success(ForNode(var_name, start_value, end_value, step_value, body, True))
+            return res.success(make_node(body, True))
         
         body = res.register(self.statement())
         if res.error:
             return res
         
-        return res.success(ForNode(var_name, start_value, end_value, step_value, body, False))
+        return res.success(make_node(body, False))
 
     
     def while_expr(self):
@@ -939,9 +1319,6 @@ class Parser:
         res.register_advancement()
         self.advance()
 
-        res.register_advancement()
-        self.advance()
-
         if self.current_token.type == TT_NEWLINE:
             res.register_advancement()
             self.advance()
@@ -994,11 +1371,15 @@ class Parser:
         res.register_advancement()
         self.advance()
         arg_name_tokens = []
+        arg_type_tokens = []
 
         if self.current_token.type == TT_IDENTIFIER:
             arg_name_tokens.append(self.current_token)
             res.register_advancement()
             self.advance()
+            arg_type_tokens.append(res.register(self.type_annotation()))
+            if res.error:
+                return res
 
             while self.current_token.type == TT_COMMA:
                 res.register_advancement()
@@ -1013,6 +1394,9 @@ class Parser:
                 arg_name_tokens.append(self.current_token)
                 res.register_advancement()
                 self.advance()
+                arg_type_tokens.append(res.register(self.type_annotation()))
+                if res.error:
+                    return res
         
         if self.current_token.type != TT_RPAREN:
             return res.failure(InvalidSyntaxError(
@@ -1036,12 +1420,16 @@ class Parser:
             if res.error:
                 return res
 
-            return res.success(FuncDefNode(
+            func_def = FuncDefNode(
                 var_name_token,
                 arg_name_tokens,
                 node_to_return,
-                True
-            ))
+                True,
+                arg_type_tokens
+            )
+            func_def.yielding = yield_paths(node_to_return)
+            assign_static_types(func_def)
+            return res.success(func_def)
         if self.current_token.type != TT_NEWLINE:
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
@@ -1064,30 +1452,73 @@ class Parser:
         res.register_advancement()
         self.advance()
 
-        return res.success(FuncDefNode(
+        func_def = FuncDefNode(
             var_name_token,
             arg_name_tokens,
             body,
-            False
-        ))
+            False,
+            arg_type_tokens
+        )
+        func_def.yielding = yield_paths(body)
+        assign_static_types(func_def)
+        return res.success(func_def)
 
-    ##################################        
-    
-    def atom(self):
+    def type_annotation(self):
+        # An optional ': type' after a variable or argument name
         res = ParseResult()
-        token = self.current_token
-
-        if token.type in (TT_INT, TT_FLOAT):
-            res.register_advancement()
-            self.advance()
-            return res.success(NumberNode(token))
-    
-        elif token.type == TT_STRING:
-            res.register_advancement()
-            self.advance()
-            return res.success(StringNode(token))
+        if self.current_token.type != TT_COLON:
+            return res.success(None)
         
-        elif token.type == TT_IDENTIFIER:
+        res.register_advancement()
+        self.advance()
+
+        type_token = self.current_token
+        if type_token.type != TT_IDENTIFIER or type_token.value not in ANNOTATION_TYPES:
+            return res.failure(InvalidSyntaxError(
+                type_token.pos_start, type_token.pos_end,
+                "Expected 'int', 'float', 'str' or 'list'"
+            ))
+        
+        res.register_advancement()
+        self.advance()
+        return res.success(type_token)
+
+    def memo_func_def(self):
+        res = ParseResult()
+
+        if not self.current_token.matches(TT_KEYWORD, "memo"):
+            return res.failure(InvalidSyntaxError(
+                self.current_token.pos_start, self.current_token.pos_end,
+                f"Expected 'memo'"
+            ))
+        
+        res.register_advancement()
+        self.advance()
+
+        func_def = res.register(self.func_def())
+        if res.error:
+            return res
+        
+        func_def.memoized = True
+        return res.success(func_def)
+
+    ##################################        
+    
+    def atom(self):
+        res = ParseResult()
+        token = self.current_token
+
+        if token.type in (TT_INT, TT_FLOAT):
+            res.register_advancement()
+            self.advance()
+            return res.success(NumberNode(token))
+    
+        elif token.type == TT_STRING:
+            res.register_advancement()
+            self.advance()
+            return res.success(StringNode(token))
+        
+        elif token.type == TT_IDENTIFIER:
             res.register_advancement()
             self.advance()
             return res.success(VarAccessNode(token))
@@ -1114,12 +1545,24 @@ class Parser:
                 return res
             return res.success(list_expr)
         
+        elif token.type == TT_LBRACE:
+            map_expr = res.register(self.map_expr())
+            if res.error:
+                return res
+            return res.success(map_expr)
+        
         elif token.matches(TT_KEYWORD, "if"):
             if_expr = res.register(self.if_expr())
             if res.error:
                 return res
             return res.success(if_expr)
         
+        elif token.matches(TT_KEYWORD, "match"):
+            match_expr = res.register(self.match_expr())
+            if res.error:
+                return res
+            return res.success(match_expr)
+        
         elif token.matches(TT_KEYWORD, "for"):
             for_expr = res.register(self.for_expr())
             if res.error:
@@ -1138,9 +1581,15 @@ class Parser:
                 return res
             return res.success(func_def)
         
+        elif token.matches(TT_KEYWORD, "memo"):
+            func_def = res.register(self.memo_func_def())
+            if res.error:
+                return res
+            return res.success(func_def)
+        
         return res.failure(InvalidSyntaxError(
             token.pos_start, token.pos_end,
-            "Expected int, float, identifier, '+', '-' or '(', '[', 'if', 'for', 'while', 'func'"
+            "Expected int, float, identifier, '+', '-' or '(', '[', '{', 'if', 'match', 'for', 'while', 'func', 'memo'"
         ))
 
     def call(self):
@@ -1202,10 +1651,19 @@ class Parser:
         return self.power()
 
     def term(self):
-        return self.bin_op(self.factor, (TT_MUL, TT_DIV)) #both term and expr use bin_op()
+        return self.bin_op(self.factor, (TT_MUL, TT_DIV, TT_FLOORDIV, TT_MOD)) #both term and expr use bin_op()
 
     def arith_expr(self):
         return self.bin_op(self.term, (TT_PLUS, TT_MINUS))
+
+    def shift_expr(self):
+        return self.bin_op(self.arith_expr, (TT_LSHIFT, TT_RSHIFT))
+
+    def bit_and_expr(self):
+        return self.bin_op(self.shift_expr, (TT_BITAND, ))
+
+    def bit_or_expr(self):
+        return self.bin_op(self.bit_and_expr, (TT_BITOR, ))
     
     def comp_expr(self):
         res = ParseResult()
@@ -1220,7 +1678,7 @@ class Parser:
                 return res
             return res.success(UnaryOpNode(op_token, node))
         
-        node = res.register(self.bin_op(self.arith_expr, (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)))
+        node = res.register(self.bin_op(self.bit_or_expr, (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)))
     
         if res.error:
             return res.failure(InvalidSyntaxError(
@@ -1247,6 +1705,42 @@ class Parser:
             res.register_advancement()
             self.advance()
 
+            type_token = res.register(self.type_annotation())
+            if res.error:
+                return res
+
+            if self.current_token.type != TT_EQ and self.current_token.type not in COMPOUND_ASSIGN_OPS:
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    "Expected '=', '+=', '-=' or '*='"
+                ))
+            
+            op_token = self.assign_op_token()
+            res.register_advancement()
+            self.advance()
+            expr = res.register(self.expr())
+            if res.error:
+                return res
+            return res.success(VarAssignNode(var_name, expr, op_token, type_token))
+
+        if self.current_token.matches(TT_KEYWORD, "const"):
+            res.register_advancement()
+            self.advance()
+
+            if self.current_token.type != TT_IDENTIFIER:
+                return res.failure(InvalidSyntaxError(
+                    self.current_token.pos_start, self.current_token.pos_end,
+                    "Expected identifier"
+                ))
+            
+            var_name = self.current_token
+            res.register_advancement()
+            self.advance()
+
+            type_token = res.register(self.type_annotation())
+            if res.error:
+                return res
+
             if self.current_token.type != TT_EQ:
                 return res.failure(InvalidSyntaxError(
                     self.current_token.pos_start, self.current_token.pos_end,
@@ -1258,20 +1752,44 @@ class Parser:
             expr = res.register(self.expr())
             if res.error:
                 return res
-            return res.success(VarAssignNode(var_name, expr))
+            return res.success(VarAssignNode(var_name, expr, None, type_token, is_const=True))
 
-        node = res.register(self.bin_op(self.comp_expr, ((TT_KEYWORD, "and"), (TT_KEYWORD, "or"))))
+        node = res.register(self.bin_op(self.comp_expr, ((TT_KEYWORD, "and"), (TT_KEYWORD, "or")), node_type=LogicalOpNode))
 
         if res.error:
             return res.failure(InvalidSyntaxError(
                 self.current_token.pos_start, self.current_token.pos_end,
                 "Expected 'var', 'if', 'for', 'while', 'func', int, float, identifier, '+', '-' or '(', '[' or 'not'"
             ))
+
+        # 'list / index = value' stores into the list, 'name += value' is
+        # shorthand for 'var name += value'
+        is_index = isinstance(node, BinOpNode) and node.op_token.type == TT_DIV
+        is_compound = self.current_token.type in COMPOUND_ASSIGN_OPS
+        if (self.current_token.type == TT_EQ and is_index) or (is_compound and (is_index or isinstance(node, VarAccessNode))):
+            op_token = self.assign_op_token()
+            res.register_advancement()
+            self.advance()
+            expr = res.register(self.expr())
+            if res.error:
+                return res
+
+            if is_index:
+                return res.success(IndexAssignNode(node.left_node, node.right_node, expr, op_token))
+            return res.success(VarAssignNode(node.var_name_token, expr, op_token))
+
         return res.success(node)
+
+    def assign_op_token(self):
+        # The operator a compound assignment applies, or None for a plain '='
+        token = self.current_token
+        if token.type == TT_EQ:
+            return None
+        return Token(COMPOUND_ASSIGN_OPS[token.type], pos_start=token.pos_start, pos_end=token.pos_end)
     
     ################################## 
 
-    def bin_op(self, func_a, ops, func_b=None):
+    def bin_op(self, func_a, ops, func_b=None, node_type=BinOpNode):
         if func_b is None:
             func_b = func_a
 
@@ -1287,7 +1805,7 @@ class Parser:
             right = res.register(func_b())
             if res.error:
                 return res
-            left = BinOpNode(left, op_token, right)
+            left = node_type(left, op_token, right)
         
         return res.success(left)
 
@@ -1381,6 +1899,24 @@ class Value:
 
     def powed_by(self, other):
         return None, self.illegal_operation(other)
+
+    def floor_dived_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def modded_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def bit_anded_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def bit_ored_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def lshifted_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def rshifted_by(self, other):
+        return None, self.illegal_operation(other)
         
     def get_comparison_eq(self, other):
         return None, self.illegal_operation(other)
@@ -1408,9 +1944,25 @@ class Value:
     
     def notted(self):
         return None, self.illegal_operation()
+
+    def updated_by(self, op_type, other):
+        # Compound assignments fall back to the plain operator unless a type
+        # can apply them to itself, which it signals by returning itself
+        return None, None
+
+    def set_at(self, index, value):
+        return None, self.illegal_operation(index)
+
+    def iterate(self):
+        # A Python iterator over the values 'for x in value' binds, or None
+        return None
     
-    def execute(self, args):
-        return RTResult().failure(self.illegal_operation())
+    def execute(self, args, context, node):
+        return RTResult().failure(RTError(
+            node.pos_start, node.pos_end,
+            "Illegal operation",
+            context
+        ))
     
     def copy(self):
         raise Exception("No copy method defined")
@@ -1418,6 +1970,9 @@ class Value:
     def is_true(self):
         return False
 
+    def hash_key(self):
+        return None
+
     def illegal_operation(self, other=None):
         if other is None:
             other = self
@@ -1438,21 +1993,21 @@ class Number(Value):
     
     def added_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
+            return Number(self.value + other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.add)
     
     def subbed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
+            return Number(self.value - other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.sub)
         
     def multed_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context), None
+            return Number(self.value * other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.mul)
         
     def dived_by(self, other):
         if isinstance(other, Number):
@@ -1463,66 +2018,132 @@ class Number(Value):
                     self.context
                 )
             
-            return Number(self.value / other.value).set_context(self.context), None
+            return Number(self.value / other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.truediv)
         
     def powed_by(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value ** other.value)).set_context(self.context), None
+            return Number(int(self.value ** other.value)), None
+        else:
+            return self.broadcast(other, array_power)
+
+    def floor_dived_by(self, other):
+        if isinstance(other, Number):
+            if other.value == 0:
+                return None, RTError(
+                    self.pos_start, other.pos_end,
+                    "Division by zero",
+                    self.context
+                )
+            
+            return Number(self.value // other.value), None
+        else:
+            return self.broadcast(other, operator.floordiv)
+
+    def modded_by(self, other):
+        if isinstance(other, Number):
+            if other.value == 0:
+                return None, RTError(
+                    self.pos_start, other.pos_end,
+                    "Modulo by zero",
+                    self.context
+                )
+            
+            return Number(self.value % other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.mod)
+
+    def bit_anded_by(self, other):
+        return self.bitwise(other, operator.and_)
+
+    def bit_ored_by(self, other):
+        return self.bitwise(other, operator.or_)
+
+    def lshifted_by(self, other):
+        return self.bitwise(other, operator.lshift)
+
+    def rshifted_by(self, other):
+        return self.bitwise(other, operator.rshift)
+
+    def bitwise(self, other, operation):
+        if isinstance(other, Array):
+            return other.bitwise(self, operation, reflected=True)
+        if not isinstance(other, Number):
+            return None, self.illegal_operation(other)
+
+        if type(self.value) is not int or type(other.value) is not int:
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Bitwise operations need integers",
+                self.context
+            )
+        
+        if operation in (operator.lshift, operator.rshift) and other.value < 0:
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Negative shift count",
+                self.context
+            )
+        
+        return Number(operation(self.value, other.value)), None
         
     def get_comparison_eq(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value == other.value)).set_context(self.context), None
+            return Number(int(self.value == other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.eq)
         
     def get_comparison_ne(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value != other.value)).set_context(self.context), None
+            return Number(int(self.value != other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.ne)
         
     def get_comparison_lt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value < other.value)).set_context(self.context), None
+            return Number(int(self.value < other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.lt)
         
     def get_comparison_gt(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value > other.value)).set_context(self.context), None
+            return Number(int(self.value > other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.gt)
         
     def get_comparison_lte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value <= other.value)).set_context(self.context), None
+            return Number(int(self.value <= other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.le)
         
     def get_comparison_gte(self, other):
         if isinstance(other, Number):
-            return Number(int(self.value >= other.value)).set_context(self.context), None
+            return Number(int(self.value >= other.value)), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return self.broadcast(other, operator.ge)
         
     def anded_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value and other.value).set_context(self.context), None
+            return Number(self.value and other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return None, self.illegal_operation(other)
         
     def ored_by(self, other):
         if isinstance(other, Number):
-            return Number(self.value or other.value).set_context(self.context), None
+            return Number(self.value or other.value), None
         else:
-            return None, Value.illegal_operation(self.pos_start, other.pos_end)
+            return None, self.illegal_operation(other)
         
     def notted(self):
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+        return Number(1 if self.value == 0 else 0), None
+
+    def broadcast(self, other, operation):
+        # A number on the left of an Array is combined with every element
+        if isinstance(other, Array):
+            return other.combined(self, operation, reflected=True)
+        return None, self.illegal_operation(other)
     
     def copy(self):
         copy = Number(self.value)
@@ -1533,6 +2154,9 @@ class Number(Value):
     def is_true(self):
         return self.value != 0
 
+    def hash_key(self):
+        return self.value
+
     def __repr__(self):
         return str(self.value)
 
@@ -1546,26 +2170,27 @@ class BaseFunction(Value):
         super().__init__()
         self.name = name or "<anonymous>"
     
-    def generate_new_context(self):
-        new_context = Context(self.name, self.context, self.pos_start)
-        new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+    def generate_new_context(self, context, node):
+        # Scoping is dynamic: the callee's symbol table hangs off the caller's
+        new_context = Context(self.name, context, node.pos_start, node.pos_end, node)
+        new_context.symbol_table = SymbolTable(context.symbol_table)
         return new_context
 
-    def check_args(self, arg_names, args):
+    def check_args(self, arg_names, args, exec_ctx):
         res = RTResult()
 
         if len(args) > len(arg_names):
             return res.failure(RTError(
-                self.pos_start, self.pos_end,
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
                 f"{len(args) - len(arg_names)} too many args passed into '{self.name}'",
-                self.context
+                exec_ctx.parent
             ))
         
         if len(args) < len(arg_names):
             return res.failure(RTError(
-                self.pos_start, self.pos_end,
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
                 f"{len(arg_names) - len(args)} too few args passed into '{self.name}'",
-                self.context
+                exec_ctx.parent
             ))
         
         return res.success(None)
@@ -1574,42 +2199,80 @@ class BaseFunction(Value):
         for i in range(len(args)):
             arg_name = arg_names[i]
             arg_value = args[i]
-            arg_value.set_context(exec_ctx)
             exec_ctx.symbol_table.set(arg_name, arg_value)
     
     def check_and_populate_args(self, arg_names, args, exec_ctx):
         res = RTResult()
-        res.register(self.check_args(arg_names, args))
+        res.register(self.check_args(arg_names, args, exec_ctx))
         if res.should_return():
             return res
         self.populate_args(arg_names, args, exec_ctx)
         return res.success(None)
 
 class Function(BaseFunction):
-    def __init__(self, name, body_node, arg_names, should_auto_return):
+    def __init__(self, name, body_node, arg_names, should_auto_return, tier=None, yielding=None, arg_types=None):
         super().__init__(name)
         self.body_node = body_node
         self.arg_names = arg_names
         self.should_auto_return = should_auto_return
+        self.tier = tier or TierState()
+        self.yielding = yielding
+        # Annotated type name or None per argument, None when there are none
+        self.arg_types = arg_types
     
-    def execute(self, args):
+    def execute(self, args, context, node):
         res = RTResult()
         interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
+        exec_ctx = self.generate_new_context(context, node)
 
-        res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
+        res.register(self.check_args(self.arg_names, args, exec_ctx))
         if res.should_return():
             return res
- 
-        value = res.register(interpreter.visit(self.body_node, exec_ctx))
+
+        if self.arg_types:
+            args = res.register(self.check_arg_types(args, exec_ctx))
+            if res.should_return():
+                return res
+        self.populate_args(self.arg_names, args, exec_ctx)
+
+        # Generator bodies don't run until the generator is iterated
+        if self.yielding:
+            steps = GeneratorRunner(self.yielding).run(self.body_node, exec_ctx)
+            return res.success(Generator(self.name, steps))
+
+        compiled = self.tier.tick(HOT_FUNCTION_THRESHOLD, "function", self)
+        if compiled:
+            value = res.register(compiled(interpreter, exec_ctx))
+        else:
+            value = res.register(interpreter.visit(self.body_node, exec_ctx))
         if res.should_return() and res.func_return_value is None:
             return res
         
         return_value = (value if self.should_auto_return else None) or res.func_return_value or Number.none
         return res.success(return_value)
 
+    def check_arg_types(self, args, exec_ctx):
+        res = RTResult()
+        args = list(args)
+
+        for i, (arg_name, type_name) in enumerate(zip(self.arg_names, self.arg_types)):
+            if type_name is None:
+                continue
+
+            value = annotated_value(type_name, args[i])
+            if value is None:
+                return res.failure(RTError(
+                    exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                    f"Arg '{arg_name}' of '{self.name}' must be {type_name}",
+                    exec_ctx.parent
+                ))
+            args[i] = value
+            exec_ctx.symbol_table.types[arg_name] = type_name
+        
+        return res.success(args)
+
     def copy(self):
-        copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return)
+        copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return, self.tier, self.yielding, self.arg_types)
         copy.set_context(self.context)
         copy.set_pos(self.pos_start, self.pos_end)
         return copy
@@ -1617,23 +2280,91 @@ class Function(BaseFunction):
     def __repr__(self):
         return f"<function {self.name}>"
 
+MEMO_DEFAULT_MAX_SIZE = 1024
+
+class MemoCache:
+    def __init__(self, max_size):
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+class MemoizedFunction(BaseFunction):
+    def __init__(self, function, cache):
+        super().__init__(function.name)
+        self.function = function
+        self.cache = cache
+
+    def execute(self, args, context, node):
+        res = RTResult()
+        key = tuple(arg.hash_key() for arg in args)
+        if None in key:
+            return self.function.execute(args, context, node)
+
+        entries = self.cache.entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.cache.hits += 1
+            return res.success(entries[key])
+
+        self.cache.misses += 1
+        value = res.register(self.function.execute(args, context, node))
+        if res.should_return():
+            return res
+
+        # Only immutable values are shared between calls. Containers can be
+        # changed by whoever gets them and a generator can only be iterated
+        # once, so every call needs its own.
+        if not isinstance(value, (Number, String, BaseFunction)):
+            return res.success(value)
+
+        entries[key] = value
+        if len(entries) > self.cache.max_size:
+            entries.popitem(last=False)
+        return res.success(value)
+
+    def copy(self):
+        copy = MemoizedFunction(self.function, self.cache)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+    def __repr__(self):
+        return f"<memoized function {self.name}>"
+
+class CallbackFailed(Exception):
+    # Carries a failed result out through Python code that is driving BASIC
+    # code, like a sort calling a compare function or a loop over a generator
+    def __init__(self, result):
+        self.result = result
+
 class BuiltInFunction(BaseFunction):
 
     def __init__(self, name):
         super().__init__(name)
     
-    def execute(self, args):
+    def execute(self, args, context, node):
         res = RTResult()
-        exec_ctx = self.generate_new_context()
+        exec_ctx = self.generate_new_context(context, node)
 
         method_name = f"execute_{self.name}"
         method = getattr(self, method_name, self.no_visit_method)
 
-        res.register(self.check_and_populate_args(method.arg_names, args, exec_ctx))
+        # Optional args that were left out are bound to none
+        arg_names = method.arg_names
+        optional_arg_names = getattr(method, "optional_arg_names", [])
+        if optional_arg_names and len(args) >= len(arg_names):
+            arg_names = arg_names + optional_arg_names
+            args = args + [Number.none] * (len(arg_names) - len(args))
+
+        res.register(self.check_and_populate_args(arg_names, args, exec_ctx))
         if res.should_return():
             return res
         
-        return_value = res.register(method(exec_ctx))
+        try:
+            return_value = res.register(method(exec_ctx))
+        except CallbackFailed as failed:
+            return failed.result
         if res.should_return():
             return res
         return res.success(return_value)
@@ -1641,6 +2372,10 @@ class BuiltInFunction(BaseFunction):
     
     def no_visit_method(self, node, context):
         raise Exception(f"No execute_{self.name} method defined")
+
+    def call(self, function, args, exec_ctx):
+        # Functions handed to a builtin run as if called where the builtin was
+        return function.execute(args, exec_ctx.parent, exec_ctx.call_node)
     
     def copy(self):
         copy = BuiltInFunction(self.name)
@@ -1717,14 +2452,14 @@ class BuiltInFunction(BaseFunction):
         list_ = exec_ctx.symbol_table.get("list")
         value = exec_ctx.symbol_table.get("value")
 
-        if not isinstance(list_, List):
+        if not isinstance(list_, (List, Deque)):
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
-                "First arg must be list",
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be list or deque",
                 exec_ctx
             ))
         
-        list_.elements.append(value)
+        list_.append(value)
         return RTResult().success(Number.none)
     execute_append.arg_names = ["list", "value"]
 
@@ -1732,146 +2467,1524 @@ class BuiltInFunction(BaseFunction):
         list_ = exec_ctx.symbol_table.get("list")
         index = exec_ctx.symbol_table.get("index")
 
-        if not isinstance(list_, List):
+        if not isinstance(list_, (List, Deque)):
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
-                "First arg must be list",
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be list or deque",
                 exec_ctx
             ))
         
         if not isinstance(index, Number):
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
                 "Second arg must be number",
                 exec_ctx
             ))
         
-        try:
-            element = list_.elements.pop(index.value)
-        except:
+        index = list_.normalize_index(index.value)
+        if index is None:
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
                 "Element could not be removed because list index out of range",
                 exec_ctx
             ))    
-        return RTResult().success(element)
+        return RTResult().success(list_.pop(index))
     execute_pop.arg_names = ["list", "index"]
 
     def execute_extend(self, exec_ctx):
         listA = exec_ctx.symbol_table.get("listA")
         listB = exec_ctx.symbol_table.get("listB")
 
-        if not isinstance(listA, List):
+        if not isinstance(listA, (List, Deque)):
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
-                "First arg must be list",
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be list or deque",
                 exec_ctx
             ))
         
-        if not isinstance(listB, List):
+        if not isinstance(listB, (List, Deque, Generator)):
             return RTResult().failure(RTError(
-                self.pos_start, self.pos_end,
-                "Second arg must be list",
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be list, deque or generator",
                 exec_ctx
             ))
         
-        listA.elements.extend(listB.elements)
+        listA.extend(listB)
         return RTResult().success(Number.none)
     execute_extend.arg_names = ["listA", "listB"]  
 
-class String(Value):
-    def __init__(self, value):
-        super().__init__()
-        self.value = value
-    
-    def added_to(self, other):
-        if isinstance(other, String):
-            return String(self.value + other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
+    ##################################
 
-    def multed_by(self, other):
-        if isinstance(other, Number):
-            return String(self.value * other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-    
-    def is_true(self):
-        return len(self.value) > 0
-    
-    def copy(self):
-        copy = String(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
-    
-    def __str__(self):
-        return self.value
-    
-    def __repr__(self):
-        return f'"{self.value}"'
+    def list_arg(self, exec_ctx):
+        list_ = exec_ctx.symbol_table.get("list")
 
-class List(Value):
-    def __init__(self, elements):
-        super().__init__()
-        self.elements = elements
-    
-    def added_to(self, other):
-        new_list = self.copy()
-        new_list.elements.append(other)
-        return new_list, None
+        if not isinstance(list_, (List, Deque, Generator)):
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be list, deque or generator",
+                exec_ctx
+            )
+        
+        return list_, None
 
-    def subbed_by(self, other):
-        if isinstance(other, Number):
-            new_list = self.copy()
-            try:
-                new_list.elements.pop(other.value)
-                return new_list, None
-            except:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
-                    "Element at this index could not be removed from list because list index out of range",
-                    self.context
-                )
-        else:
-            return None, Value.illegal_operation(self, other)  
-    
-    def multed_by(self, other):
-        if isinstance(other, List):
-            new_list = self.copy()
-            new_list.elements.extend(other.elements)
-            return new_list, None
-        else:
-            return None, Value.illegal_operation(self, other)
-    
-    def dived_by(self, other):
-        if isinstance(other, Number):
-            try:
-                return self.elements[other.value], None
-            except:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
-                    "Element at this index could not be accessed because list index out of range",
-                    self.context
-                )
-        else:
-            return None, Value.illegal_operation(self, other)  
-    
-    def copy(self):
-        copy = List(self.elements)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
-    
-    def __str__(self):
-        return f"[{', '.join([repr(x) for x in self.elements])}]"
+    def function_arg(self, exec_ctx, name, position):
+        function = exec_ctx.symbol_table.get(name)
 
-    def __repr__(self):
-        return self.__str__()
+        if not isinstance(function, BaseFunction):
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                f"{position} arg must be function",
+                exec_ctx
+            )
+        
+        return function, None
 
-##################################
-# Built-in Functions
-##################################
+    def execute_map(self, exec_ctx):
+        res = RTResult()
+        list_, error = self.list_arg(exec_ctx)
+        if not error:
+            function, error = self.function_arg(exec_ctx, "func", "Second")
+        if error:
+            return res.failure(error)
+
+        # Like for-in, go over a snapshot the callback is free to change
+        results = []
+        for element in list_.iterate():
+            results.append(res.register(self.call(function, [element], exec_ctx)))
+            if res.should_return():
+                return res
+        return res.success(List(results))
+    execute_map.arg_names = ["list", "func"]
+
+    def execute_filter(self, exec_ctx):
+        res = RTResult()
+        list_, error = self.list_arg(exec_ctx)
+        if not error:
+            function, error = self.function_arg(exec_ctx, "func", "Second")
+        if error:
+            return res.failure(error)
+
+        results = []
+        for element in list_.iterate():
+            keep = res.register(self.call(function, [element], exec_ctx))
+            if res.should_return():
+                return res
+            if keep.is_true():
+                results.append(element)
+        return res.success(List(results))
+    execute_filter.arg_names = ["list", "func"]
+
+    def execute_reduce(self, exec_ctx):
+        res = RTResult()
+        list_, error = self.list_arg(exec_ctx)
+        if not error:
+            function, error = self.function_arg(exec_ctx, "func", "Second")
+        if error:
+            return res.failure(error)
+
+        elements = list_.iterate()
+        accumulator = exec_ctx.symbol_table.get("initial")
+        if accumulator is Number.none:
+            accumulator = next(elements, None)
+            if accumulator is None:
+                return res.failure(RTError(
+                    exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                    "Cannot reduce an empty list without an initial value",
+                    exec_ctx
+                ))
+
+        for element in elements:
+            accumulator = res.register(self.call(function, [accumulator, element], exec_ctx))
+            if res.should_return():
+                return res
+        return res.success(accumulator)
+    execute_reduce.arg_names = ["list", "func"]
+    execute_reduce.optional_arg_names = ["initial"]
+
+    def execute_sort(self, exec_ctx):
+        res = RTResult()
+        list_, error = self.list_arg(exec_ctx)
+        if error:
+            return res.failure(error)
+
+        key_function = exec_ctx.symbol_table.get("key")
+        compare_function = exec_ctx.symbol_table.get("compare")
+        if key_function is not Number.none:
+            key_function, error = self.function_arg(exec_ctx, "key", "Second")
+        if not error and compare_function is not Number.none:
+            compare_function, error = self.function_arg(exec_ctx, "compare", "Third")
+        if error:
+            return res.failure(error)
+
+        # Sorting a list of indices keeps the sort stable without ever
+        # comparing two elements whose keys are equal
+        elements = list(list_)
+        keys = elements
+        if key_function is not Number.none:
+            keys = []
+            for element in elements:
+                keys.append(res.register(self.call(key_function, [element], exec_ctx)))
+                if res.should_return():
+                    return res
+
+        if compare_function is Number.none:
+            if not (all(isinstance(key, Number) for key in keys) or all(isinstance(key, String) for key in keys)):
+                return res.failure(RTError(
+                    exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                    "Sort keys must be all numbers or all strings",
+                    exec_ctx
+                ))
+            order = sorted(range(len(keys)), key=lambda index: keys[index].value)
+            return res.success(List([elements[index] for index in order]))
+
+        def compare(left, right):
+            result = RTResult()
+            sign = result.register(self.call(compare_function, [keys[left], keys[right]], exec_ctx))
+            if result.should_return():
+                raise CallbackFailed(result)
+            if not isinstance(sign, Number):
+                raise CallbackFailed(result.failure(RTError(
+                    exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                    "Compare function must return a number",
+                    exec_ctx
+                )))
+            return sign.value
+
+        try:
+            order = sorted(range(len(keys)), key=cmp_to_key(compare))
+        except CallbackFailed as failed:
+            return failed.result
+        return res.success(List([elements[index] for index in order]))
+    execute_sort.arg_names = ["list"]
+    execute_sort.optional_arg_names = ["key", "compare"]
+
+    def execute_index_of(self, exec_ctx):
+        list_, error = self.list_arg(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        value = exec_ctx.symbol_table.get("value")
+        target = value.hash_key()
+        for index, element in enumerate(list_):
+            if element is value or (target is not None and type(element) is type(value) and element.hash_key() == target):
+                return RTResult().success(Number(index))
+        return RTResult().success(Number(-1))
+    execute_index_of.arg_names = ["list", "value"]
+
+    def execute_slice(self, exec_ctx):
+        list_, error = self.list_arg(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        start = exec_ctx.symbol_table.get("start")
+        end = exec_ctx.symbol_table.get("end")
+
+        if not isinstance(start, Number) or not isinstance(start.value, int):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be integer",
+                exec_ctx
+            ))
+        
+        if end is Number.none:
+            end = None
+        elif isinstance(end, Number) and isinstance(end.value, int):
+            end = end.value
+        else:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Third arg must be integer",
+                exec_ctx
+            ))
+        
+        # Reads a List through get() so its persistent vector stays shared
+        if isinstance(list_, List):
+            indices = range(*slice(start.value, end).indices(list_.length()))
+            return RTResult().success(List([list_.get(index) for index in indices]))
+        return RTResult().success(List(list(list_)[start.value:end]))
+    execute_slice.arg_names = ["list", "start"]
+    execute_slice.optional_arg_names = ["end"]
+
+    def execute_make_list(self, exec_ctx):
+        size = exec_ctx.symbol_table.get("size")
+        fill = exec_ctx.symbol_table.get("fill")
+
+        if not isinstance(size, Number) or not isinstance(size.value, int) or size.value < 0:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be a non-negative integer",
+                exec_ctx
+            ))
+        
+        # Every slot holds the same fill value, as in [fill] * size
+        try:
+            elements = [fill] * size.value
+        except (OverflowError, MemoryError):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "List is too large to allocate",
+                exec_ctx
+            ))
+        return RTResult().success(List(elements))
+    execute_make_list.arg_names = ["size", "fill"]
+
+    ##################################
+
+    def execute_memoize(self, exec_ctx):
+        function = exec_ctx.symbol_table.get("func")
+        max_size = exec_ctx.symbol_table.get("max_size")
+
+        if not isinstance(function, BaseFunction):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be function",
+                exec_ctx
+            ))
+        
+        if max_size is Number.none:
+            max_size = Number(MEMO_DEFAULT_MAX_SIZE)
+        if not isinstance(max_size, Number) or not isinstance(max_size.value, int) or max_size.value < 1:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be a positive integer",
+                exec_ctx
+            ))
+        
+        return RTResult().success(MemoizedFunction(function, MemoCache(max_size.value)))
+    execute_memoize.arg_names = ["func"]
+    execute_memoize.optional_arg_names = ["max_size"]
+
+    def execute_memo_stats(self, exec_ctx):
+        function = exec_ctx.symbol_table.get("func")
+
+        if not isinstance(function, MemoizedFunction):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be memoized function",
+                exec_ctx
+            ))
+        
+        cache = function.cache
+        return RTResult().success(List([
+            Number(cache.hits), Number(cache.misses), Number(len(cache.entries))
+        ]))
+    execute_memo_stats.arg_names = ["func"]
+
+    ##################################
+
+    def map_args(self, exec_ctx):
+        map_ = exec_ctx.symbol_table.get("map")
+        key = exec_ctx.symbol_table.get("key")
+
+        if not isinstance(map_, Map):
+            return None, None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be map",
+                exec_ctx
+            )
+        
+        hash_key = key.hash_key()
+        if hash_key is None:
+            return None, None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Map keys must be numbers, strings or lists of them",
+                exec_ctx
+            )
+        
+        return map_, hash_key, None
+
+    def execute_get(self, exec_ctx):
+        map_, hash_key, error = self.map_args(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        entry = map_.entries.get(hash_key)
+        if entry is None:
+            return RTResult().success(exec_ctx.symbol_table.get("default"))
+        return RTResult().success(entry[1])
+    execute_get.arg_names = ["map", "key"]
+    execute_get.optional_arg_names = ["default"]
+
+    def execute_set(self, exec_ctx):
+        container = exec_ctx.symbol_table.get("map")
+
+        if isinstance(container, (List, Deque, Array)):
+            _, error = container.set_at(exec_ctx.symbol_table.get("key"), exec_ctx.symbol_table.get("value"))
+            if error:
+                error.pos_start, error.pos_end, error.context = exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end, exec_ctx
+                return RTResult().failure(error)
+            return RTResult().success(Number.none)
+
+        if not isinstance(container, Map):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be map, list, deque or array",
+                exec_ctx
+            ))
+
+        map_, hash_key, error = self.map_args(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        map_.entries[hash_key] = (frozen_key(exec_ctx.symbol_table.get("key")), exec_ctx.symbol_table.get("value"))
+        return RTResult().success(Number.none)
+    execute_set.arg_names = ["map", "key", "value"]
+
+    def execute_has(self, exec_ctx):
+        map_, hash_key, error = self.map_args(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(Number.true if hash_key in map_.entries else Number.false)
+    execute_has.arg_names = ["map", "key"]
+
+    def execute_delete(self, exec_ctx):
+        map_, hash_key, error = self.map_args(exec_ctx)
+        if error:
+            return RTResult().failure(error)
+
+        if hash_key not in map_.entries:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Key could not be deleted because it is not in the map",
+                exec_ctx
+            ))
+        
+        del map_.entries[hash_key]
+        return RTResult().success(Number.none)
+    execute_delete.arg_names = ["map", "key"]
+
+    def execute_keys(self, exec_ctx):
+        map_ = exec_ctx.symbol_table.get("map")
+
+        if not isinstance(map_, Map):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be map",
+                exec_ctx
+            ))
+        
+        return RTResult().success(List([key for key, value in map_.entries.values()]))
+    execute_keys.arg_names = ["map"]
+
+    ##################################
+
+    def execute_deque(self, exec_ctx):
+        list_ = exec_ctx.symbol_table.get("list")
+
+        if list_ is Number.none:
+            return RTResult().success(Deque(deque()))
+
+        if not isinstance(list_, List):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be list",
+                exec_ctx
+            ))
+        
+        return RTResult().success(Deque(deque(list_)))
+    execute_deque.arg_names = []
+    execute_deque.optional_arg_names = ["list"]
+
+    def deque_arg(self, exec_ctx, must_have_items):
+        deque_ = exec_ctx.symbol_table.get("deque")
+
+        if not isinstance(deque_, Deque):
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be deque",
+                exec_ctx
+            )
+        
+        if must_have_items and not deque_.items:
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Deque is empty",
+                exec_ctx
+            )
+        
+        return deque_, None
+
+    def execute_push_front(self, exec_ctx):
+        deque_, error = self.deque_arg(exec_ctx, False)
+        if error:
+            return RTResult().failure(error)
+
+        deque_.items.appendleft(exec_ctx.symbol_table.get("value"))
+        return RTResult().success(Number.none)
+    execute_push_front.arg_names = ["deque", "value"]
+
+    def execute_push_back(self, exec_ctx):
+        deque_, error = self.deque_arg(exec_ctx, False)
+        if error:
+            return RTResult().failure(error)
+
+        deque_.items.append(exec_ctx.symbol_table.get("value"))
+        return RTResult().success(Number.none)
+    execute_push_back.arg_names = ["deque", "value"]
+
+    def execute_pop_front(self, exec_ctx):
+        deque_, error = self.deque_arg(exec_ctx, True)
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(deque_.items.popleft())
+    execute_pop_front.arg_names = ["deque"]
+
+    def execute_pop_back(self, exec_ctx):
+        deque_, error = self.deque_arg(exec_ctx, True)
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(deque_.items.pop())
+    execute_pop_back.arg_names = ["deque"]
+
+    ##################################
+
+    def execute_heap(self, exec_ctx):
+        key_function = exec_ctx.symbol_table.get("key")
+
+        if key_function is Number.none:
+            key_function = None
+        elif not isinstance(key_function, BaseFunction):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be function",
+                exec_ctx
+            ))
+        
+        return RTResult().success(Heap(key_function))
+    execute_heap.arg_names = []
+    execute_heap.optional_arg_names = ["key"]
+
+    def heap_arg(self, exec_ctx, must_have_entries):
+        heap = exec_ctx.symbol_table.get("heap")
+
+        if not isinstance(heap, Heap):
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be heap",
+                exec_ctx
+            )
+        
+        if must_have_entries and not heap.entries:
+            return None, RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Heap is empty",
+                exec_ctx
+            )
+        
+        return heap, None
+
+    def execute_heap_push(self, exec_ctx):
+        res = RTResult()
+        heap, error = self.heap_arg(exec_ctx, False)
+        if error:
+            return res.failure(error)
+
+        value = exec_ctx.symbol_table.get("value")
+        key = value
+        if heap.key_function:
+            key = res.register(self.call(heap.key_function, [value], exec_ctx))
+            if res.should_return():
+                return res
+
+        if not isinstance(key, (Number, String)) or (heap.entries and isinstance(key.value, str) != isinstance(heap.entries[0][0], str)):
+            return res.failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Heap keys must be all numbers or all strings",
+                exec_ctx
+            ))
+        
+        heap.push(key.value, value)
+        return res.success(Number.none)
+    execute_heap_push.arg_names = ["heap", "value"]
+
+    def execute_heap_pop(self, exec_ctx):
+        heap, error = self.heap_arg(exec_ctx, True)
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(heapq.heappop(heap.entries)[2])
+    execute_heap_pop.arg_names = ["heap"]
+
+    def execute_heap_peek(self, exec_ctx):
+        heap, error = self.heap_arg(exec_ctx, True)
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(heap.entries[0][2])
+    execute_heap_peek.arg_names = ["heap"]
+
+    ##################################
+
+    def string_args(self, exec_ctx, names):
+        # Fetches the leading args named in names, which must all be strings
+        strings = []
+        for position, name in zip(("First", "Second", "Third"), names):
+            string = exec_ctx.symbol_table.get(name)
+            if not isinstance(string, String):
+                return None, RTError(
+                    exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                    f"{position} arg must be string",
+                    exec_ctx
+                )
+            strings.append(string)
+        return strings, None
+
+    def execute_len(self, exec_ctx):
+        value = exec_ctx.symbol_table.get("value")
+
+        if isinstance(value, String):
+            return RTResult().success(Number(value.size()))
+        if isinstance(value, (List, Deque)):
+            return RTResult().success(Number(value.length()))
+        if isinstance(value, (Map, Heap)):
+            return RTResult().success(Number(len(value.entries)))
+        if isinstance(value, Array):
+            return RTResult().success(Number(len(value.values)))
+
+        return RTResult().failure(RTError(
+            exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+            "Arg must be string, list, deque, map, heap or array",
+            exec_ctx
+        ))
+    execute_len.arg_names = ["value"]
+
+    def execute_substr(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string"])
+        if error:
+            return RTResult().failure(error)
+
+        string = strings[0]
+        start = exec_ctx.symbol_table.get("start")
+        length = exec_ctx.symbol_table.get("length")
+        size = string.size()
+
+        if not isinstance(start, Number) or not isinstance(start.value, int):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be integer",
+                exec_ctx
+            ))
+        
+        begin = start.value + size if start.value < 0 else start.value
+        if begin < 0 or begin > size:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Substring could not be taken because start index out of range",
+                exec_ctx
+            ))
+        
+        if length is Number.none:
+            end = size
+        elif isinstance(length, Number) and isinstance(length.value, int) and length.value >= 0:
+            end = min(begin + length.value, size)
+        else:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Third arg must be a non-negative integer",
+                exec_ctx
+            ))
+        
+        return RTResult().success(string.substring(begin, end))
+    execute_substr.arg_names = ["string", "start"]
+    execute_substr.optional_arg_names = ["length"]
+
+    def execute_find(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string", "needle"])
+        if error:
+            return RTResult().failure(error)
+
+        string, needle = strings
+        start = exec_ctx.symbol_table.get("start")
+
+        if not isinstance(start, Number) or not isinstance(start.value, int):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Third arg must be integer",
+                exec_ctx
+            ))
+        
+        # Views are searched in place inside the buffer they point into
+        source, begin, end = string.span()
+        offset = start.value + end - begin if start.value < 0 else start.value
+        index = source.find(needle.value, begin + max(offset, 0), end)
+        return RTResult().success(Number(index - begin if index >= 0 else -1))
+    execute_find.arg_names = ["string", "needle"]
+    execute_find.optional_arg_names = ["start"]
+
+    def execute_split(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string"])
+        if error:
+            return RTResult().failure(error)
+
+        separator = exec_ctx.symbol_table.get("separator")
+
+        if separator is Number.none:
+            parts = strings[0].value.split()
+        elif not isinstance(separator, String) or separator.size() == 0:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be a non-empty string",
+                exec_ctx
+            ))
+        else:
+            parts = strings[0].value.split(separator.value)
+        
+        return RTResult().success(List([String(part) for part in parts]))
+    execute_split.arg_names = ["string"]
+    execute_split.optional_arg_names = ["separator"]
+
+    def execute_join(self, exec_ctx):
+        list_ = exec_ctx.symbol_table.get("list")
+        separator = exec_ctx.symbol_table.get("separator")
+
+        if isinstance(list_, Generator):
+            list_ = list(list_)
+
+        if not isinstance(list_, (List, Deque, list)) or not all(isinstance(element, String) for element in list_):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be list of strings",
+                exec_ctx
+            ))
+        
+        if separator is Number.none:
+            separator = ""
+        elif isinstance(separator, String):
+            separator = separator.value
+        else:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be string",
+                exec_ctx
+            ))
+        
+        return RTResult().success(String(separator.join([element.value for element in list_])))
+    execute_join.arg_names = ["list"]
+    execute_join.optional_arg_names = ["separator"]
+
+    def execute_replace(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string", "old", "new"])
+        if error:
+            return RTResult().failure(error)
+
+        string, old, new = strings
+        return RTResult().success(String(string.value.replace(old.value, new.value)))
+    execute_replace.arg_names = ["string", "old", "new"]
+
+    def execute_upper(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string"])
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(String(strings[0].value.upper()))
+    execute_upper.arg_names = ["string"]
+
+    def execute_lower(self, exec_ctx):
+        strings, error = self.string_args(exec_ctx, ["string"])
+        if error:
+            return RTResult().failure(error)
+
+        return RTResult().success(String(strings[0].value.lower()))
+    execute_lower.arg_names = ["string"]
+
+    ##################################
+
+    def numpy_missing(self, exec_ctx):
+        return RTResult().failure(RTError(
+            exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+            "Arrays need NumPy, which is not installed",
+            exec_ctx
+        ))
+
+    def execute_array(self, exec_ctx):
+        size = exec_ctx.symbol_table.get("size")
+        fill = exec_ctx.symbol_table.get("fill")
+
+        if numpy is None:
+            return self.numpy_missing(exec_ctx)
+
+        if not isinstance(size, Number) or not isinstance(size.value, int) or size.value < 0:
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "First arg must be a non-negative integer",
+                exec_ctx
+            ))
+        
+        if not isinstance(fill, Number):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Second arg must be number",
+                exec_ctx
+            ))
+        
+        try:
+            values = numpy.full(size.value, fill.value)
+        except (ValueError, MemoryError):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Array is too large to allocate",
+                exec_ctx
+            ))
+        return RTResult().success(Array(values))
+    execute_array.arg_names = ["size", "fill"]
+
+    def execute_to_array(self, exec_ctx):
+        list_ = exec_ctx.symbol_table.get("list")
+
+        if numpy is None:
+            return self.numpy_missing(exec_ctx)
+
+        if not isinstance(list_, List) or not all(isinstance(element, Number) for element in list_):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be list of numbers",
+                exec_ctx
+            ))
+        
+        return RTResult().success(Array(numpy.array([element.value for element in list_])))
+    execute_to_array.arg_names = ["list"]
+
+    def execute_to_list(self, exec_ctx):
+        array = exec_ctx.symbol_table.get("array")
+
+        if isinstance(array, Generator):
+            return RTResult().success(List(list(array)))
+
+        if not isinstance(array, Array):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be array or generator",
+                exec_ctx
+            ))
+        
+        return RTResult().success(List([Number(value) for value in array.values.tolist()]))
+    execute_to_list.arg_names = ["array"]
+
+    def reduce_array(self, exec_ctx, reduction_name):
+        array = exec_ctx.symbol_table.get("array")
+
+        if not isinstance(array, Array):
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Arg must be array",
+                exec_ctx
+            ))
+        
+        if len(array.values) == 0 and reduction_name != "sum":
+            return RTResult().failure(RTError(
+                exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                "Array must not be empty",
+                exec_ctx
+            ))
+        
+        reduction = getattr(numpy, reduction_name)
+        return RTResult().success(Number(reduction(array.values).item()))
+
+    def execute_sum(self, exec_ctx):
+        values = exec_ctx.symbol_table.get("array")
+
+        if isinstance(values, (List, Deque, Generator)):
+            # One pass, so a generator is summed without being stored
+            total = 0
+            for element in values:
+                if not isinstance(element, Number):
+                    return RTResult().failure(RTError(
+                        exec_ctx.parent_entry_pos, exec_ctx.parent_entry_end,
+                        "Arg must be list of numbers or array",
+                        exec_ctx
+                    ))
+                total += element.value
+            return RTResult().success(Number(total))
+
+        return self.reduce_array(exec_ctx, "sum")
+    execute_sum.arg_names = ["array"]
+
+    def execute_min(self, exec_ctx):
+        return self.reduce_array(exec_ctx, "min")
+    execute_min.arg_names = ["array"]
+
+    def execute_max(self, exec_ctx):
+        return self.reduce_array(exec_ctx, "max")
+    execute_max.arg_names = ["array"]
+
+    def execute_mean(self, exec_ctx):
+        return self.reduce_array(exec_ctx, "mean")
+    execute_mean.arg_names = ["array"]
+
+ROPE_MIN_LENGTH = 256
+
+class String(Value):
+    # Long strings built with + are kept as a list of parts and only joined
+    # when their value is first read. Every string in a chain of additions
+    # shares one parts list and knows how many of the parts are its own, so
+    # the newest string can keep appending to the list in place.
+    # Substrings are views that keep a reference to the string they were cut
+    # from plus an offset, and are only copied out when their value is read.
+    parts = None
+    part_count = 0
+    source = None
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    @classmethod
+    def from_parts(cls, parts, length):
+        string = cls.__new__(cls)
+        Value.__init__(string)
+        string.parts = parts
+        string.part_count = len(parts)
+        string.length = length
+        return string
+
+    @classmethod
+    def from_view(cls, source, offset, length):
+        string = cls.__new__(cls)
+        Value.__init__(string)
+        string.source = source
+        string.offset = offset
+        string.length = length
+        return string
+
+    def __getattr__(self, name):
+        # Only reached when a rope's or view's value is read for the first time
+        if name != "value":
+            raise AttributeError(name)
+
+        if self.parts is not None:
+            parts = self.parts if self.part_count == len(self.parts) else self.parts[:self.part_count]
+            self.value = "".join(parts)
+            self.parts = None
+        elif self.source is not None:
+            self.value = self.source[self.offset:self.offset + self.length]
+            self.source = None
+        else:
+            raise AttributeError(name)
+        return self.value
+
+    def size(self):
+        if self.parts is None and self.source is None:
+            return len(self.value)
+        return self.length
+
+    def span(self):
+        # The buffer this string lives in and its bounds there, without copying a view
+        if self.source is not None:
+            return self.source, self.offset, self.offset + self.length
+        value = self.value
+        return value, 0, len(value)
+
+    def substring(self, start, end):
+        source, offset, _ = self.span()
+        return String.from_view(source, offset + start, end - start)
+
+    def iterate(self):
+        return map(String, self.value)
+    
+    def added_to(self, other):
+        if isinstance(other, String):
+            piece = other.value
+            parts = self.parts
+            if parts is not None and self.part_count == len(parts):
+                parts.append(piece)
+                return String.from_parts(parts, self.length + len(piece)), None
+
+            length = self.size() + len(piece)
+            if length < ROPE_MIN_LENGTH:
+                return String(self.value + piece), None
+            return String.from_parts([self.value, piece], length), None
+        else:
+            return None, self.illegal_operation(other)
+
+    def multed_by(self, other):
+        if isinstance(other, Number):
+            return String(self.value * other.value), None
+        else:
+            return None, self.illegal_operation(other)
+    
+    def get_comparison_eq(self, other):
+        if isinstance(other, String):
+            return Number(int(self.value == other.value)), None
+        else:
+            return None, self.illegal_operation(other)
+
+    def get_comparison_ne(self, other):
+        if isinstance(other, String):
+            return Number(int(self.value != other.value)), None
+        else:
+            return None, self.illegal_operation(other)
+    
+    def is_true(self):
+        return self.size() > 0
+
+    def hash_key(self):
+        return self.value
+    
+    def copy(self):
+        copy = String(self.value)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+    
+    def __str__(self):
+        return self.value
+    
+    def __repr__(self):
+        return f'"{self.value}"'
+
+class List(Value):
+    def __init__(self, elements, vector=PVector.EMPTY):
+        super().__init__()
+        # The first part of the list lives in a persistent vector that may be
+        # shared with other lists, the rest in a tail owned by this list alone.
+        # append and extend grow the tail in place, the operators work on the
+        # vector and never modify a list that already exists.
+        self.vector = vector
+        self.tail = elements
+
+    @property
+    def elements(self):
+        if self.vector.root is not None:
+            self.tail = list(self.vector) + self.tail
+            self.vector = PVector.EMPTY
+        return self.tail
+
+    def persistent(self):
+        if self.tail:
+            self.vector = self.vector.extend(self.tail)
+            self.tail = []
+        return self.vector
+
+    def length(self):
+        return len(self.vector) + len(self.tail)
+
+    def normalize_index(self, index):
+        if not isinstance(index, int):
+            return None
+        if index < 0:
+            index += self.length()
+        if not 0 <= index < self.length():
+            return None
+        return index
+
+    def get(self, index):
+        if index < len(self.vector):
+            return self.vector[index]
+        return self.tail[index - len(self.vector)]
+
+    def append(self, value):
+        self.tail.append(value)
+
+    def extend(self, other):
+        self.tail.extend(list(other))
+
+    def set(self, index, value):
+        if index < len(self.vector):
+            self.vector = self.vector.set(index, value)
+        else:
+            self.tail[index - len(self.vector)] = value
+
+    def pop(self, index):
+        if index >= len(self.vector):
+            return self.tail.pop(index - len(self.vector))
+        element = self.vector[index]
+        self.vector = self.vector.remove(index)
+        return element
+
+    def updated_by(self, op_type, other):
+        if op_type == TT_PLUS:
+            self.append(other)
+            return self, None
+
+        if op_type == TT_MUL and isinstance(other, List):
+            self.extend(other)
+            return self, None
+
+        if op_type == TT_MUL and isinstance(other, Number):
+            elements, error = self.repeated(other)
+            if error:
+                return None, error
+            self.tail = elements
+            return self, None
+
+        if op_type == TT_MINUS and isinstance(other, Number):
+            index = self.normalize_index(other.value)
+            if index is None:
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    "Element at this index could not be removed from list because list index out of range",
+                    self.context
+                )
+            self.pop(index)
+            return self, None
+
+        return None, None
+
+    def set_at(self, index, value):
+        if isinstance(index, Number):
+            position = self.normalize_index(index.value)
+            if position is None:
+                return None, RTError(
+                    index.pos_start, index.pos_end,
+                    "Element at this index could not be assigned because list index out of range",
+                    self.context
+                )
+            self.set(position, value)
+            return self, None
+        else:
+            return None, self.illegal_operation(index)
+
+    def added_to(self, other):
+        return List([], self.persistent().append(other)), None
+
+    def subbed_by(self, other):
+        if isinstance(other, Number):
+            index = self.normalize_index(other.value)
+            if index is None:
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    "Element at this index could not be removed from list because list index out of range",
+                    self.context
+                )
+            return List([], self.persistent().remove(index)), None
+        else:
+            return None, self.illegal_operation(other)  
+    
+    def multed_by(self, other):
+        if isinstance(other, List):
+            return List([], self.persistent().concat(other.persistent())), None
+        elif isinstance(other, Number):
+            elements, error = self.repeated(other)
+            if error:
+                return None, error
+            return List(elements), None
+        else:
+            return None, self.illegal_operation(other)
+
+    def repeated(self, count):
+        # Repetition builds the whole tail in one allocation
+        if not isinstance(count.value, int) or count.value < 0:
+            return None, RTError(
+                count.pos_start, count.pos_end,
+                "List can only be repeated a non-negative integer number of times",
+                self.context
+            )
+
+        try:
+            return self.elements * count.value, None
+        except (OverflowError, MemoryError):
+            return None, RTError(
+                count.pos_start, count.pos_end,
+                "List is too large to allocate",
+                self.context
+            )
+    
+    def dived_by(self, other):
+        if isinstance(other, Number):
+            index = self.normalize_index(other.value)
+            if index is None:
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    "Element at this index could not be accessed because list index out of range",
+                    self.context
+                )
+            return self.get(index), None
+        else:
+            return None, self.illegal_operation(other)  
+    
+    def copy(self):
+        copy = List([], self.persistent())
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def hash_key(self):
+        keys = tuple(element.hash_key() for element in self)
+        if None in keys:
+            return None
+        return keys
+
+    def iterate(self):
+        # Loops go over a snapshot, like every other container. The vector
+        # never changes in place, so only the tail needs copying.
+        if self.vector.root is None:
+            return iter(self.tail[:])
+        return chain(self.vector, self.tail[:])
+
+    def __iter__(self):
+        yield from self.vector
+        yield from self.tail
+    
+    def __str__(self):
+        return f"[{', '.join([repr(x) for x in self])}]"
+
+    def __repr__(self):
+        return self.__str__()
+
+class Deque(Value):
+    # Shares append, extend and pop with List so the list builtins work on
+    # it, but pushing and popping at either end is O(1)
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def length(self):
+        return len(self.items)
+
+    def normalize_index(self, index):
+        if not isinstance(index, int):
+            return None
+        if index < 0:
+            index += len(self.items)
+        if not 0 <= index < len(self.items):
+            return None
+        return index
+
+    def append(self, value):
+        self.items.append(value)
+
+    def extend(self, other):
+        self.items.extend(list(other))
+
+    def pop(self, index):
+        if index == 0:
+            return self.items.popleft()
+        if index == len(self.items) - 1:
+            return self.items.pop()
+        element = self.items[index]
+        del self.items[index]
+        return element
+
+    def set_at(self, index, value):
+        if isinstance(index, Number):
+            position = self.normalize_index(index.value)
+            if position is None:
+                return None, RTError(
+                    index.pos_start, index.pos_end,
+                    "Element at this index could not be assigned because deque index out of range",
+                    self.context
+                )
+            self.items[position] = value
+            return self, None
+        else:
+            return None, self.illegal_operation(index)
+
+    def dived_by(self, other):
+        if isinstance(other, Number):
+            index = self.normalize_index(other.value)
+            if index is None:
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    "Element at this index could not be accessed because deque index out of range",
+                    self.context
+                )
+            return self.items[index], None
+        else:
+            return None, self.illegal_operation(other)
+
+    def copy(self):
+        copy = Deque(self.items)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def iterate(self):
+        # A deque can't be changed while it's being iterated, so loop over a snapshot
+        return iter(list(self.items))
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __str__(self):
+        return f"deque([{', '.join([repr(x) for x in self.items])}])"
+
+    def __repr__(self):
+        return self.__str__()
+
+class Heap(Value):
+    # A binary heap of (key, insertion count, value) entries, so the smallest
+    # key comes out first and equal keys come out in the order they went in
+
+    def __init__(self, key_function):
+        super().__init__()
+        self.key_function = key_function
+        self.entries = []
+        self.count = 0
+
+    def push(self, key, value):
+        heapq.heappush(self.entries, (key, self.count, value))
+        self.count += 1
+
+    def copy(self):
+        copy = Heap(self.key_function)
+        copy.entries = self.entries
+        copy.count = self.count
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __str__(self):
+        return f"heap([{', '.join([repr(entry[2]) for entry in sorted(self.entries)])}])"
+
+    def __repr__(self):
+        return self.__str__()
+
+class Generator(Value):
+    # What calling a generator function returns. Its body runs a step at a
+    # time as it is iterated, and like a Python generator it can only be
+    # iterated once.
+
+    def __init__(self, name, steps):
+        super().__init__()
+        self.name = name
+        self.steps = steps
+
+    def iterate(self):
+        return self.steps
+
+    def copy(self):
+        copy = Generator(self.name, self.steps)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __iter__(self):
+        return self.steps
+
+    def __repr__(self):
+        return f"<generator {self.name}>"
+
+def frozen_key(key):
+    # Maps keep a snapshot of list keys, nested ones included, so changing
+    # the list a key came from can't change the key behind its hash
+    if isinstance(key, List):
+        return List([frozen_key(element) for element in key])
+    return key
+
+class Map(Value):
+    def __init__(self, entries):
+        super().__init__()
+        # Maps each key's hash_key() to its (key, value) pair
+        self.entries = entries
+
+    def iterate(self):
+        return iter([key for key, value in self.entries.values()])
+
+    def copy(self):
+        copy = Map(self.entries)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __str__(self):
+        return "{" + ", ".join([f"{key!r}: {value!r}" for key, value in self.entries.values()]) + "}"
+
+    def __repr__(self):
+        return self.__str__()
+
+def array_power(base, exponent):
+    # Element-wise Number.powed_by, int(a ** b). Anything but a non-negative
+    # integer exponent goes through float and is truncated, and None means
+    # some element has no integer result.
+    base, exponent = numpy.asarray(base), numpy.asarray(exponent)
+    if base.dtype.kind == "i" and exponent.dtype.kind == "i" and numpy.all(exponent >= 0):
+        return base ** exponent
+
+    with numpy.errstate(all="ignore"):
+        values = numpy.trunc(numpy.power(base.astype(numpy.float64), exponent))
+    if not numpy.all(numpy.abs(values) < 2.0 ** 63):
+        return None
+    return values.astype(numpy.int64)
+
+class Array(Value):
+    # A fixed-length run of numbers in a NumPy ndarray. Operators work on
+    # whole arrays at once and, like List, 'array / index' reads one element.
+
+    def __init__(self, values):
+        super().__init__()
+        self.values = values
+
+    def combined(self, other, operation, reflected=False):
+        if isinstance(other, Array):
+            if len(other.values) != len(self.values):
+                return None, RTError(
+                    self.pos_start, other.pos_end,
+                    "Arrays must have the same length",
+                    self.context
+                )
+            operand = other.values
+        elif isinstance(other, Number):
+            operand = other.value
+        else:
+            return None, self.illegal_operation(other)
+
+        if operation in (operator.truediv, operator.floordiv, operator.mod) and numpy.any((self.values if reflected else operand) == 0):
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Division by zero",
+                self.context
+            )
+
+        values = operation(operand, self.values) if reflected else operation(self.values, operand)
+        if values is None:
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Power is not a finite integer",
+                self.context
+            )
+        if values.dtype == numpy.bool_:
+            values = values.astype(numpy.int64)
+        return Array(values), None
+
+    def added_to(self, other):
+        return self.combined(other, operator.add)
+
+    def subbed_by(self, other):
+        return self.combined(other, operator.sub)
+
+    def multed_by(self, other):
+        return self.combined(other, operator.mul)
+
+    def dived_by(self, other):
+        if isinstance(other, Number):
+            index = other.value
+            if not isinstance(index, int) or not -len(self.values) <= index < len(self.values):
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    "Element at this index could not be accessed because array index out of range",
+                    self.context
+                )
+            return Number(self.values[index].item()), None
+        return self.combined(other, operator.truediv)
+
+    def powed_by(self, other):
+        return self.combined(other, array_power)
+
+    def floor_dived_by(self, other):
+        return self.combined(other, operator.floordiv)
+
+    def modded_by(self, other):
+        return self.combined(other, operator.mod)
+
+    def bit_anded_by(self, other):
+        return self.bitwise(other, operator.and_)
+
+    def bit_ored_by(self, other):
+        return self.bitwise(other, operator.or_)
+
+    def lshifted_by(self, other):
+        return self.bitwise(other, operator.lshift)
+
+    def rshifted_by(self, other):
+        return self.bitwise(other, operator.rshift)
+
+    def bitwise(self, other, operation, reflected=False):
+        if isinstance(other, Array):
+            operand = other.values
+        elif isinstance(other, Number):
+            operand = numpy.asarray(other.value)
+        else:
+            return None, self.illegal_operation(other)
+
+        if self.values.dtype.kind != "i" or operand.dtype.kind != "i":
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Bitwise operations need integers",
+                self.context
+            )
+
+        counts = self.values if reflected else operand
+        if operation in (operator.lshift, operator.rshift) and numpy.any(counts < 0):
+            return None, RTError(
+                self.pos_start, other.pos_end,
+                "Negative shift count",
+                self.context
+            )
+        
+        return self.combined(other, operation, reflected)
+
+    def updated_by(self, op_type, other):
+        # Works on the buffer directly when the result keeps its dtype
+        operation = {TT_PLUS: numpy.add, TT_MINUS: numpy.subtract, TT_MUL: numpy.multiply}.get(op_type)
+        if isinstance(other, Array) and len(other.values) == len(self.values):
+            operand = other.values
+        elif isinstance(other, Number):
+            operand = other.value
+        else:
+            return None, None
+
+        if operation is None or numpy.result_type(self.values, operand) != self.values.dtype:
+            return None, None
+        operation(self.values, operand, out=self.values)
+        return self, None
+
+    def set_at(self, index, value):
+        if not isinstance(index, Number) or not isinstance(index.value, int) or not -len(self.values) <= index.value < len(self.values):
+            return None, RTError(
+                index.pos_start, index.pos_end,
+                "Element at this index could not be assigned because array index out of range",
+                self.context
+            )
+        
+        if not isinstance(value, Number):
+            return None, RTError(
+                value.pos_start, value.pos_end,
+                "Arrays can only hold numbers",
+                self.context
+            )
+        
+        dtype = numpy.result_type(self.values, value.value)
+        if dtype != self.values.dtype:
+            self.values = self.values.astype(dtype)
+        self.values[index.value] = value.value
+        return self, None
+
+    def get_comparison_eq(self, other):
+        return self.combined(other, operator.eq)
+
+    def get_comparison_ne(self, other):
+        return self.combined(other, operator.ne)
+
+    def get_comparison_lt(self, other):
+        return self.combined(other, operator.lt)
+
+    def get_comparison_gt(self, other):
+        return self.combined(other, operator.gt)
+
+    def get_comparison_lte(self, other):
+        return self.combined(other, operator.le)
+
+    def get_comparison_gte(self, other):
+        return self.combined(other, operator.ge)
+
+    def anded_by(self, other):
+        return self.combined(other, numpy.logical_and)
+
+    def ored_by(self, other):
+        return self.combined(other, numpy.logical_or)
+
+    def notted(self):
+        return Array(numpy.logical_not(self.values).astype(numpy.int64)), None
+
+    def iterate(self):
+        return map(Number, self.values.tolist())
+
+    def copy(self):
+        copy = Array(self.values)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __repr__(self):
+        return f"array({numpy.array2string(self.values, separator=', ')})"
+
+##################################
+# Built-in Functions
+##################################
 
 BuiltInFunction.print = BuiltInFunction("print")
 BuiltInFunction.print_return = BuiltInFunction("print_return") 
@@ -1885,6 +3998,44 @@ BuiltInFunction.is_func = BuiltInFunction("is_func")
 BuiltInFunction.append = BuiltInFunction("append") 
 BuiltInFunction.pop = BuiltInFunction("pop")
 BuiltInFunction.extend = BuiltInFunction("extend") 
+BuiltInFunction.map = BuiltInFunction("map")
+BuiltInFunction.filter = BuiltInFunction("filter")
+BuiltInFunction.reduce = BuiltInFunction("reduce")
+BuiltInFunction.sort = BuiltInFunction("sort")
+BuiltInFunction.index_of = BuiltInFunction("index_of")
+BuiltInFunction.slice = BuiltInFunction("slice")
+BuiltInFunction.make_list = BuiltInFunction("make_list")
+BuiltInFunction.memoize = BuiltInFunction("memoize")
+BuiltInFunction.memo_stats = BuiltInFunction("memo_stats")
+BuiltInFunction.get = BuiltInFunction("get")
+BuiltInFunction.set = BuiltInFunction("set")
+BuiltInFunction.has = BuiltInFunction("has")
+BuiltInFunction.delete = BuiltInFunction("delete")
+BuiltInFunction.keys = BuiltInFunction("keys")
+BuiltInFunction.deque = BuiltInFunction("deque")
+BuiltInFunction.push_front = BuiltInFunction("push_front")
+BuiltInFunction.push_back = BuiltInFunction("push_back")
+BuiltInFunction.pop_front = BuiltInFunction("pop_front")
+BuiltInFunction.pop_back = BuiltInFunction("pop_back")
+BuiltInFunction.heap = BuiltInFunction("heap")
+BuiltInFunction.heap_push = BuiltInFunction("heap_push")
+BuiltInFunction.heap_pop = BuiltInFunction("heap_pop")
+BuiltInFunction.heap_peek = BuiltInFunction("heap_peek")
+BuiltInFunction.len = BuiltInFunction("len")
+BuiltInFunction.substr = BuiltInFunction("substr")
+BuiltInFunction.find = BuiltInFunction("find")
+BuiltInFunction.split = BuiltInFunction("split")
+BuiltInFunction.join = BuiltInFunction("join")
+BuiltInFunction.replace = BuiltInFunction("replace")
+BuiltInFunction.upper = BuiltInFunction("upper")
+BuiltInFunction.lower = BuiltInFunction("lower")
+BuiltInFunction.array = BuiltInFunction("array")
+BuiltInFunction.to_array = BuiltInFunction("to_array")
+BuiltInFunction.to_list = BuiltInFunction("to_list")
+BuiltInFunction.sum = BuiltInFunction("sum")
+BuiltInFunction.min = BuiltInFunction("min")
+BuiltInFunction.max = BuiltInFunction("max")
+BuiltInFunction.mean = BuiltInFunction("mean")
 
 
 
@@ -1893,10 +4044,12 @@ BuiltInFunction.extend = BuiltInFunction("extend")
 ##################################
 
 class Context():
-    def __init__(self, display_name, parent=None, parent_entry_pos=None):
+    def __init__(self, display_name, parent=None, parent_entry_pos=None, parent_entry_end=None, call_node=None):
         self.display_name = display_name
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
+        self.parent_entry_end = parent_entry_end
+        self.call_node = call_node
         self.symbol_table = None
 
     
@@ -1908,6 +4061,21 @@ class SymbolTable:
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        self.root = parent.root if parent else self
+        self.version = 0
+
+        # Names ever bound in a table below this root. Only names outside this
+        # set are cached, so a cached name can never be shadowed on the way up.
+        self.shadowed_names = set()
+
+        # Annotated names bound here and their type names, see annotated_value()
+        self.types = {}
+
+        # Names declared with 'const' here. Binding a constant of the root in
+        # any table bumps the root's constants_version, which is what the
+        # Compiler checks before using a value it folded from one.
+        self.constants = set()
+        self.constants_version = 0
 
     def get(self, name):
         value = self.symbols.get(name, None)
@@ -1916,15 +4084,545 @@ class SymbolTable:
         return value
     
     def set(self, name, value):
+        if name not in self.symbols:
+            self.version += 1
+            root = self.root
+            if root is not self and name not in root.shadowed_names:
+                root.shadowed_names.add(name)
+                root.version += 1
+        if name in self.root.constants:
+            self.root.constants_version += 1
         self.symbols[name] = value
+
+    def is_constant(self, name):
+        # Constants can't be reassigned in the table that declares them and
+        # constants of the root can't be reassigned anywhere, though an
+        # argument of the same name still shadows one
+        return name in self.constants or name in self.root.constants
     
     def remove(self, name):
         del self.symbols[name]
+        self.version += 1
+
+    def cache_entry(self, name):
+        # Overwriting an existing binding keeps the version, cache hits re-read
+        # the slot from the root table instead of holding on to the value
+        root = self.root
+        if name in root.symbols and name not in root.shadowed_names:
+            return (root, root.version)
+        return None
+
+##################################
+# QUICKENING
+##################################
+
+# A BinOpNode records the operand types it sees on its first execution and is
+# rewritten into one of these specialized operations. The guard in
+# visit_BinOpNode sends mismatching operands back to the generic path, and a
+# site that keeps missing is left generic for good.
+
+QUICKEN_MAX_MISSES = 4
+
+QUICKENED_NUMBER_OPS = {
+    TT_PLUS: operator.add,
+    TT_MINUS: operator.sub,
+    TT_MUL: operator.mul,
+    TT_DIV: operator.truediv,
+    TT_POW: lambda a, b: int(a ** b),
+    TT_FLOORDIV: operator.floordiv,
+    TT_MOD: operator.mod,
+    TT_BITAND: operator.and_,
+    TT_BITOR: operator.or_,
+    TT_LSHIFT: operator.lshift,
+    TT_RSHIFT: operator.rshift,
+    TT_EE: lambda a, b: int(a == b),
+    TT_NE: lambda a, b: int(a != b),
+    TT_LT: lambda a, b: int(a < b),
+    TT_GT: lambda a, b: int(a > b),
+    TT_LTE: lambda a, b: int(a <= b),
+    TT_GTE: lambda a, b: int(a >= b),
+}
+
+BITWISE_OPS = (TT_BITAND, TT_BITOR, TT_LSHIFT, TT_RSHIFT)
+
+def folded_number_op(op_type, left, right):
+    # The result of an operation on two known numbers, or None when it fails
+    # and has to be left to run time to report the error
+    try:
+        return QUICKENED_NUMBER_OPS[op_type](left, right)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+
+def quicken_bin_op(node, left, right):
+    value_type = type(left)
+    if type(right) is not value_type:
+        return None
+
+    if value_type is Number:
+        python_type = type(left.value)
+        if python_type not in (int, float) or type(right.value) is not python_type:
+            return None
+        if python_type is float and node.op_token.type in BITWISE_OPS:
+            return None
+        operation = QUICKENED_NUMBER_OPS.get(node.op_token.type)
+    else:
+        # String + goes through String.added_to() so ropes stay unflattened
+        return None
+
+    if operation is None:
+        return None
+    return (value_type, python_type, operation)
+
+##################################
+# TYPE ANNOTATIONS
+##################################
+
+# 'var x: int = ...' and 'func f(x: int)' record the type of a name in the
+# symbol table it is bound in, and every later assignment to it there is
+# checked. Inside a function, reads of its annotated arguments and the
+# arithmetic built from them are typed statically, so the Interpreter and the
+# Compiler can skip the lookups and guards at those sites.
+
+ANNOTATION_TYPES = {"int": int, "float": float, "str": String, "list": List}
+
+COMPARISON_OPS = (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)
+
+def annotated_value(type_name, value):
+    # The value a name declared with this type is bound to, or None if it doesn't fit
+    python_type = ANNOTATION_TYPES[type_name]
+    if python_type not in (int, float):
+        return value if isinstance(value, python_type) else None
+
+    if type(value) is not Number:
+        return None
+    if python_type is float and type(value.value) is int:
+        return Number(float(value.value)).set_pos(value.pos_start, value.pos_end).set_context(value.context)
+    return value if type(value.value) is python_type else None
+
+def assign_static_types(func_def):
+    # Annotated arguments are typed throughout the body, and so are names
+    # declared with a type by a statement of the body itself from the next
+    # statement on, as long as nothing else can rebind them
+    body = func_def.body_node
+    unchecked, declared = set(), []
+    find_bindings(body, unchecked, declared)
+
+    arg_names = [name_token.value for name_token in func_def.arg_name_tokens]
+    unchecked.update(name for name in declared if declared.count(name) > 1 or name in arg_names)
+
+    types = {}
+    for name, type_token in zip(arg_names, func_def.arg_type_tokens):
+        if type_token is not None and name not in unchecked:
+            types[name] = ANNOTATION_TYPES[type_token.value]
+
+    statements = body.element_nodes if type(body) is ListNode else [body]
+    for statement in statements:
+        infer_static_types(statement, types)
+        if type(statement) is VarAssignNode and statement.type_token and statement.op_token is None:
+            name = statement.var_name_token.value
+            if name not in unchecked:
+                types[name] = ANNOTATION_TYPES[statement.type_token.value]
+
+def find_bindings(node, unchecked, declared):
+    # Collects the names a body can rebind without a type check (loop
+    # variables and named functions) and the names it declares with a type.
+    # Constants are left to assign(), which rejects rebinding them.
+    if isinstance(node, (ForNode, ForInNode, FuncDefNode)) and node.var_name_token:
+        unchecked.add(node.var_name_token.value)
+    elif isinstance(node, VarAssignNode) and node.is_const:
+        unchecked.add(node.var_name_token.value)
+    elif isinstance(node, VarAssignNode) and node.type_token:
+        declared.append(node.var_name_token.value)
+
+    if not isinstance(node, FuncDefNode):
+        for child in child_nodes(vars(node).values()):
+            find_bindings(child, unchecked, declared)
+
+def infer_static_types(node, types):
+    # Nested functions run in their own symbol table
+    if isinstance(node, FuncDefNode):
+        return
+
+    for child in child_nodes(vars(node).values()):
+        infer_static_types(child, types)
+
+    if type(node) is VarAccessNode:
+        node.static_type = types.get(node.var_name_token.value)
+
+    elif type(node) is BinOpNode:
+        left, right = static_type(node.left_node), static_type(node.right_node)
+        node.static_type = static_result_type(node.op_token.type, left, right)
+        if node.static_type is not None and left is right:
+            # Starts out quickened rather than waiting for type feedback
+            node.quickened = (Number, left, QUICKENED_NUMBER_OPS[node.op_token.type])
+
+    elif type(node) is VarAssignNode and node.type_token is None:
+        var_type = types.get(node.var_name_token.value)
+        value_type = static_type(node.value_node)
+        if node.op_token is not None:
+            value_type = static_result_type(node.op_token.type, var_type, value_type)
+        if var_type is not None and value_type is var_type:
+            node.static_type = var_type
+
+def needs_operand_guard(node):
+    # Division by zero and negative shifts are reported by the generic path,
+    # so those operations keep a check unless their right operand is a literal
+    op_type, right = node.op_token.type, node.right_node
+    if op_type in (TT_DIV, TT_FLOORDIV, TT_MOD):
+        return type(right) is not NumberNode or right.token.value == 0
+    if op_type in (TT_LSHIFT, TT_RSHIFT):
+        return type(right) is not NumberNode or right.token.value < 0
+    return False
+
+def static_type(node):
+    if type(node) is NumberNode:
+        return type(node.token.value)
+    return getattr(node, "static_type", None)
+
+def static_result_type(op_type, left, right):
+    if left not in (int, float) or right not in (int, float) or op_type not in QUICKENED_NUMBER_OPS:
+        return None
+    
+    both_int = left is int and right is int
+    if op_type in COMPARISON_OPS or op_type == TT_POW:
+        return int
+    if op_type == TT_DIV:
+        return float
+    if op_type in BITWISE_OPS:
+        return int if both_int else None
+    return int if both_int else float
+
+##################################
+# RESULT USAGE
+##################################
+
+# Walks a tree once before it runs and clears ForNode.result_used and
+# WhileNode.result_used wherever nothing can observe the list a loop builds,
+# so the Interpreter doesn't accumulate it.
+
+class ResultUsage:
+    def visit(self, node, used=True):
+        method_name = f"visit_{type(node).__name__}"
+        method = getattr(self, method_name, self.no_visit_method)
+        method(node, used)
+
+    def no_visit_method(self, node, used):
+        pass
+
+    ##################################
+
+    def visit_ListNode(self, node, used):
+        for element_node in node.element_nodes:
+            self.visit(element_node, used)
+
+    def visit_MapNode(self, node, used):
+        for key_node, value_node in node.entry_nodes:
+            self.visit(key_node)
+            self.visit(value_node, used)
+
+    def visit_VarAssignNode(self, node, used):
+        self.visit(node.value_node)
+
+    def visit_IndexAssignNode(self, node, used):
+        self.visit(node.list_node)
+        self.visit(node.index_node)
+        self.visit(node.value_node)
+
+    def visit_BinOpNode(self, node, used):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def visit_LogicalOpNode(self, node, used):
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def visit_UnaryOpNode(self, node, used):
+        self.visit(node.node)
+
+    def visit_IfNode(self, node, used):
+        for condition, expr, should_return_none in node.cases:
+            self.visit(condition)
+            self.visit(expr, used and not should_return_none)
+
+        if node.else_case:
+            expr, should_return_none = node.else_case
+            self.visit(expr, used and not should_return_none)
+
+    def visit_MatchNode(self, node, used):
+        self.visit(node.subject_node)
+        for expr, should_return_none in node.cases:
+            self.visit(expr, used and not should_return_none)
+
+        if node.else_case:
+            expr, should_return_none = node.else_case
+            self.visit(expr, used and not should_return_none)
+
+    def visit_ForNode(self, node, used):
+        node.result_used = used and not node.should_return_none
+        self.visit(node.start_value_node)
+        self.visit(node.end_value_node)
+        if node.step_value_node:
+            self.visit(node.step_value_node)
+        self.visit(node.body_node, node.result_used)
+
+    def visit_ForInNode(self, node, used):
+        node.result_used = used and not node.should_return_none
+        self.visit(node.iterable_node)
+        self.visit(node.body_node, node.result_used)
+
+    def visit_WhileNode(self, node, used):
+        node.result_used = used and not node.should_return_none
+        self.visit(node.condition_node)
+        self.visit(node.body_node, node.result_used)
+
+    def visit_FuncDefNode(self, node, used):
+        self.visit(node.body_node, node.should_auto_return)
+
+    def visit_CallNode(self, node, used):
+        self.visit(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node)
+
+    def visit_ReturnNode(self, node, used):
+        if node.node_to_return:
+            self.visit(node.node_to_return)
+
+    def visit_YieldNode(self, node, used):
+        self.visit(node.node_to_yield)
+
+##################################
+# SPECIALIZATION
+##################################
+
+# A call site that keeps passing literal arguments gets its own copy of the
+# callee's body with those arguments substituted in and folded through it.
+# Branches decided by them are cut out of the copy, which is cached on the
+# CallNode and runs (and is compiled once hot) like any other Function.
+
+SPECIALIZE_ENABLED = True
+SPECIALIZE_THRESHOLD = 10
+
+def literal_node(node):
+    # The NumberNode or StringNode an argument node stands for, or None
+    if type(node) in (NumberNode, StringNode):
+        return node
+    if type(node) is UnaryOpNode and node.op_token.type == TT_MINUS and type(node.node) is NumberNode:
+        return number_node(node.node.token.value * -1, node)
+    return None
+
+def number_node(value, node):
+    token_type = TT_FLOAT if type(value) is float else TT_INT
+    return NumberNode(Token(token_type, value, node.pos_start, node.pos_end))
+
+def specialized_callee(node, function):
+    # The Function to run for a call site with literal arguments. Each site
+    # caches one specialization, keyed by the TierState its callee shares with
+    # every copy of the same definition.
+    if type(function) is not Function:
+        return function
+
+    entry = node.specialization
+    if entry is not None and entry[0] is function.tier:
+        return entry[1] if entry[1] is not None else function
+
+    node.calls += 1
+    if node.calls < SPECIALIZE_THRESHOLD:
+        return function
+    node.calls = 0
+
+    specialized = specialize(function, node)
+    node.specialization = (function.tier, specialized)
+    return specialized if specialized is not None else function
+
+def specialize(function, node):
+    # A copy of the function for the literal arguments of a call site, or None
+    # if they don't decide any branch of its body. Arguments the body rebinds
+    # and annotated ones, which are converted on the way in, stay as they are.
+    if function.yielding or len(node.arg_nodes) != len(function.arg_names):
+        return None
+
+    rebound = set()
+    find_rebound_names(function.body_node, rebound)
+
+    constants = {}
+    for i, (arg_name, arg_node) in enumerate(zip(function.arg_names, node.arg_nodes)):
+        literal = literal_node(arg_node)
+        annotated = function.arg_types is not None and function.arg_types[i] is not None
+        if literal is not None and not annotated and arg_name not in rebound:
+            constants[arg_name] = literal
+
+    if not constants:
+        return None
+
+    folder = ConstantFolder(constants)
+    body_node = folder.visit(function.body_node)
+    if not folder.decided:
+        return None
+
+    return Function(
+        function.name, body_node, function.arg_names, function.should_auto_return,
+        arg_types=function.arg_types
+    )
+
+def find_rebound_names(node, names):
+    # Nested functions bind names in their own symbol table
+    if isinstance(node, (VarAssignNode, ForNode, ForInNode, FuncDefNode)) and node.var_name_token:
+        names.add(node.var_name_token.value)
+
+    if not isinstance(node, FuncDefNode):
+        for child in child_nodes(vars(node).values()):
+            find_rebound_names(child, names)
+
+class ConstantFolder:
+    # Copies a body bottom up, replacing reads of the constant arguments with
+    # literals and folding whatever only depends on literals. Nested function
+    # definitions are shared with the original, their bodies run with their
+    # own arguments.
+
+    def __init__(self, constants):
+        self.constants = constants
+        self.decided = 0
+
+    def visit(self, node):
+        if isinstance(node, FuncDefNode):
+            return node
+
+        clone = copy.copy(node)
+        for name, value in list(vars(clone).items()):
+            setattr(clone, name, self.visit_value(value))
+
+        # Loops compile their own copy, and calls made from a specialized
+        # body aren't specialized again, so recursion doesn't unfold
+        if hasattr(clone, "tier"):
+            clone.tier = TierState()
+        if type(clone) is CallNode:
+            clone.constant_args = False
+
+        method = getattr(self, f"fold_{type(node).__name__}", None)
+        return method(clone) if method else clone
+
+    def visit_value(self, value):
+        if type(value).__name__.endswith("Node"):
+            return self.visit(value)
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.visit_value(item) for item in value)
+        return value
+
+    def fold_VarAccessNode(self, node):
+        literal = self.constants.get(node.var_name_token.value)
+        if literal is None:
+            return node
+        return type(literal)(Token(literal.token.type, literal.token.value, node.pos_start, node.pos_end))
+
+    def fold_UnaryOpNode(self, node):
+        if type(node.node) is not NumberNode:
+            return node
+
+        value = node.node.token.value
+        if node.op_token.type == TT_MINUS:
+            return number_node(value * -1, node)
+        if node.op_token.matches(TT_KEYWORD, "not"):
+            return number_node(1 if value == 0 else 0, node)
+        return node
+
+    def fold_BinOpNode(self, node):
+        left, right, op_type = node.left_node, node.right_node, node.op_token.type
+        if type(left) is NumberNode and type(right) is NumberNode and op_type in QUICKENED_NUMBER_OPS:
+            value = folded_number_op(op_type, left.token.value, right.token.value)
+            return node if value is None else number_node(value, node)
+
+        if type(left) is StringNode and type(right) is StringNode:
+            if op_type == TT_PLUS:
+                return StringNode(Token(TT_STRING, left.token.value + right.token.value, node.pos_start, node.pos_end))
+            if op_type in (TT_EE, TT_NE):
+                return number_node(QUICKENED_NUMBER_OPS[op_type](left.token.value, right.token.value), node)
+        return node
+
+    def fold_LogicalOpNode(self, node):
+        # Mirrors Interpreter.short_circuit() and Number.anded_by()/ored_by()
+        left, right = node.left_node, node.right_node
+        if type(left) is not NumberNode:
+            return node
+
+        if (left.token.value != 0) == node.op_token.matches(TT_KEYWORD, "or"):
+            self.decided += 1
+            return left
+        if type(right) is NumberNode:
+            return number_node(right.token.value, node)
+        return node
+
+    def fold_IfNode(self, node):
+        # Cases with a literal condition are dropped when it's false, and the
+        # first true one becomes the else case
+        cases, else_case = [], node.else_case
+        for condition, expr, should_return_none in node.cases:
+            if type(condition) is not NumberNode:
+                cases.append((condition, expr, should_return_none))
+                continue
+
+            self.decided += 1
+            if condition.token.value != 0:
+                else_case = (expr, should_return_none)
+                break
+
+        if len(cases) == len(node.cases):
+            return node
+        return self.decided_branch(node, cases, else_case)
+
+    def fold_MatchNode(self, node):
+        subject = node.subject_node
+        if type(subject) not in (NumberNode, StringNode):
+            return node
+
+        self.decided += 1
+        index = node.table.get(subject.token.value)
+        case = node.cases[index] if index is not None else node.else_case
+        node.table = {}
+        return self.decided_branch(node, [], case)
+
+    def decided_branch(self, node, cases, else_case):
+        # A node whose only branch left is its else case, or that branch itself
+        # if its value is the value of the whole node
+        if not cases and else_case is not None and not else_case[1]:
+            return else_case[0]
+        node.cases, node.else_case = cases, else_case
+        return node
 
 ##################################
 # INTERPRETER
 ##################################
 
+# Values only carry a position and context for the benefit of whoever inspects
+# them; errors are always placed from the node that was running. Production
+# mode skips stamping them altogether.
+
+PRODUCTION_MODE = False
+
+def loop_range(start, end, step):
+    # Integer loops are driven by a native range, anything else steps by hand
+    if type(start) is int and type(end) is int and type(step) is int and step != 0:
+        return range(start, end, step)
+    return stepped_range(start, end, step)
+
+def stepped_range(i, end, step):
+    if step >= 0:
+        while i < end:
+            yield i
+            i += step
+    else:
+        while i > end:
+            yield i
+            i += step
+
+def match_case(node, subject):
+    # Number and String subjects are looked up in the jump table built by the
+    # parser, so dispatch costs the same however many cases there are
+    if isinstance(subject, (Number, String)):
+        index = node.table.get(subject.value)
+        if index is not None:
+            return node.cases[index]
+    return node.else_case
+
 class Interpreter:
     def visit(self, node, context):
         method_name = f"visit_{type(node).__name__}"
@@ -1936,15 +4634,17 @@ class Interpreter:
 
     ##################################
 
+    def stamp(self, value, node, context):
+        # Only called on values the node has just created, never on shared ones
+        if not PRODUCTION_MODE:
+            value.pos_start, value.pos_end, value.context = node.pos_start, node.pos_end, context
+        return value
+
     def visit_StringNode(self, node, context):
-        return RTResult().success(
-            String(node.token.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return RTResult().success(self.stamp(String(node.token.value), node, context))
     
     def visit_NumberNode(self, node, context):
-        return RTResult().success(
-            Number(node.token.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return RTResult().success(self.stamp(Number(node.token.value), node, context))
     
     def visit_ListNode(self, node, context):
         res = RTResult()
@@ -1955,14 +4655,40 @@ class Interpreter:
             if res.should_return():
                 return res
         
-        return res.success(
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return res.success(self.stamp(List(elements), node, context))
     
+    def visit_MapNode(self, node, context):
+        res = RTResult()
+        entries = {}
+
+        for key_node, value_node in node.entry_nodes:
+            key = res.register(self.visit(key_node, context))
+            if res.should_return():
+                return res
+
+            value = res.register(self.visit(value_node, context))
+            if res.should_return():
+                return res
+
+            hash_key = key.hash_key()
+            if hash_key is None:
+                return res.failure(RTError(
+                    key_node.pos_start, key_node.pos_end,
+                    "Map keys must be numbers, strings or lists of them",
+                    context
+                ))
+            entries[hash_key] = (frozen_key(key), value)
+
+        return res.success(self.stamp(Map(entries), node, context))
+
     def visit_VarAccessNode(self, node, context):
         res = RTResult()
         var_name = node.var_name_token.value
-        value = context.symbol_table.get(var_name)
+        if node.static_type is not None:
+            # An annotated argument, always bound in the function's own table
+            return res.success(context.symbol_table.symbols[var_name])
+
+        value = self.lookup(node, context.symbol_table)
 
         if not value:
             return res.failure(RTError(
@@ -1970,20 +4696,116 @@ class Interpreter:
                 f"'{var_name}' is not defined",
                 context
             ))
-        
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        
+
         return res.success(value)
+
+    def lookup(self, node, symbol_table):
+        cache = node.cache
+        if cache is not None and cache[0] is symbol_table.root and cache[1] == cache[0].version:
+            return cache[0].symbols[node.var_name_token.value]
+
+        var_name = node.var_name_token.value
+        node.cache = symbol_table.cache_entry(var_name)
+        return symbol_table.get(var_name)
     
     def visit_VarAssignNode(self, node, context):
         res = RTResult()
         var_name = node.var_name_token.value
+
+        if node.op_token is not None:
+            current = context.symbol_table.get(var_name)
+            if not current:
+                return res.failure(RTError(
+                    node.var_name_token.pos_start, node.var_name_token.pos_end,
+                    f"'{var_name}' is not defined",
+                    context
+                ))
+
         value = res.register(self.visit(node.value_node, context))
         if res.should_return():
             return res
+
+        if node.op_token is not None:
+            value, error = self.update(node, current, value, context)
+            if error:
+                return res.failure(error)
         
-        context.symbol_table.set(var_name, value)
+        value, error = self.assign(node, value, context)
+        if error:
+            return res.failure(error)
+        return res.success(value)
+
+    def assign(self, node, value, context):
+        # Binds the variable of a VarAssignNode, checking it against the type
+        # the name was declared with in this symbol table
+        var_name = node.var_name_token.value
+        symbol_table = context.symbol_table
+        if symbol_table.is_constant(var_name):
+            return None, self.constant_error(node.var_name_token, context)
+        if node.type_token is not None:
+            symbol_table.types[var_name] = node.type_token.value
+
+        if symbol_table.types:
+            type_name = symbol_table.types.get(var_name)
+            if type_name is not None:
+                checked = annotated_value(type_name, value)
+                if checked is None:
+                    return None, RTError(
+                        node.value_node.pos_start, node.value_node.pos_end,
+                        f"'{var_name}' must be {type_name}",
+                        context
+                    )
+                value = checked
+
+        symbol_table.set(var_name, value)
+        if node.is_const:
+            symbol_table.constants.add(var_name)
+        return value, None
+
+    def constant_error(self, name_token, context):
+        return RTError(
+            name_token.pos_start, name_token.pos_end,
+            f"Can't assign to constant '{name_token.value}'",
+            context
+        )
+
+    def visit_IndexAssignNode(self, node, context):
+        res = RTResult()
+        container = res.register(self.visit(node.list_node, context))
+        if res.should_return():
+            return res
+        index = res.register(self.visit(node.index_node, context))
+        if res.should_return():
+            return res
+
+        if node.op_token is not None:
+            current, error = container.dived_by(index)
+            if error:
+                return res.failure(self.locate(error, node, context))
+
+        value = res.register(self.visit(node.value_node, context))
+        if res.should_return():
+            return res
+
+        if node.op_token is not None:
+            value, error = self.update(node, current, value, context)
+            if error:
+                return res.failure(error)
+
+        _, error = container.set_at(index, value)
+        if error:
+            return res.failure(self.locate(error, node, context))
         return res.success(value)
+
+    def update(self, node, current, operand, context):
+        # Compound assignments let containers change themselves in place and
+        # otherwise apply their operator like a BinOpNode would
+        result, error = current.updated_by(node.op_token.type, operand)
+        if error:
+            return None, self.locate(error, node, context)
+        if result is not None:
+            return result, None
+        return self.bin_op(node, current, operand, context)
         
     def visit_BinOpNode(self, node, context):
         res = RTResult()
@@ -1994,6 +4816,31 @@ class Interpreter:
         if res.should_return():
             return res
 
+        result, error = self.bin_op(node, left, right, context)
+        if error:
+            return res.failure(error)
+        return res.success(result)
+
+    def bin_op(self, node, left, right, context):
+        quickened = node.quickened
+        if quickened is not None:
+            value_type, python_type, operation = quickened
+            if (type(left) is value_type and type(right) is value_type and
+                    type(left.value) is python_type and type(right.value) is python_type):
+                try:
+                    result = value_type(operation(left.value, right.value))
+                except (ZeroDivisionError, ValueError):
+                    pass # Let the generic path report it
+                else:
+                    return result, None
+            else:
+                node.quickened = None
+                node.quicken_misses += 1
+        elif node.quicken_misses < QUICKEN_MAX_MISSES:
+            node.quickened = quicken_bin_op(node, left, right)
+            if node.quickened is None:
+                node.quicken_misses += 1
+
         if node.op_token.type == TT_PLUS:
             result, error = left.added_to(right)
         
@@ -2008,6 +4855,24 @@ class Interpreter:
         
         elif node.op_token.type == TT_POW:
             result, error = left.powed_by(right)
+
+        elif node.op_token.type == TT_FLOORDIV:
+            result, error = left.floor_dived_by(right)
+
+        elif node.op_token.type == TT_MOD:
+            result, error = left.modded_by(right)
+
+        elif node.op_token.type == TT_BITAND:
+            result, error = left.bit_anded_by(right)
+
+        elif node.op_token.type == TT_BITOR:
+            result, error = left.bit_ored_by(right)
+
+        elif node.op_token.type == TT_LSHIFT:
+            result, error = left.lshifted_by(right)
+
+        elif node.op_token.type == TT_RSHIFT:
+            result, error = left.rshifted_by(right)
         
         if node.op_token.type == TT_EE:
             result, error = left.get_comparison_eq(right)
@@ -2027,40 +4892,74 @@ class Interpreter:
         elif node.op_token.type == TT_GTE:
             result, error = left.get_comparison_gte(right)
 
-        elif node.op_token.matches(TT_KEYWORD, "and"):
-            result, error = left.anded_by(right)
-        
-        elif node.op_token.matches(TT_KEYWORD, "or"):
-            result, error = left.ored_by(right)
-        
+        if error:
+            return None, self.locate(error, node, context)
+        return result, None
+
+    def locate(self, error, node, context):
+        # Values are shared rather than copied on every read, so they can't
+        # say where they were used. Operation errors are placed at the node.
+        error.pos_start, error.pos_end, error.context = node.pos_start, node.pos_end, context
+        return error
+
+    def visit_LogicalOpNode(self, node, context):
+        res = RTResult()
+        left = res.register(self.visit(node.left_node, context))
+        if res.should_return():
+            return res
+
+        result = self.short_circuit(node, left)
+        if result is not None:
+            return res.success(result)
+
+        right = res.register(self.visit(node.right_node, context))
+        if res.should_return():
+            return res
+
+        result, error = self.logical_op(node, left, right, context)
         if error:
             return res.failure(error)
+        return res.success(result)
+
+    def short_circuit(self, node, left):
+        # 0 decides an 'and' and anything else decides an 'or' without looking
+        # at the right operand. Other types fall through so they still raise.
+        if isinstance(left, Number) and left.is_true() == node.op_token.matches(TT_KEYWORD, "or"):
+            return left
+        return None
+
+    def logical_op(self, node, left, right, context):
+        if node.op_token.matches(TT_KEYWORD, "and"):
+            result, error = left.anded_by(right)
         else:
-            return res.success(
-                result.set_pos(node.pos_start, node.pos_end)
-            )
+            result, error = left.ored_by(right)
+
+        if error:
+            return None, self.locate(error, node, context)
+        return result, None
 
     def visit_UnaryOpNode(self, node, context):
         res = RTResult()
         number = res.register(self.visit(node.node, context))
         if res.should_return():
             return res
-        
+
+        number, error = self.unary_op(node, number, context)
+        if error:
+            return res.failure(error)
+        return res.success(number)
+
+    def unary_op(self, node, number, context):
         error = None
 
         if node.op_token.type == TT_MINUS:
-            number, error = number.multed_by(Number(-1).set_context(context))
+            number, error = number.multed_by(Number(-1))
         elif node.op_token.matches(TT_KEYWORD, "not"):
             number, error = number.notted()
 
-
-
         if error:
-            return res.failure(error)
-        else:
-            return res.success(
-                number.set_pos(node.pos_start, node.pos_end)
-            )
+            return None, self.locate(error, node, context)
+        return number, None
     
     def visit_IfNode(self, node, context):
         res = RTResult()
@@ -2085,9 +4984,26 @@ class Interpreter:
         
         return res.success(Number.none)
     
+    def visit_MatchNode(self, node, context):
+        res = RTResult()
+
+        subject = res.register(self.visit(node.subject_node, context))
+        if res.should_return():
+            return res
+        
+        case = match_case(node, subject)
+        if case is None:
+            return res.success(Number.none)
+        
+        expr, should_return_none = case
+        value = res.register(self.visit(expr, context))
+        if res.should_return():
+            return res
+        return res.success(Number.none if should_return_none else value)
+    
     def visit_ForNode(self, node, context):
         res = RTResult()
-        elements = []
+        elements = [] if node.result_used else None
 
         start_value = res.register(self.visit(node.start_value_node, context))
         if res.should_return(): return res
@@ -2101,15 +5017,22 @@ class Interpreter:
         else:
             step_value = Number(1)
 
-        i = start_value.value
-
-        if step_value.value >= 0:
-            condition = lambda: i < end_value.value
-        else:
-            condition = lambda: i > end_value.value
-
-        while condition():
-            context.symbol_table.set(node.var_name_token.value, Number(i))
+        var_name = node.var_name_token.value
+        symbol_table = context.symbol_table
+        symbols = symbol_table.symbols
+        if symbol_table.is_constant(var_name):
+            return res.failure(self.constant_error(node.var_name_token, context))
+
+        for i in loop_range(start_value.value, end_value.value, step_value.value):
+            compiled = node.tier.tick(HOT_LOOP_THRESHOLD, "for_loop", node)
+            if compiled:
+                return compiled(self, context, i, end_value, step_value, elements)
+
+            # Once bound, the loop variable is rebound straight into its slot
+            if var_name in symbols:
+                symbols[var_name] = Number(i)
+            else:
+                symbol_table.set(var_name, Number(i))
 
             value = res.register(self.visit(node.body_node, context))
             if res.should_return() and not (res.loop_should_continue or res.loop_should_break):
@@ -2117,27 +5040,85 @@ class Interpreter:
 
             if res.loop_should_continue:
                 res.loop_should_continue = False
-                i += step_value.value
                 continue
 
             if res.loop_should_break:
                 res.loop_should_break = False
                 break
 
-            elements.append(value)
-            i += step_value.value
+            if elements is not None:
+                elements.append(value)
 
         return res.success(
-            Number.none if node.should_return_none else
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+            self.stamp(List(elements), node, context) if node.result_used else
+            Number.none
         )
 
 
+    def visit_ForInNode(self, node, context):
+        res = RTResult()
+        elements = [] if node.result_used else None
+
+        iterable = res.register(self.visit(node.iterable_node, context))
+        if res.should_return(): return res
+
+        iterator = iterable.iterate()
+        if iterator is None:
+            return res.failure(RTError(
+                node.iterable_node.pos_start, node.iterable_node.pos_end,
+                "Value is not iterable",
+                context
+            ))
+
+        var_name = node.var_name_token.value
+        symbol_table = context.symbol_table
+        symbols = symbol_table.symbols
+        if symbol_table.is_constant(var_name):
+            return res.failure(self.constant_error(node.var_name_token, context))
+
+        try:
+            for element in iterator:
+                compiled = node.tier.tick(HOT_LOOP_THRESHOLD, "for_in_loop", node)
+                if compiled:
+                    return compiled(self, context, element, iterator, elements)
+
+                if var_name in symbols:
+                    symbols[var_name] = element
+                else:
+                    symbol_table.set(var_name, element)
+
+                value = res.register(self.visit(node.body_node, context))
+                if res.should_return() and not (res.loop_should_continue or res.loop_should_break):
+                    return res
+
+                if res.loop_should_continue:
+                    res.loop_should_continue = False
+                    continue
+
+                if res.loop_should_break:
+                    res.loop_should_break = False
+                    break
+
+                if elements is not None:
+                    elements.append(value)
+        except CallbackFailed as failed:
+            # A generator being iterated ran into an error
+            return failed.result
+
+        return res.success(
+            self.stamp(List(elements), node, context) if node.result_used else
+            Number.none
+        )
+
     def visit_WhileNode(self, node, context):
         res = RTResult()
-        elements = []
+        elements = [] if node.result_used else None
 
         while True:
+            compiled = node.tier.tick(HOT_LOOP_THRESHOLD, "while_loop", node)
+            if compiled:
+                return compiled(self, context, elements)
+
             condition = res.register(self.visit(node.condition_node, context))
             if res.should_return():
                 return res
@@ -2155,11 +5136,12 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            if elements is not None:
+                elements.append(value)
             
         return res.success(
-            Number.none if node.should_return_none else
-            List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+            self.stamp(List(elements), node, context) if node.result_used else
+            Number.none
         )
     
     def visit_FuncDefNode(self, node, context):
@@ -2168,9 +5150,19 @@ class Interpreter:
         func_name = node.var_name_token.value if node.var_name_token else None
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_tokens]
-        func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+        arg_types = [type_token and type_token.value for type_token in node.arg_type_tokens]
+        func_value = Function(
+            func_name, body_node, arg_names, node.should_auto_return, node.tier, node.yielding,
+            arg_types if any(arg_types) else None
+        )
+
+        if node.memoized:
+            func_value = MemoizedFunction(func_value, MemoCache(MEMO_DEFAULT_MAX_SIZE))
+        self.stamp(func_value, node, context)
 
         if node.var_name_token:
+            if context.symbol_table.is_constant(func_name):
+                return res.failure(self.constant_error(node.var_name_token, context))
             context.symbol_table.set(func_name, func_value)
         
         return res.success(func_value)
@@ -2182,17 +5174,18 @@ class Interpreter:
         value_to_call = res.register(self.visit(node.node_to_call, context))
         if res.should_return():
             return res
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
 
         for arg_node in node.arg_nodes:
             args.append(res.register(self.visit(arg_node, context)))
             if res.should_return():
                 return res
         
-        return_value = res.register(value_to_call.execute(args))
+        if node.constant_args and SPECIALIZE_ENABLED:
+            value_to_call = specialized_callee(node, value_to_call)
+
+        return_value = res.register(value_to_call.execute(args, context, node))
         if res.should_return():
             return res
-        return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
         return res.success(return_value)
     
     def visit_ReturnNode(self, node, context):
@@ -2206,12 +5199,985 @@ class Interpreter:
         
         return res.success_return(Number.none)
     
+    def visit_YieldNode(self, node, context):
+        # Yields inside a function are run by a GeneratorRunner
+        return RTResult().failure(RTError(
+            node.pos_start, node.pos_end,
+            "'yield' used outside of a function",
+            context
+        ))
+
     def visit_ContinueNode(self, node, context):
         return RTResult().success_continue()
     
     def visit_BreakNode(self, node, context):
         return RTResult().success_break()
 
+##################################
+# GENERATORS
+##################################
+
+# A function whose body contains a yield is a generator function. Calling it
+# returns a Generator whose body is run by a GeneratorRunner: the nodes on a
+# path down to a yield are walked by Python generators so they can suspend,
+# and every other node is handed to the Interpreter whole, where it can be
+# quickened and compiled as usual.
+
+def yield_paths(body_node):
+    yielding = set()
+    find_yields(body_node, yielding)
+    return yielding or None
+
+def find_yields(node, yielding):
+    # Nested functions decide for themselves whether they are generators
+    if isinstance(node, FuncDefNode):
+        return False
+
+    found = isinstance(node, YieldNode)
+    for child in child_nodes(vars(node).values()):
+        if find_yields(child, yielding):
+            found = True
+    if found:
+        yielding.add(node)
+    return found
+
+def child_nodes(values):
+    # Nodes keep their children in attributes, lists and tuples (like IfNode.cases)
+    for value in values:
+        if type(value).__name__.endswith("Node"):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            yield from child_nodes(value)
+
+class GeneratorRunner:
+    def __init__(self, yielding):
+        self.yielding = yielding
+        self.interpreter = Interpreter()
+
+    def run(self, body_node, context):
+        res = yield from self.visit(body_node, context)
+        if res.error:
+            raise CallbackFailed(res)
+
+    def visit(self, node, context):
+        if node not in self.yielding:
+            return self.interpreter.visit(node, context)
+
+        method = getattr(self, f"visit_{type(node).__name__}", None)
+        if method is None:
+            return RTResult().failure(RTError(
+                node.pos_start, node.pos_end,
+                "'yield' can't be used inside this expression",
+                context
+            ))
+        return (yield from method(node, context))
+
+    ##################################
+
+    def visit_YieldNode(self, node, context):
+        res = RTResult()
+        value = res.register((yield from self.visit(node.node_to_yield, context)))
+        if res.should_return():
+            return res
+
+        yield value
+        return res.success(Number.none)
+
+    def visit_ListNode(self, node, context):
+        res = RTResult()
+        elements = []
+
+        for element_node in node.element_nodes:
+            elements.append(res.register((yield from self.visit(element_node, context))))
+            if res.should_return():
+                return res
+
+        return res.success(self.interpreter.stamp(List(elements), node, context))
+
+    def visit_VarAssignNode(self, node, context):
+        res = RTResult()
+        value = res.register((yield from self.visit(node.value_node, context)))
+        if res.should_return():
+            return res
+
+        var_name = node.var_name_token.value
+        if node.op_token is not None:
+            current = context.symbol_table.get(var_name)
+            if not current:
+                return res.failure(RTError(
+                    node.var_name_token.pos_start, node.var_name_token.pos_end,
+                    f"'{var_name}' is not defined",
+                    context
+                ))
+
+            value, error = self.interpreter.update(node, current, value, context)
+            if error:
+                return res.failure(error)
+
+        value, error = self.interpreter.assign(node, value, context)
+        if error:
+            return res.failure(error)
+        return res.success(value)
+
+    def visit_IfNode(self, node, context):
+        res = RTResult()
+
+        for condition, expr, should_return_none in node.cases:
+            condition_value = res.register((yield from self.visit(condition, context)))
+            if res.should_return():
+                return res
+
+            if condition_value.is_true():
+                expr_value = res.register((yield from self.visit(expr, context)))
+                if res.should_return():
+                    return res
+                return res.success(Number.none if should_return_none else expr_value)
+
+        if node.else_case:
+            expr, should_return_none = node.else_case
+            else_value = res.register((yield from self.visit(expr, context)))
+            if res.should_return():
+                return res
+            return res.success(Number.none if should_return_none else else_value)
+
+        return res.success(Number.none)
+
+    def visit_MatchNode(self, node, context):
+        res = RTResult()
+
+        subject = res.register((yield from self.visit(node.subject_node, context)))
+        if res.should_return():
+            return res
+
+        case = match_case(node, subject)
+        if case is None:
+            return res.success(Number.none)
+
+        expr, should_return_none = case
+        value = res.register((yield from self.visit(expr, context)))
+        if res.should_return():
+            return res
+        return res.success(Number.none if should_return_none else value)
+
+    def visit_ForNode(self, node, context):
+        res = RTResult()
+
+        start_value = res.register((yield from self.visit(node.start_value_node, context)))
+        if res.should_return(): return res
+
+        end_value = res.register((yield from self.visit(node.end_value_node, context)))
+        if res.should_return(): return res
+
+        if node.step_value_node:
+            step_value = res.register((yield from self.visit(node.step_value_node, context)))
+            if res.should_return(): return res
+        else:
+            step_value = Number(1)
+
+        values = map(Number, loop_range(start_value.value, end_value.value, step_value.value))
+        return (yield from self.loop(node, values, context))
+
+    def visit_ForInNode(self, node, context):
+        res = RTResult()
+
+        iterable = res.register((yield from self.visit(node.iterable_node, context)))
+        if res.should_return(): return res
+
+        iterator = iterable.iterate()
+        if iterator is None:
+            return res.failure(RTError(
+                node.iterable_node.pos_start, node.iterable_node.pos_end,
+                "Value is not iterable",
+                context
+            ))
+        return (yield from self.loop(node, iterator, context))
+
+    def loop(self, node, values, context):
+        res = RTResult()
+        elements = [] if node.result_used else None
+        var_name = node.var_name_token.value
+        if context.symbol_table.is_constant(var_name):
+            return res.failure(self.interpreter.constant_error(node.var_name_token, context))
+
+        for value in values:
+            context.symbol_table.set(var_name, value)
+
+            body_value = res.register((yield from self.visit(node.body_node, context)))
+            if res.should_return() and not (res.loop_should_continue or res.loop_should_break):
+                return res
+
+            if res.loop_should_continue:
+                res.loop_should_continue = False
+                continue
+
+            if res.loop_should_break:
+                res.loop_should_break = False
+                break
+
+            if elements is not None:
+                elements.append(body_value)
+
+        return res.success(
+            self.interpreter.stamp(List(elements), node, context) if node.result_used else
+            Number.none
+        )
+
+    def visit_WhileNode(self, node, context):
+        res = RTResult()
+        elements = [] if node.result_used else None
+
+        while True:
+            condition = res.register((yield from self.visit(node.condition_node, context)))
+            if res.should_return():
+                return res
+
+            if not condition.is_true():
+                break
+
+            value = res.register((yield from self.visit(node.body_node, context)))
+            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            if elements is not None:
+                elements.append(value)
+
+        return res.success(
+            self.interpreter.stamp(List(elements), node, context) if node.result_used else
+            Number.none
+        )
+
+##################################
+# COMPILER
+##################################
+
+# Cold code runs in the Interpreter. Every Function, ForNode and WhileNode
+# counts its executions in a TierState and once it is hot its body is
+# translated into Python source, compiled and swapped in. Nodes without a
+# translation are handed back to the Interpreter, so any body can be compiled.
+
+JIT_ENABLED = True
+FOLDABLE_NODES = (VarAccessNode, UnaryOpNode, BinOpNode)
+HOT_FUNCTION_THRESHOLD = 50
+HOT_LOOP_THRESHOLD = 500
+UNROLL_MAX_TRIP_COUNT = 8
+
+INLINE_NUMBER_OPS = {
+    TT_PLUS: "{0} + {1}",
+    TT_MINUS: "{0} - {1}",
+    TT_MUL: "{0} * {1}",
+    TT_DIV: "{0} / {1}",
+    TT_POW: "int({0} ** {1})",
+    TT_FLOORDIV: "{0} // {1}",
+    TT_MOD: "{0} % {1}",
+    TT_BITAND: "{0} & {1}",
+    TT_BITOR: "{0} | {1}",
+    TT_LSHIFT: "{0} << {1}",
+    TT_RSHIFT: "{0} >> {1}",
+    TT_EE: "int({0} == {1})",
+    TT_NE: "int({0} != {1})",
+    TT_LT: "int({0} < {1})",
+    TT_GT: "int({0} > {1})",
+    TT_LTE: "int({0} <= {1})",
+    TT_GTE: "int({0} >= {1})",
+}
+
+class TierState:
+    def __init__(self):
+        self.count = 0
+        self.compiled = None
+        self.failed = False
+
+    def tick(self, threshold, unit_name, target):
+        if self.compiled is not None:
+            return self.compiled
+        if self.failed or not JIT_ENABLED:
+            return None
+
+        self.count += 1
+        if self.count >= threshold:
+            try:
+                self.compiled = getattr(Compiler(), f"compile_{unit_name}")(target)
+            except (SyntaxError, RecursionError):
+                # Nested deeper than Python allows, keep interpreting
+                self.failed = True
+        return self.compiled
+
+class LoopFrame:
+    def __init__(self, pending=None, stop=None):
+        self.pending = pending
+        self.pending_used = False
+        self.in_body = True
+
+        # Set for unrolled loops, where each iteration is a one-shot block
+        self.stop = stop
+
+class Compiler:
+    def __init__(self):
+        self.lines = []
+        self.depth = 2
+        self.nodes = []
+        self.node_refs = {}
+        self.temp_count = 0
+        self.loops = []
+
+        # Cleared while compiling the unfolded fallback of a folded expression
+        self.folding = True
+
+    ##################################
+
+    def compile_function(self, function):
+        self.emit_unit_prologue()
+        value = self.compile_node(function.body_node, function.should_auto_return)
+        self.emit(f"return RTResult().success({value})")
+        return self.build("interp, context")
+
+    def compile_for_loop(self, node):
+        self.emit_unit_prologue()
+        self.emit("end = end_value.value")
+        self.emit("step = step_value.value")
+        self.emit_for(node, "i", "end", "step", "elements" if node.result_used else None)
+        self.emit(f"return RTResult().success({self.loop_result(node, 'elements')})")
+        return self.build("interp, context, i, end_value, step_value, elements")
+
+    def compile_for_in_loop(self, node):
+        # Picks up with the element the Interpreter had already taken
+        self.emit_unit_prologue()
+        self.emit_for_in(node, "chain((element,), iterator)", "elements" if node.result_used else None)
+        self.emit(f"return RTResult().success({self.loop_result(node, 'elements')})")
+        return self.build("interp, context, element, iterator, elements")
+
+    def compile_while_loop(self, node):
+        self.emit_unit_prologue()
+        self.emit_while(node, "elements" if node.result_used else None)
+        self.emit(f"return RTResult().success({self.loop_result(node, 'elements')})")
+        return self.build("interp, context, elements")
+
+    ##################################
+
+    def build(self, params):
+        source = "\n".join([
+            "def make_compiled(N):",
+            f"    def compiled({params}):",
+            *self.lines,
+            "    return compiled",
+        ])
+        namespace = {}
+        exec(compile(source, "<compiled>", "exec"), globals(), namespace)
+        compiled = namespace["make_compiled"](self.nodes)
+        compiled.source = source
+        return compiled
+
+    def emit(self, line):
+        self.lines.append("    " * self.depth + line)
+
+    def emit_unit_prologue(self):
+        self.emit("st = context.symbol_table")
+        self.emit("symbols = st.symbols")
+        self.emit("root = st.root")
+
+    def emit_bind(self, var_name, value):
+        self.emit(f"if {var_name!r} in symbols: symbols[{var_name!r}] = {value}")
+        self.emit(f"else: st.set({var_name!r}, {value})")
+
+    def end_block(self, mark):
+        if len(self.lines) == mark:
+            self.emit("pass")
+        self.depth -= 1
+
+    def temp(self):
+        self.temp_count += 1
+        return f"t{self.temp_count}"
+
+    def ref(self, node):
+        if id(node) not in self.node_refs:
+            self.node_refs[id(node)] = len(self.nodes)
+            self.nodes.append(node)
+        return f"N[{self.node_refs[id(node)]}]"
+
+    def pos(self, node):
+        ref = self.ref(node)
+        return f"{ref}.pos_start, {ref}.pos_end"
+
+    def stamp(self, value, node):
+        if PRODUCTION_MODE:
+            return value
+        return f"{value}.set_context(context).set_pos({self.pos(node)})"
+
+    def emit_propagate(self, res):
+        self.emit(f"if {res}.should_return():")
+        self.depth += 1
+        self.emit_unwind(res)
+        self.depth -= 1
+
+    def emit_unwind(self, res):
+        # Mirrors how the Interpreter passes an RTResult up: continue and
+        # break stop at the nearest loop body, anything else leaves the unit
+        if self.loops:
+            frame = self.loops[-1]
+            self.emit(f"if {res}.loop_should_continue or {res}.loop_should_break:")
+            self.depth += 1
+            if frame.stop:
+                self.emit(f"{frame.stop} = {res}.loop_should_break")
+            elif frame.in_body:
+                self.emit(f"if {res}.loop_should_continue: continue")
+            else:
+                frame.pending_used = True
+                self.emit(f"{frame.pending} = {res}")
+            self.emit("break")
+            self.depth -= 1
+        self.emit(f"return {res}")
+
+    def loop_result(self, node, elements):
+        if not node.result_used:
+            return "Number.none"
+        return self.stamp(f"List({elements})", node)
+
+    def emit_loop_body(self, node, elements):
+        value = self.compile_node(node.body_node, elements is not None)
+        if elements is not None:
+            self.emit(f"{elements}.append({value})")
+
+    def emit_for(self, node, i, end, step, elements):
+        self.emit(f"for {i} in loop_range({i}, {end}, {step}):")
+        self.depth += 1
+        self.emit_bind(node.var_name_token.value, f"Number({i})")
+        self.loops.append(LoopFrame())
+        self.emit_loop_body(node, elements)
+        self.loops.pop()
+        self.depth -= 1
+
+    def emit_for_in(self, node, iterator, elements):
+        element = self.temp()
+        self.emit("try:")
+        self.depth += 1
+        self.emit(f"for {element} in {iterator}:")
+        self.depth += 1
+        self.emit_bind(node.var_name_token.value, element)
+        self.loops.append(LoopFrame())
+        self.emit_loop_body(node, elements)
+        self.loops.pop()
+        self.depth -= 2
+        self.emit("except CallbackFailed as failed:")
+        self.depth += 1
+        self.emit("return failed.result")
+        self.depth -= 1
+
+    def emit_unrolled_for(self, node, values, elements):
+        # Every iteration gets its own copy of the body inside a one-shot
+        # while, so continue and break still have somewhere to jump to
+        frame = LoopFrame(stop=self.temp())
+        self.emit(f"{frame.stop} = False")
+        self.emit("while True:")
+        self.depth += 1
+        for value in values:
+            self.emit_bind(node.var_name_token.value, f"Number({value!r})")
+            self.emit("while True:")
+            self.depth += 1
+            self.loops.append(frame)
+            self.emit_loop_body(node, elements)
+            self.loops.pop()
+            self.emit("break")
+            self.depth -= 1
+            self.emit(f"if {frame.stop}: break")
+        self.emit("break")
+        self.depth -= 1
+
+    def constant_trip(self, node):
+        bounds = [self.int_literal(node.start_value_node), self.int_literal(node.end_value_node)]
+        bounds.append(self.int_literal(node.step_value_node) if node.step_value_node else 1)
+        if None in bounds or bounds[2] == 0:
+            return None
+        values = range(*bounds)
+        return values if len(values) <= UNROLL_MAX_TRIP_COUNT else None
+
+    def int_literal(self, node):
+        sign = 1
+        if isinstance(node, UnaryOpNode) and node.op_token.type in (TT_PLUS, TT_MINUS):
+            sign = -1 if node.op_token.type == TT_MINUS else 1
+            node = node.node
+        if isinstance(node, NumberNode) and type(node.token.value) is int:
+            return sign * node.token.value
+        return None
+
+    def emit_while(self, node, elements):
+        frame = LoopFrame(self.temp())
+        self.emit(f"{frame.pending} = None")
+        self.emit("while True:")
+        self.depth += 1
+        self.loops.append(frame)
+        frame.in_body = False
+        condition = self.compile_node(node.condition_node, True)
+        self.emit(f"if not {condition}.is_true(): break")
+        frame.in_body = True
+        self.emit_loop_body(node, elements)
+        self.loops.pop()
+        self.depth -= 1
+
+        if frame.pending_used:
+            self.emit(f"if {frame.pending} is not None:")
+            self.depth += 1
+            self.emit_unwind(frame.pending)
+            self.depth -= 1
+
+    ##################################
+
+    def compile_node(self, node, want):
+        if want and self.folding and type(node) in FOLDABLE_NODES:
+            value = self.compile_folded(node)
+            if value is not None:
+                return value
+        method_name = f"compile_{type(node).__name__}"
+        method = getattr(self, method_name, self.compile_delegated)
+        return method(node, want)
+
+    def compile_folded(self, node):
+        # An expression of literals is evaluated once, here. One that reads
+        # global constants is guarded by the root's constants_version, which
+        # changes if any of them is rebound, shadowed or redeclared.
+        folded = self.constant_value(node)
+        if folded is None:
+            return None
+
+        constant, names = folded
+        value = self.temp()
+        if not names:
+            self.emit(f"{value} = {self.ref(constant)}")
+            return value
+
+        version = global_symbol_table.constants_version
+        self.emit(f"if root is {self.ref(global_symbol_table)} and root.constants_version == {version}:")
+        self.depth += 1
+        self.emit(f"{value} = {self.ref(constant)}")
+        self.depth -= 1
+        self.emit("else:")
+        self.depth += 1
+        self.folding = False
+        fallback = self.compile_node(node, True)
+        self.folding = True
+        self.emit(f"{value} = {fallback}")
+        self.depth -= 1
+        return value
+
+    def constant_value(self, node):
+        # The value a node always evaluates to and the global constants it
+        # reads, or None. Operations that would fail are left to run time.
+        if type(node) is NumberNode:
+            return Number(node.token.value), ()
+
+        if type(node) is StringNode:
+            return String(node.token.value), ()
+
+        if type(node) is VarAccessNode:
+            name, root = node.var_name_token.value, global_symbol_table
+            value = root.symbols.get(name)
+            if name in root.constants and name not in root.shadowed_names and type(value) in (Number, String):
+                return value, (name,)
+            return None
+
+        if type(node) is UnaryOpNode and node.op_token.type in (TT_MINUS, TT_PLUS):
+            operand = self.constant_value(node.node)
+            if operand is None or type(operand[0]) is not Number:
+                return None
+            value, names = operand
+            if node.op_token.type == TT_MINUS:
+                value = Number(value.value * -1)
+            return value, names
+
+        if type(node) is BinOpNode and node.op_token.type in QUICKENED_NUMBER_OPS:
+            left, right = self.constant_value(node.left_node), self.constant_value(node.right_node)
+            if left is None or right is None or type(left[0]) is not Number or type(right[0]) is not Number:
+                return None
+            value = folded_number_op(node.op_token.type, left[0].value, right[0].value)
+            if value is None:
+                return None
+            return Number(value), left[1] + right[1]
+
+        return None
+
+    def compile_delegated(self, node, want):
+        res = self.temp()
+        self.emit(f"{res} = interp.visit({self.ref(node)}, context)")
+        self.emit_propagate(res)
+        if not want:
+            return "None"
+        value = self.temp()
+        self.emit(f"{value} = {res}.value")
+        return value
+
+    def compile_NumberNode(self, node, want):
+        if not want:
+            return "None"
+        value = self.temp()
+        self.emit(f"{value} = {self.stamp(f'Number({node.token.value!r})', node)}")
+        return value
+
+    def compile_StringNode(self, node, want):
+        if not want:
+            return "None"
+        value = self.temp()
+        self.emit(f"{value} = {self.stamp(f'String({node.token.value!r})', node)}")
+        return value
+
+    def compile_ListNode(self, node, want):
+        elements = [self.compile_node(element_node, want) for element_node in node.element_nodes]
+        if not want:
+            return "None"
+        value = self.temp()
+        list_value = f"List([{', '.join(elements)}])"
+        self.emit(f"{value} = {self.stamp(list_value, node)}")
+        return value
+
+    def compile_VarAccessNode(self, node, want):
+        var_name = node.var_name_token.value
+        if node.static_type is not None:
+            value = self.temp()
+            self.emit(f"{value} = symbols[{var_name!r}]")
+            return value if want else "None"
+
+        value, cache = self.temp(), self.temp()
+        self.emit(f"{cache} = {self.ref(node)}.cache")
+        self.emit(f"if {cache} is not None and {cache}[0] is root and {cache}[1] == root.version:")
+        self.depth += 1
+        self.emit(f"{value} = root.symbols[{var_name!r}]")
+        self.depth -= 1
+        self.emit("else:")
+        self.depth += 1
+        self.emit(f"{value} = interp.lookup({self.ref(node)}, st)")
+        self.depth -= 1
+        self.emit(f"if not {value}:")
+        self.depth += 1
+        details = f"'{var_name}' is not defined"
+        self.emit(f"return RTResult().failure(RTError({self.pos(node)}, {details!r}, context))")
+        self.depth -= 1
+        return value if want else "None"
+
+    def compile_VarAssignNode(self, node, want):
+        var_name = node.var_name_token.value
+        ref = self.ref(node)
+        if node.static_type is not None:
+            # An annotated argument given a value of its own type
+            value = self.compile_node(node.value_node, True)
+            if node.op_token is not None:
+                current = self.temp()
+                self.emit(f"{current} = symbols[{var_name!r}]")
+                value = self.emit_operation(node, current, value, "update", static=True)
+            self.emit(f"symbols[{var_name!r}] = {value}")
+            return value if want else "None"
+
+        if node.op_token is not None:
+            current = self.temp()
+            self.emit(f"{current} = st.get({var_name!r})")
+            self.emit(f"if not {current}:")
+            self.depth += 1
+            details = f"'{var_name}' is not defined"
+            self.emit(f"return RTResult().failure(RTError({ref}.var_name_token.pos_start, {ref}.var_name_token.pos_end, {details!r}, context))")
+            self.depth -= 1
+
+        value = self.compile_node(node.value_node, True)
+        if node.op_token is not None:
+            value = self.emit_operation(node, current, value, "update")
+
+        # Names declared with a type go through the Interpreter's checked assign()
+        error = self.temp()
+        if node.type_token is None and not node.is_const:
+            self.emit(f"if not st.types and not st.constants and {var_name!r} not in root.constants:")
+            self.depth += 1
+            self.emit(f"st.set({var_name!r}, {value})")
+            self.depth -= 1
+            self.emit("else:")
+            self.depth += 1
+        self.emit(f"{value}, {error} = interp.assign({ref}, {value}, context)")
+        self.emit(f"if {error}: return RTResult().failure({error})")
+        if node.type_token is None and not node.is_const:
+            self.depth -= 1
+        return value if want else "None"
+
+    def compile_IndexAssignNode(self, node, want):
+        container = self.compile_node(node.list_node, True)
+        index = self.compile_node(node.index_node, True)
+        error = self.temp()
+        if node.op_token is not None:
+            current = self.temp()
+            self.emit(f"{current}, {error} = {container}.dived_by({index})")
+            self.emit(f"if {error}: return RTResult().failure(interp.locate({error}, {self.ref(node)}, context))")
+
+        value = self.compile_node(node.value_node, True)
+        if node.op_token is not None:
+            value = self.emit_operation(node, current, value, "update")
+        self.emit(f"_, {error} = {container}.set_at({index}, {value})")
+        self.emit(f"if {error}: return RTResult().failure(interp.locate({error}, {self.ref(node)}, context))")
+        return value if want else "None"
+
+    def compile_BinOpNode(self, node, want):
+        if node.static_type is not None and not needs_operand_guard(node):
+            # Literal operands go into the expression as they are
+            operands = [self.static_operand(operand) for operand in (node.left_node, node.right_node)]
+            result = self.temp()
+            self.emit(f"{result} = Number({INLINE_NUMBER_OPS[node.op_token.type].format(*operands)})")
+            return result if want else "None"
+
+        left = self.compile_node(node.left_node, True)
+        right = self.compile_node(node.right_node, True)
+        result = self.emit_operation(node, left, right, "bin_op", node.static_type is not None)
+        return result if want else "None"
+
+    def static_operand(self, node):
+        if type(node) is NumberNode:
+            return repr(node.token.value)
+        return f"{self.compile_node(node, True)}.value"
+
+    def emit_operation(self, node, left, right, method, static=False):
+        # Inlines the arithmetic for the types the node was quickened on, or
+        # without type guards when they are known statically, and hands
+        # anything else to the Interpreter's bin_op() or update()
+        result, error = self.temp(), self.temp()
+        op_type = node.op_token.type
+
+        template, guards = None, []
+        if static:
+            template = INLINE_NUMBER_OPS[op_type]
+        elif node.quickened is not None:
+            template = INLINE_NUMBER_OPS.get(op_type)
+            guards = [f"type({left}) is Number", f"type({right}) is Number"]
+            if op_type in BITWISE_OPS:
+                guards.append(f"type({left}.value) is int and type({right}.value) is int")
+
+        if template:
+            if op_type in (TT_DIV, TT_FLOORDIV, TT_MOD):
+                guards.append(f"{right}.value")
+            elif op_type in (TT_LSHIFT, TT_RSHIFT):
+                guards.append(f"{right}.value >= 0")
+            operation = template.format(f"{left}.value", f"{right}.value")
+            if not guards:
+                self.emit(f"{result} = Number({operation})")
+                return result
+            self.emit(f"if {' and '.join(guards)}:")
+            self.depth += 1
+            self.emit(f"{result} = Number({operation})")
+            self.depth -= 1
+            self.emit("else:")
+            self.depth += 1
+
+        self.emit(f"{result}, {error} = interp.{method}({self.ref(node)}, {left}, {right}, context)")
+        self.emit(f"if {error}: return RTResult().failure({error})")
+
+        if template:
+            self.depth -= 1
+        return result
+
+    def compile_LogicalOpNode(self, node, want):
+        left = self.compile_node(node.left_node, True)
+        result, error = self.temp(), self.temp()
+
+        decided = "" if node.op_token.matches(TT_KEYWORD, "or") else "not "
+        self.emit(f"if isinstance({left}, Number) and {decided}{left}.value:")
+        self.depth += 1
+        self.emit(f"{result} = {left}")
+        self.depth -= 1
+        self.emit("else:")
+        self.depth += 1
+        right = self.compile_node(node.right_node, True)
+        self.emit(f"{result}, {error} = interp.logical_op({self.ref(node)}, {left}, {right}, context)")
+        self.emit(f"if {error}: return RTResult().failure({error})")
+        self.depth -= 1
+        return result if want else "None"
+
+    def compile_UnaryOpNode(self, node, want):
+        operand = self.compile_node(node.node, True)
+        result, error = self.temp(), self.temp()
+
+        is_minus = node.op_token.type == TT_MINUS
+        if is_minus:
+            self.emit(f"if type({operand}) is Number:")
+            self.depth += 1
+            self.emit(f"{result} = Number({operand}.value * -1)")
+            self.depth -= 1
+            self.emit("else:")
+            self.depth += 1
+
+        self.emit(f"{result}, {error} = interp.unary_op({self.ref(node)}, {operand}, context)")
+        self.emit(f"if {error}: return RTResult().failure({error})")
+
+        if is_minus:
+            self.depth -= 1
+        return result if want else "None"
+
+    def compile_IfNode(self, node, want):
+        result = self.temp() if want else None
+        depth = self.depth
+
+        for condition, expr, should_return_none in node.cases:
+            condition_value = self.compile_node(condition, True)
+            self.emit(f"if {condition_value}.is_true():")
+            self.depth += 1
+            mark = len(self.lines)
+            value = self.compile_node(expr, want and not should_return_none)
+            if want:
+                self.emit(f"{result} = {'Number.none' if should_return_none else value}")
+            self.end_block(mark)
+            self.emit("else:")
+            self.depth += 1
+
+        mark = len(self.lines)
+        if node.else_case:
+            expr, should_return_none = node.else_case
+            value = self.compile_node(expr, want and not should_return_none)
+            if want:
+                self.emit(f"{result} = {'Number.none' if should_return_none else value}")
+        elif want:
+            self.emit(f"{result} = Number.none")
+        self.end_block(mark)
+
+        self.depth = depth
+        return result if want else "None"
+
+    def compile_MatchNode(self, node, want):
+        # The case index is looked up in the parser's jump table and then
+        # narrowed down with a binary search over the compiled bodies, with -1
+        # standing for the else case
+        result = self.temp() if want else None
+        subject = self.compile_node(node.subject_node, True)
+        index = self.temp()
+        self.emit(f"{index} = {self.ref(node)}.table.get({subject}.value, -1) if isinstance({subject}, (Number, String)) else -1")
+        self.emit_case_tree(node, index, -1, len(node.cases), result)
+        return result if want else "None"
+
+    def emit_case_tree(self, node, index, low, high, result):
+        if high - low > 1:
+            middle = (low + high) // 2
+            self.emit(f"if {index} < {middle}:")
+            self.depth += 1
+            self.emit_case_tree(node, index, low, middle, result)
+            self.depth -= 1
+            self.emit("else:")
+            self.depth += 1
+            self.emit_case_tree(node, index, middle, high, result)
+            self.depth -= 1
+            return
+
+        case = node.cases[low] if low >= 0 else node.else_case
+        mark = len(self.lines)
+        if case:
+            expr, should_return_none = case
+            value = self.compile_node(expr, result is not None and not should_return_none)
+            if result:
+                self.emit(f"{result} = {'Number.none' if should_return_none else value}")
+        elif result:
+            self.emit(f"{result} = Number.none")
+        if len(self.lines) == mark:
+            self.emit("pass")
+
+    def compile_ForNode(self, node, want):
+        elements = self.temp() if want and node.result_used else None
+        values = self.constant_trip(node)
+
+        if values is not None:
+            self.emit_constant_check(node)
+            if elements:
+                self.emit(f"{elements} = []")
+            self.emit_unrolled_for(node, values, elements)
+            return self.loop_value(node, elements, want)
+
+        start_value = self.compile_node(node.start_value_node, True)
+        end_value = self.compile_node(node.end_value_node, True)
+        if node.step_value_node:
+            step_value = self.compile_node(node.step_value_node, True)
+        self.emit_constant_check(node)
+
+        i, end, step = self.temp(), self.temp(), self.temp()
+        self.emit(f"{i} = {start_value}.value")
+        self.emit(f"{end} = {end_value}.value")
+        self.emit(f"{step} = {step_value}.value" if node.step_value_node else f"{step} = 1")
+
+        if elements:
+            self.emit(f"{elements} = []")
+        self.emit_for(node, i, end, step, elements)
+        return self.loop_value(node, elements, want)
+
+    def compile_ForInNode(self, node, want):
+        elements = self.temp() if want and node.result_used else None
+        iterable = self.compile_node(node.iterable_node, True)
+        iterator, ref = self.temp(), self.ref(node)
+        self.emit(f"{iterator} = {iterable}.iterate()")
+        self.emit(f"if {iterator} is None:")
+        self.depth += 1
+        self.emit(f"return RTResult().failure(RTError({ref}.iterable_node.pos_start, {ref}.iterable_node.pos_end, 'Value is not iterable', context))")
+        self.depth -= 1
+        self.emit_constant_check(node)
+
+        if elements:
+            self.emit(f"{elements} = []")
+        self.emit_for_in(node, iterator, elements)
+        return self.loop_value(node, elements, want)
+
+    def emit_constant_check(self, node):
+        self.emit(f"if st.is_constant({node.var_name_token.value!r}):")
+        self.depth += 1
+        self.emit(f"return RTResult().failure(interp.constant_error({self.ref(node)}.var_name_token, context))")
+        self.depth -= 1
+
+    def compile_WhileNode(self, node, want):
+        elements = self.temp() if want and node.result_used else None
+        if elements:
+            self.emit(f"{elements} = []")
+        self.emit_while(node, elements)
+        return self.loop_value(node, elements, want)
+
+    def loop_value(self, node, elements, want):
+        if not want:
+            return "None"
+        value = self.temp()
+        self.emit(f"{value} = {self.loop_result(node, elements)}")
+        return value
+
+    def compile_CallNode(self, node, want):
+        value_to_call = self.compile_node(node.node_to_call, True)
+        args = [self.compile_node(arg_node, True) for arg_node in node.arg_nodes]
+        if node.constant_args and SPECIALIZE_ENABLED:
+            callee = self.temp()
+            self.emit(f"{callee} = specialized_callee({self.ref(node)}, {value_to_call})")
+            value_to_call = callee
+
+        res = self.temp()
+        self.emit(f"{res} = {value_to_call}.execute([{', '.join(args)}], context, {self.ref(node)})")
+        self.emit_propagate(res)
+        if not want:
+            return "None"
+        value = self.temp()
+        self.emit(f"{value} = {res}.value")
+        return value
+
+    def compile_ReturnNode(self, node, want):
+        value = self.compile_node(node.node_to_return, True) if node.node_to_return else "Number.none"
+        self.emit(f"return RTResult().success_return({value})")
+        return "None"
+
+    def compile_ContinueNode(self, node, want):
+        return self.compile_loop_control(node, "continue")
+
+    def compile_BreakNode(self, node, want):
+        return self.compile_loop_control(node, "break")
+
+    def compile_loop_control(self, node, keyword):
+        frame = self.loops[-1] if self.loops else None
+        if frame and frame.stop:
+            if keyword == "break":
+                self.emit(f"{frame.stop} = True")
+            self.emit("break")
+        elif frame and frame.in_body:
+            self.emit(keyword)
+        else:
+            res = self.temp()
+            self.emit(f"{res} = RTResult().success_{keyword}()")
+            self.emit_unwind(res)
+        return "None"
+
 ##################################
 # BUILT-IN VALUES
 ##################################
@@ -2237,6 +6203,44 @@ global_symbol_table.set("is_func", BuiltInFunction.is_func)
 global_symbol_table.set("append", BuiltInFunction.append)
 global_symbol_table.set("pop", BuiltInFunction.pop)
 global_symbol_table.set("extend", BuiltInFunction.extend)
+global_symbol_table.set("map", BuiltInFunction.map)
+global_symbol_table.set("filter", BuiltInFunction.filter)
+global_symbol_table.set("reduce", BuiltInFunction.reduce)
+global_symbol_table.set("sort", BuiltInFunction.sort)
+global_symbol_table.set("index_of", BuiltInFunction.index_of)
+global_symbol_table.set("slice", BuiltInFunction.slice)
+global_symbol_table.set("make_list", BuiltInFunction.make_list)
+global_symbol_table.set("memoize", BuiltInFunction.memoize)
+global_symbol_table.set("memo_stats", BuiltInFunction.memo_stats)
+global_symbol_table.set("get", BuiltInFunction.get)
+global_symbol_table.set("set", BuiltInFunction.set)
+global_symbol_table.set("has", BuiltInFunction.has)
+global_symbol_table.set("delete", BuiltInFunction.delete)
+global_symbol_table.set("keys", BuiltInFunction.keys)
+global_symbol_table.set("deque", BuiltInFunction.deque)
+global_symbol_table.set("push_front", BuiltInFunction.push_front)
+global_symbol_table.set("push_back", BuiltInFunction.push_back)
+global_symbol_table.set("pop_front", BuiltInFunction.pop_front)
+global_symbol_table.set("pop_back", BuiltInFunction.pop_back)
+global_symbol_table.set("heap", BuiltInFunction.heap)
+global_symbol_table.set("heap_push", BuiltInFunction.heap_push)
+global_symbol_table.set("heap_pop", BuiltInFunction.heap_pop)
+global_symbol_table.set("heap_peek", BuiltInFunction.heap_peek)
+global_symbol_table.set("len", BuiltInFunction.len)
+global_symbol_table.set("substr", BuiltInFunction.substr)
+global_symbol_table.set("find", BuiltInFunction.find)
+global_symbol_table.set("split", BuiltInFunction.split)
+global_symbol_table.set("join", BuiltInFunction.join)
+global_symbol_table.set("replace", BuiltInFunction.replace)
+global_symbol_table.set("upper", BuiltInFunction.upper)
+global_symbol_table.set("lower", BuiltInFunction.lower)
+global_symbol_table.set("array", BuiltInFunction.array)
+global_symbol_table.set("to_array", BuiltInFunction.to_array)
+global_symbol_table.set("to_list", BuiltInFunction.to_list)
+global_symbol_table.set("sum", BuiltInFunction.sum)
+global_symbol_table.set("min", BuiltInFunction.min)
+global_symbol_table.set("max", BuiltInFunction.max)
+global_symbol_table.set("mean", BuiltInFunction.mean)
 
 ##################################
 # RUN
@@ -2255,6 +6259,9 @@ def run(file_name, text):
     if ast.error:
         return None, ast.error
     
+    # Find loops whose values are thrown away
+    ResultUsage().visit(ast.node)
+
     # Run program
     interpreter = Interpreter()
     context = Context("<program>")
@@ -0,0 +1,68 @@
+# Times a predicate-heavy filter loop written with a short-circuiting 'and'
+# against the same loop with both operands evaluated up front, which is what
+# every 'and' used to do.
+#
+#   python benchmarks/short_circuit.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from basic import run
+
+PRELUDE = "\n".join([
+    "func is_square(n)",
+    "    for k = 0 to n + 1 then",
+    "        if k * k == n then return 1",
+    "        if k * k > n then return 0",
+    "    end",
+    "    return 0",
+    "end",
+])
+
+SHORT_CIRCUIT = "\n".join([
+    "func count_short(n)",
+    "    var found = 0",
+    "    var lo = n - n / 10",
+    "    for i = 0 to n then",
+    "        if i >= lo and is_square(i) then var found = found + 1",
+    "    end",
+    "    return found",
+    "end",
+    "count_short({n})",
+])
+
+EAGER = "\n".join([
+    "func count_eager(n)",
+    "    var found = 0",
+    "    var lo = n - n / 10",
+    "    for i = 0 to n then",
+    "        var guard = i >= lo",
+    "        var square = is_square(i)",
+    "        if guard and square then var found = found + 1",
+    "    end",
+    "    return found",
+    "end",
+    "count_eager({n})",
+])
+
+def measure(program, n):
+    start = time.perf_counter()
+    value, error = run("<benchmark>", program.format(n=n))
+    if error:
+        raise SystemExit(error.as_string())
+    return time.perf_counter() - start, value.elements[-1].value
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    run("<benchmark>", PRELUDE)
+
+    eager_time, eager_found = measure(EAGER, n)
+    short_time, short_found = measure(SHORT_CIRCUIT, n)
+    assert eager_found == short_found
+
+    print(f"squares in the top tenth below {n}: {short_found}")
+    print(f"eager:         {eager_time:.3f}s")
+    print(f"short-circuit: {short_time:.3f}s ({eager_time / short_time:.1f}x)")
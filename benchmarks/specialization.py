@@ -0,0 +1,51 @@
+# Times a general-purpose formatting function called with mostly literal
+# arguments, with call site specialization turned off and on. Specialized
+# copies of the function skip the branches its literal arguments decide.
+#
+#   python benchmarks/specialization.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import basic
+
+PROGRAM = "\n".join([
+    "func {name}(kind, sep, x)",
+    "    if kind == 0 then",
+    "        return x",
+    "    elif kind == 1 then",
+    "        return x + 1",
+    "    elif kind == 2 and sep == \";\" then",
+    "        return x * 3",
+    "    elif kind == 3 and sep == \",\" then",
+    "        return x * 2",
+    "    end",
+    "    return 0",
+    "end",
+    "var total = 0",
+    "for i = 0 to {calls} then var total = total + {name}(3, \",\", i)",
+    "total",
+])
+
+def measure(specialize, calls):
+    basic.SPECIALIZE_ENABLED = specialize
+    program = PROGRAM.format(name="specialized_row" if specialize else "generic_row", calls=calls)
+    start = time.perf_counter()
+    value, error = basic.run("<benchmark>", program)
+    if error:
+        raise SystemExit(error.as_string())
+    return time.perf_counter() - start, value.elements[-1].value
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    generic_time, generic_total = measure(False, calls)
+    specialized_time, specialized_total = measure(True, calls)
+    assert specialized_total == generic_total
+
+    print(f"{calls} calls with literal arguments: {specialized_total}")
+    print(f"generic:     {generic_time:.3f}s")
+    print(f"specialized: {specialized_time:.3f}s ({generic_time / specialized_time:.1f}x)")
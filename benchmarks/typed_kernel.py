@@ -0,0 +1,52 @@
+# Times a numeric kernel whose arguments and accumulator are annotated against
+# the same kernel without annotations. Reads of annotated names and the
+# arithmetic on them are typed statically, so they skip symbol lookups and
+# type guards.
+#
+#   python benchmarks/typed_kernel.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from basic import run
+
+KERNEL = "\n".join([
+    "func {name}(n{int_type}, x{float_type}, scale{float_type}, offset{float_type})",
+    "    var acc{float_type} = 0.0",
+    "    for i = 0 to n then",
+    "        var acc = acc + x * scale + offset * x - scale / 3 + x * x * offset",
+    "    end",
+    "    return acc",
+    "end",
+    "var total = 0",
+    "for k = 0 to {calls} then var total = total + {name}({n}, 0.5, 1.25, 2.0)",
+    "total",
+])
+
+def measure(typed, n, calls):
+    program = KERNEL.format(
+        name="typed_kernel" if typed else "untyped_kernel",
+        int_type=": int" if typed else "",
+        float_type=": float" if typed else "",
+        n=n, calls=calls,
+    )
+    start = time.perf_counter()
+    value, error = run("<benchmark>", program)
+    if error:
+        raise SystemExit(error.as_string())
+    return time.perf_counter() - start, value.elements[-1].value
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    untyped_time, untyped_total = measure(False, n, calls)
+    typed_time, typed_total = measure(True, n, calls)
+    assert typed_total == untyped_total
+
+    print(f"{calls} calls of a {n} iteration kernel: {typed_total}")
+    print(f"untyped: {untyped_time:.3f}s")
+    print(f"typed:   {typed_time:.3f}s ({untyped_time / typed_time:.1f}x)")
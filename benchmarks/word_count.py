@@ -0,0 +1,80 @@
+# Counts words with a Map against the list scan scripts had to use before
+# there was one: a list of distinct words, then a pass over the text for each.
+#
+#   python benchmarks/word_count.py [word count] [vocabulary size]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from basic import run
+
+LIST_SCAN = "\n".join([
+    "func count_scan(words, n)",
+    "    var distinct = []",
+    "    var distinct_count = 0",
+    "    for i = 0 to n then",
+    "        var word = words / i",
+    "        var seen = 0",
+    "        for j = 0 to distinct_count then",
+    "            if distinct / j == word then",
+    "                var seen = 1",
+    "                break",
+    "            end",
+    "        end",
+    "        if not seen then",
+    "            append(distinct, word)",
+    "            var distinct_count = distinct_count + 1",
+    "        end",
+    "    end",
+    "    var counts = []",
+    "    for j = 0 to distinct_count then",
+    "        var count = 0",
+    "        for i = 0 to n then",
+    "            if words / i == distinct / j then var count = count + 1",
+    "        end",
+    "        append(counts, [distinct / j, count])",
+    "    end",
+    "    return counts",
+    "end",
+    "count_scan(bench_words, {n})",
+])
+
+MAP = "\n".join([
+    "func count_map(words, n)",
+    "    var counts = {{}}",
+    "    for i = 0 to n then",
+    "        var word = words / i",
+    "        set(counts, word, get(counts, word, 0) + 1)",
+    "    end",
+    "    return counts",
+    "end",
+    "count_map(bench_words, {n})",
+])
+
+def measure(program, n):
+    start = time.perf_counter()
+    value, error = run("<benchmark>", program.format(n=n))
+    if error:
+        raise SystemExit(error.as_string())
+    return time.perf_counter() - start, value.elements[-1]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    vocabulary = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    random.seed(0)
+    words = [f"w{random.randrange(vocabulary)}" for _ in range(n)]
+    run("<benchmark>", "var bench_words = [" + ", ".join(f'"{word}"' for word in words) + "]")
+
+    scan_time, scan_counts = measure(LIST_SCAN, n)
+    map_time, map_counts = measure(MAP, n)
+    assert {pair.elements[0].value: pair.elements[1].value for pair in scan_counts.elements} == \
+        {key.value: value.value for key, value in map_counts.entries.values()}
+
+    print(f"{n} words, {len(map_counts.entries)} distinct")
+    print(f"list scan: {scan_time:.3f}s")
+    print(f"map:       {map_time:.3f}s ({scan_time / map_time:.1f}x)")
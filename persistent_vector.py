@@ -0,0 +1,169 @@
+##################################
+# PERSISTENT VECTOR
+##################################
+
+# An immutable sequence stored as a height balanced binary tree whose leaves
+# hold up to CHUNK_SIZE items. Every update copies only the path it touches,
+# so appending, replacing or removing at an index and concatenating are all
+# O(log n) and the new vector shares the rest of its structure with the old one.
+
+CHUNK_SIZE = 32
+
+class Leaf:
+    __slots__ = ("items", "size")
+    height = 0
+
+    def __init__(self, items):
+        self.items = items
+        self.size = len(items)
+
+class Branch:
+    __slots__ = ("left", "right", "size", "height")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.size = left.size + right.size
+        self.height = max(left.height, right.height) + 1
+
+##################################
+
+def balance(left, right):
+    # Joins two trees whose heights differ by at most two
+    if left.height > right.height + 1:
+        if left.left.height >= left.right.height:
+            return Branch(left.left, Branch(left.right, right))
+        return Branch(Branch(left.left, left.right.left), Branch(left.right.right, right))
+
+    if right.height > left.height + 1:
+        if right.right.height >= right.left.height:
+            return Branch(Branch(left, right.left), right.right)
+        return Branch(Branch(left, right.left.left), Branch(right.left.right, right.right))
+
+    return Branch(left, right)
+
+def join(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    if left.height > right.height + 1:
+        return balance(left.left, join(left.right, right))
+    if right.height > left.height + 1:
+        return balance(join(left, right.left), right.right)
+    return Branch(left, right)
+
+def build(leaves, start, end):
+    if end - start == 1:
+        return leaves[start]
+    middle = (start + end) // 2
+    return Branch(build(leaves, start, middle), build(leaves, middle, end))
+
+def push(node, item):
+    if type(node) is Leaf:
+        if node.size < CHUNK_SIZE:
+            return Leaf(node.items + (item,))
+        return Branch(node, Leaf((item,)))
+    return balance(node.left, push(node.right, item))
+
+def fill_last(node, items):
+    if type(node) is Leaf:
+        return Leaf(node.items + items)
+    return Branch(node.left, fill_last(node.right, items))
+
+def last_leaf(node):
+    while type(node) is Branch:
+        node = node.right
+    return node
+
+def assign(node, index, item):
+    if type(node) is Leaf:
+        return Leaf(node.items[:index] + (item,) + node.items[index + 1:])
+
+    if index < node.left.size:
+        return Branch(assign(node.left, index, item), node.right)
+    return Branch(node.left, assign(node.right, index - node.left.size, item))
+
+def delete(node, index):
+    if type(node) is Leaf:
+        if node.size == 1:
+            return None
+        return Leaf(node.items[:index] + node.items[index + 1:])
+
+    if index < node.left.size:
+        return join(delete(node.left, index), node.right)
+    return join(node.left, delete(node.right, index - node.left.size))
+
+##################################
+
+class PVector:
+    __slots__ = ("root",)
+
+    def __init__(self, root=None):
+        self.root = root
+
+    @classmethod
+    def from_items(cls, items):
+        return cls.EMPTY.extend(items)
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def __getitem__(self, index):
+        # Indices are expected to be in range and non-negative
+        node = self.root
+        while type(node) is Branch:
+            if index < node.left.size:
+                node = node.left
+            else:
+                index -= node.left.size
+                node = node.right
+        return node.items[index]
+
+    def __iter__(self):
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if type(node) is Leaf:
+                yield from node.items
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+
+    def append(self, item):
+        if self.root is None:
+            return PVector(Leaf((item,)))
+        return PVector(push(self.root, item))
+
+    def extend(self, items):
+        items = tuple(items)
+        if not items:
+            return self
+
+        root = self.root
+        if root is not None:
+            room = CHUNK_SIZE - last_leaf(root).size
+            if room > 0:
+                root = fill_last(root, items[:room])
+                items = items[room:]
+            if not items:
+                return PVector(root)
+
+        leaves = [Leaf(items[i:i + CHUNK_SIZE]) for i in range(0, len(items), CHUNK_SIZE)]
+        return PVector(join(root, build(leaves, 0, len(leaves))))
+
+    def concat(self, other):
+        # Short vectors are copied into the last leaf rather than joined, so
+        # repeated small concatenations don't leave a trail of tiny leaves
+        if len(other) <= CHUNK_SIZE:
+            return self.extend(other)
+        return PVector(join(self.root, other.root))
+
+    def set(self, index, item):
+        return PVector(assign(self.root, index, item))
+
+    def remove(self, index):
+        return PVector(delete(self.root, index))
+
+PVector.EMPTY = PVector()
@@ -1,7 +1,27 @@
 import unittest
 import sys
+import basic
+from persistent_vector import PVector
 from basic import *
 
+def parse(code):
+    # The tree of code that is expected to lex and parse without errors
+    tokens, error = Lexer('<stdin>', code).make_tokens()
+    assert error is None, error
+    ast = Parser(tokens).parse()
+    assert ast.error is None, ast.error
+    return ast.node
+
+class LowJitThresholds:
+    # Makes functions and loops hot after a couple of runs
+    def setUp(self):
+        self.saved = (basic.JIT_ENABLED, basic.HOT_FUNCTION_THRESHOLD, basic.HOT_LOOP_THRESHOLD)
+        basic.HOT_FUNCTION_THRESHOLD = 2
+        basic.HOT_LOOP_THRESHOLD = 3
+
+    def tearDown(self):
+        basic.JIT_ENABLED, basic.HOT_FUNCTION_THRESHOLD, basic.HOT_LOOP_THRESHOLD = self.saved
+
 class TestLexerExtended(unittest.TestCase):
     def test_string_escapes(self):
         lexer = Lexer('<stdin>', '"hello\\nworld"')
@@ -41,8 +61,8 @@ class TestLexerExtended(unittest.TestCase):
         self.assertIsNotNone(error)
         self.assertIsInstance(error, ExpectedCharError)
 
-    def test_illegal_char_error_percent(self):
-        lexer = Lexer('<stdin>', '%')
+    def test_illegal_char_error_dollar(self):
+        lexer = Lexer('<stdin>', '$')
         tokens, error = lexer.make_tokens()
         self.assertIsNotNone(error)
         self.assertIsInstance(error, IllegalCharError)
@@ -249,6 +269,1580 @@ class TestInterpreterExtended(unittest.TestCase):
         self.assertEqual(res2.value.value, 7)
 
 
+class TestQuickening(unittest.TestCase):
+    def test_site_is_specialized_after_first_execution(self):
+        node = parse('1 + 2')
+        site = node.element_nodes[0]
+        self.assertIsNone(site.quickened)
+
+        context = Context('<program>')
+        context.symbol_table = SymbolTable()
+        result = Interpreter().visit(node, context)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.value.elements[0].value, 3)
+        self.assertEqual(site.quickened[:2], (Number, int))
+
+    def test_guard_failure_falls_back_to_generic_path(self):
+        value, error = run('<stdin>', 'var qadd = func(a, b) -> a + b\nqadd(1, 2)\nqadd("x", "y")\nqadd(1.5, 2.5)\nqadd(1, 0.5)')
+        self.assertIsNone(error)
+        results = [element.value for element in value.elements[1:]]
+        self.assertEqual(results, [3, 'xy', 4.0, 1.5])
+
+    def test_division_by_zero_still_reported(self):
+        value, error = run('<stdin>', 'var qdiv = func(a, b) -> a / b\nqdiv(4, 2)\nqdiv(4, 0)')
+        self.assertIsNotNone(error)
+        self.assertIsInstance(error, RTError)
+        self.assertEqual(error.details, 'Division by zero')
+
+    def test_type_mismatch_is_runtime_error(self):
+        value, error = run('<stdin>', '1 + "a"')
+        self.assertIsInstance(error, RTError)
+
+
+class TestTieredExecution(LowJitThresholds, unittest.TestCase):
+    PROGRAM = "\n".join([
+        "func collatz(n)",
+        "    var steps = 0",
+        "    while n != 1 then",
+        "        if n - 2 * int_half(n) == 0 then var n = int_half(n) else var n = 3 * n + 1",
+        "        var steps = steps + 1",
+        "    end",
+        "    return steps",
+        "end",
+        "func int_half(n)",
+        "    var h = 0",
+        "    for k = 0 to n then",
+        "        if k + k == n or k + k + 1 == n then",
+        "            var h = k",
+        "            break",
+        "        end",
+        "    end",
+        "    return h",
+        "end",
+        "var total = 0",
+        "for i = 1 to 16 then",
+        "    if i == 7 then continue",
+        "    var total = total + collatz(i)",
+        "end",
+        "total",
+        "for j = 0 to 30 step 3 then j * j",
+    ])
+
+    def run_program(self, jit_enabled):
+        basic.JIT_ENABLED = jit_enabled
+        tokens, error = Lexer('<stdin>', self.PROGRAM).make_tokens()
+        self.assertIsNone(error)
+        ast = Parser(tokens).parse()
+        self.assertIsNone(ast.error)
+        context = Context('<program>')
+        context.symbol_table = SymbolTable(global_symbol_table)
+        result = Interpreter().visit(ast.node, context)
+        self.assertIsNone(result.error)
+        return ast.node, result.value
+
+    def test_compiled_matches_interpreted(self):
+        _, interpreted = self.run_program(False)
+        tree, compiled = self.run_program(True)
+        self.assertEqual(str(compiled), str(interpreted))
+        self.assertEqual(compiled.elements[-2].value, 117)
+
+        collatz = tree.element_nodes[0]
+        self.assertIsNotNone(collatz.tier.compiled)
+        self.assertIn("while True:", collatz.tier.compiled.source)
+        self.assertIsNotNone(tree.element_nodes[-1].tier.compiled)
+
+    def test_cold_code_is_not_compiled(self):
+        basic.HOT_FUNCTION_THRESHOLD = 1000
+        basic.HOT_LOOP_THRESHOLD = 1000
+        tree, _ = self.run_program(True)
+        self.assertIsNone(tree.element_nodes[0].tier.compiled)
+        self.assertIsNone(tree.element_nodes[-1].tier.compiled)
+
+    def test_compiled_function_reports_runtime_errors(self):
+        basic.JIT_ENABLED = True
+        value, error = run('<stdin>', "var tier_div = func(a, b) -> a / b\nfor t = 0 to 5 then tier_div(10, 4 - t)")
+        self.assertIsInstance(error, RTError)
+        self.assertEqual(error.details, 'Division by zero')
+
+
+class TestForRange(LowJitThresholds, unittest.TestCase):
+    PROGRAM = "\n".join([
+        "func unroll_sum(n)",
+        "    var acc = 0",
+        "    for u = 0 to 6 then",
+        "        if u == 2 then continue",
+        "        if u == 5 then break",
+        "        var acc = acc + u * n",
+        "    end",
+        "    for w = 3 to -1 step -1 then var acc = acc + w",
+        "    return acc",
+        "end",
+        "var unroll_total = 0",
+        "for v = 0 to 8 then var unroll_total = unroll_total + unroll_sum(v)",
+        "unroll_total",
+    ])
+
+    def test_loop_range(self):
+        self.assertIsInstance(basic.loop_range(0, 5, 2), range)
+        self.assertEqual(list(basic.loop_range(0, 1, 0.25)), [0, 0.25, 0.5, 0.75])
+        self.assertEqual(list(basic.loop_range(3, 0, -1)), [3, 2, 1])
+        self.assertEqual(list(basic.loop_range(5, 0, 1)), [])
+
+    def test_range_loops(self):
+        basic.JIT_ENABLED = False
+        value, error = run('<stdin>', "for r = 0 to 1 step 0.5 then r\nfor r = 4 to 0 step -2 then r\nfor r = 3 to 3 then r")
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[0]), "[0, 0.5]")
+        self.assertEqual(str(value.elements[1]), "[4, 2]")
+        self.assertEqual(str(value.elements[2]), "[]")
+
+    def test_unrolled_loops_match_interpreter(self):
+        basic.JIT_ENABLED = False
+        interpreted, error = run('<stdin>', self.PROGRAM)
+        self.assertIsNone(error)
+        basic.JIT_ENABLED = True
+        compiled, error = run('<stdin>', self.PROGRAM)
+        self.assertIsNone(error)
+        self.assertEqual(compiled.elements[-1].value, interpreted.elements[-1].value)
+        self.assertEqual(compiled.elements[-1].value, 8 * 28 + 8 * 6)
+
+        function = global_symbol_table.get("unroll_sum")
+        self.assertIsNotNone(function.tier.compiled)
+        self.assertNotIn("loop_range", function.tier.compiled.source)
+
+
+class TestResultUsage(unittest.TestCase):
+    def analyzed(self, code):
+        tree = parse(code)
+        basic.ResultUsage().visit(tree)
+        return tree
+
+    def test_top_level_loop_results_are_used(self):
+        tree = self.analyzed("for i = 0 to 3 then i\nwhile 0 then 1")
+        self.assertTrue(tree.element_nodes[0].result_used)
+        self.assertTrue(tree.element_nodes[1].result_used)
+
+    def test_discarded_loop_results(self):
+        tree = self.analyzed("\n".join([
+            "func usage_demo(n)",
+            "    for i = 0 to n then i",
+            "    return for j = 0 to n then j",
+            "end",
+            "for k = 0 to 3 then",
+            "    for m = 0 to k then m",
+            "end",
+        ]))
+        body = tree.element_nodes[0].body_node
+        self.assertFalse(body.element_nodes[0].result_used)
+        self.assertTrue(body.element_nodes[1].node_to_return.result_used)
+
+        outer = tree.element_nodes[1]
+        self.assertFalse(outer.result_used)
+        self.assertFalse(outer.body_node.element_nodes[0].result_used)
+
+    def test_auto_return_keeps_result(self):
+        tree = self.analyzed("var usage_squares = func(n) -> for i = 0 to n then i * i")
+        self.assertTrue(tree.element_nodes[0].value_node.body_node.result_used)
+        value, error = run('<stdin>', "var usage_squares = func(n) -> for i = 0 to n then i * i\nusage_squares(4)")
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[1]), "[0, 1, 4, 9]")
+
+    def test_unused_loops_still_run(self):
+        value, error = run('<stdin>', "\n".join([
+            "func usage_count(n)",
+            "    var c = 0",
+            "    while c < n then var c = c + 1",
+            "    for i = 0 to n then var c = c + 1",
+            "    return c",
+            "end",
+            "usage_count(5)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[1].value, 10)
+
+
+class TestShortCircuit(LowJitThresholds, unittest.TestCase):
+    PROGRAM = "\n".join([
+        "var sc_calls = []",
+        "func sc_probe(v)",
+        "    append(sc_calls, v)",
+        "    return v",
+        "end",
+        "func sc_filter(n)",
+        "    var hits = 0",
+        "    for i = 0 to n then",
+        "        if i < 3 and sc_probe(1) then var hits = hits + 1",
+        "        if i < 3 or sc_probe(0) then var hits = hits + 1",
+        "    end",
+        "    return hits",
+        "end",
+        "sc_filter(10)",
+        "sc_calls",
+    ])
+
+    def test_parses_logical_op_node(self):
+        tokens, _ = Lexer('<stdin>', '1 and 0 or 1').make_tokens()
+        ast = Parser(tokens).parse()
+        node = ast.node.element_nodes[0]
+        self.assertIsInstance(node, basic.LogicalOpNode)
+        self.assertEqual(node.op_token.value, 'or')
+        self.assertIsInstance(node.left_node, basic.LogicalOpNode)
+
+    def test_right_operand_skipped(self):
+        value, error = run('<stdin>', "0 and undefined_sc_name\n2 or undefined_sc_name\n1 and 5\n0 or 0")
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements], [0, 2, 5, 0])
+
+    def test_right_operand_errors_when_needed(self):
+        value, error = run('<stdin>', "1 and undefined_sc_name")
+        self.assertIsInstance(error, RTError)
+        value, error = run('<stdin>', '"a" and 1')
+        self.assertIsInstance(error, RTError)
+
+    def test_guarded_calls(self):
+        for jit_enabled in (False, True):
+            basic.JIT_ENABLED = jit_enabled
+            value, error = run('<stdin>', self.PROGRAM)
+            self.assertIsNone(error)
+            self.assertEqual(value.elements[-2].value, 6)
+            self.assertEqual(len(value.elements[-1].elements), 3 + 7)
+
+
+class TestCopyElimination(unittest.TestCase):
+    def test_reads_share_the_stored_value(self):
+        value, error = run('<stdin>', 'var ce_num = 7\nvar ce_str = "hi"\nvar ce_fn = func() -> 1\nce_num\nce_str\nce_fn')
+        self.assertIsNone(error)
+        self.assertIs(value.elements[3], global_symbol_table.get("ce_num"))
+        self.assertIs(value.elements[4], global_symbol_table.get("ce_str"))
+        self.assertIs(value.elements[5], global_symbol_table.get("ce_fn"))
+
+    def test_call_returns_value_uncopied(self):
+        value, error = run('<stdin>', 'var ce_kept = 42\nfunc ce_get() -> ce_kept\nce_get()')
+        self.assertIsNone(error)
+        self.assertIs(value.elements[2], global_symbol_table.get("ce_kept"))
+
+    def test_callee_still_sees_caller_scope(self):
+        value, error = run('<stdin>', "\n".join([
+            "func ce_inner() -> ce_local * 2",
+            "func ce_outer(ce_local) -> ce_inner()",
+            "ce_outer(21)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[2].value, 42)
+
+    def test_errors_point_at_the_use(self):
+        value, error = run('<stdin>', 'var ce_zero = 0\nvar ce_one = 1\nce_one / ce_zero')
+        self.assertEqual(error.details, "Division by zero")
+        self.assertEqual(error.pos_start.ln, 2)
+        self.assertEqual((error.pos_start.col, error.pos_end.col), (0, 16))
+
+        value, error = run('<stdin>', 'var ce_id = func(a) -> a\n\nce_id(1, 2)')
+        self.assertEqual(error.details, "1 too many args passed into '<anonymous>'")
+        self.assertEqual(error.pos_start.ln, 2)
+
+        value, error = run('<stdin>', 'ce_one(1)')
+        self.assertEqual(error.details, "Illegal operation")
+        self.assertEqual((error.pos_start.col, error.pos_end.col), (0, 8))
+
+
+class TestErrorPositions(unittest.TestCase):
+    PROGRAM = "func ep_div(a) -> a / (a - a)\nep_div(3)"
+
+    def setUp(self):
+        self.saved = basic.PRODUCTION_MODE
+
+    def tearDown(self):
+        basic.PRODUCTION_MODE = self.saved
+
+    def test_singletons_are_not_mutated(self):
+        value, error = run('<stdin>', "var ep_t = True\nep_t\nnone\nep_t and True\n-(-True)\n[none, True] / 1")
+        self.assertIsNone(error)
+        for singleton in (Number.none, Number.true, Number.false):
+            self.assertIsNone(singleton.pos_start)
+            self.assertIsNone(singleton.context)
+
+    def test_literals_are_stamped_in_development_mode(self):
+        basic.PRODUCTION_MODE = False
+        value, error = run('<stdin>', "12")
+        self.assertEqual(value.elements[0].pos_start.col, 0)
+        self.assertIsNotNone(value.elements[0].context)
+
+    def test_production_mode_skips_positions(self):
+        basic.PRODUCTION_MODE = True
+        value, error = run('<stdin>', '12\n"ep"\n[1]\n1 + 2')
+        self.assertIsNone(error)
+        for element in value.elements:
+            self.assertIsNone(element.pos_start)
+            self.assertIsNone(element.context)
+
+    def test_same_traceback_in_both_modes(self):
+        basic.PRODUCTION_MODE = False
+        _, development = run('<stdin>', self.PROGRAM)
+        basic.PRODUCTION_MODE = True
+        _, production = run('<stdin>', self.PROGRAM)
+        self.assertEqual(development.as_string(), production.as_string())
+        self.assertIn("line 1, in ep_div", production.as_string())
+
+
+class TestPersistentList(unittest.TestCase):
+    def test_operators_leave_the_original_alone(self):
+        value, error = run('<stdin>', "\n".join([
+            "var pl_a = [1, 2, 3]",
+            "var pl_b = pl_a + 4",
+            "var pl_c = pl_a - 0",
+            "var pl_d = pl_a * [5, 6]",
+            "pl_a",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), "[1, 2, 3]")
+        self.assertEqual(str(global_symbol_table.get("pl_b")), "[1, 2, 3, 4]")
+        self.assertEqual(str(global_symbol_table.get("pl_c")), "[2, 3]")
+        self.assertEqual(str(global_symbol_table.get("pl_d")), "[1, 2, 3, 5, 6]")
+
+    def test_append_and_extend_work_in_place(self):
+        value, error = run('<stdin>', "\n".join([
+            "var pl_e = [1] + 2",
+            "var pl_f = pl_e",
+            "append(pl_e, 3)",
+            "extend(pl_e, pl_e)",
+            "pop(pl_e, 1)",
+            "pl_f",
+            "pl_f / -1",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-2]), "[1, 3, 1, 2, 3]")
+        self.assertEqual(value.elements[-1].value, 3)
+
+    def test_index_errors(self):
+        for code in ("[1, 2] / 2", "[1, 2] - 5", "[1, 2] / -3", "pop([], 0)"):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, RTError)
+
+    def test_long_lists_built_with_plus(self):
+        value, error = run('<stdin>', "\n".join([
+            "var pl_long = []",
+            "for i = 0 to 2000 then",
+            "    var pl_long = pl_long + i",
+            "end",
+            "var pl_longer = pl_long * pl_long - 0",
+            "pl_long / 1999",
+            "pl_longer / 0",
+            "pl_longer / 3998",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements[-3:]], [1999, 1, 1999])
+
+    def test_vector_matches_python_list(self):
+        vector, items = PVector.EMPTY, []
+        for i in range(300):
+            vector, items = vector.append(i), items + [i]
+        older = vector
+        vector = vector.extend(range(100)).concat(older).remove(5).remove(0)
+        items = (items + list(range(100)) + items)[1:5] + (items + list(range(100)) + items)[6:]
+        self.assertEqual(list(vector), items)
+        self.assertEqual([vector[i] for i in range(len(vector))], items)
+        self.assertEqual(list(older), list(range(300)))
+
+
+@unittest.skipIf(basic.numpy is None, "NumPy is not installed")
+class TestArrays(unittest.TestCase):
+    def test_creation_and_indexing(self):
+        value, error = run('<stdin>', "var ar_a = array(4, 2)\nar_a / 0\nar_a / -1\nto_array([1, 2.5]) / 1\nto_list(ar_a)")
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in (1, 2, 3)], [2, 2, 2.5])
+        self.assertEqual(str(value.elements[4]), "[2, 2, 2, 2]")
+
+    def test_element_wise_operators(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ar_b = to_array([1, 2, 3, 4])",
+            "to_list(ar_b + ar_b)",
+            "to_list(10 - ar_b)",
+            "to_list(ar_b * 3)",
+            "to_list(12 / ar_b)",
+            "to_list(ar_b / to_array([2, 2, 2, 2]))",
+            "to_list(ar_b > 2)",
+            "to_list(ar_b ^ 2 == 4 or ar_b == 4)",
+            "to_list(not (ar_b < 3))",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements[1:]], [
+            "[2, 4, 6, 8]", "[9, 8, 7, 6]", "[3, 6, 9, 12]", "[12.0, 6.0, 4.0, 3.0]",
+            "[0.5, 1.0, 1.5, 2.0]", "[0, 0, 1, 1]", "[0, 1, 0, 1]", "[0, 0, 1, 1]",
+        ])
+
+    def test_power_matches_scalar_power(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ar_p = to_array([1, 2, 4])",
+            "to_list(ar_p ^ -1)",
+            "to_list(2 ^ to_array([-1, 0, 3]))",
+            "to_list(to_array([2, 9, 2.5]) ^ to_array([0.5, 0.5, 2]))",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements[1:]], ["[1, 0, 0]", "[0, 1, 8]", "[1, 3, 6]"])
+        self.assertEqual([run('<stdin>', code)[0].elements[0].value for code in ("2 ^ -1", "9 ^ 0.5", "2.5 ^ 2")], [0, 3, 6])
+
+        for code in ("to_array([0, 1]) ^ -1", "to_array([-8]) ^ 0.5"):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, RTError, code)
+            self.assertEqual(error.details, "Power is not a finite integer")
+
+    def test_reductions(self):
+        value, error = run('<stdin>', "var ar_c = to_array([3, 1, 4, 1, 5])\nsum(ar_c)\nmin(ar_c)\nmax(ar_c)\nmean(ar_c)\nsum(array(0, 1))")
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements[1:]], [14, 1, 5, 2.8, 0])
+
+    def test_errors(self):
+        for code in ("array(2, 1) / 2", "array(2, 1) + array(3, 1)", "1 / array(2, 0)", "array(2, 1) + \"a\"",
+                     "to_array([1, \"a\"])", "min(array(0, 1))", "array(-1, 0)"):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, RTError, code)
+
+        value, error = run('<stdin>', "array(100000000000000000000, 0)")
+        self.assertEqual(error.details, "Array is too large to allocate")
+
+    def test_missing_numpy(self):
+        saved = basic.numpy
+        basic.numpy = None
+        try:
+            value, error = run('<stdin>', "array(3, 0)")
+        finally:
+            basic.numpy = saved
+        self.assertEqual(error.details, "Arrays need NumPy, which is not installed")
+
+
+class TestMaps(unittest.TestCase):
+    def test_literal_and_lookup(self):
+        value, error = run('<stdin>', "\n".join([
+            'var mp_a = {"one": 1, 2: "two", [1, "x"]: 3}',
+            'get(mp_a, "one")',
+            'get(mp_a, 2)',
+            'get(mp_a, [1, "x"])',
+            'get(mp_a, "missing")',
+            'get(mp_a, "missing", 7)',
+            'mp_a',
+            '{}',
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements[1:6]], ["1", "two", "3", "0", "7"])
+        self.assertEqual(str(value.elements[6]), '{"one": 1, 2: "two", [1, "x"]: 3}')
+        self.assertEqual(str(value.elements[7]), '{}')
+
+    def test_set_has_delete_and_keys(self):
+        value, error = run('<stdin>', "\n".join([
+            'var mp_b = {"a": 1}',
+            'set(mp_b, "b", 2)',
+            'set(mp_b, "a", 3)',
+            'has(mp_b, "b")',
+            'delete(mp_b, "b")',
+            'has(mp_b, "b")',
+            'set(mp_b, 1, "n")',
+            'keys(mp_b)',
+            'get(mp_b, "a")',
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[3].value, 1)
+        self.assertEqual(value.elements[5].value, 0)
+        self.assertEqual(str(value.elements[7]), '["a", 1]')
+        self.assertEqual(value.elements[8].value, 3)
+
+    def test_list_keys_are_frozen(self):
+        value, error = run('<stdin>', "\n".join([
+            'var mp_key = [1, 2]',
+            'var mp_c = {mp_key: "pair"}',
+            'append(mp_key, 3)',
+            'get(mp_c, [1, 2])',
+            'has(mp_c, mp_key)',
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[3]), "pair")
+        self.assertEqual(value.elements[4].value, 0)
+
+    def test_stored_keys_are_snapshots(self):
+        value, error = run('<stdin>', "\n".join([
+            'var mp_k1 = [1, 2]',
+            'var mp_k2 = [[3], 4]',
+            'var mp_s = {mp_k1: 1}',
+            'set(mp_s, mp_k2, 2)',
+            'append(mp_k1, 5)',
+            'append(mp_k2 / 0, 6)',
+            'mp_s',
+            'has(mp_s, [1, 2])',
+            'has(mp_s, [[3], 4])',
+            'has(mp_s, [1, 2, 5])',
+            'var mp_found = 0',
+            'for mp_key in keys(mp_s) then var mp_found += has(mp_s, mp_key)',
+            'mp_found',
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[6]), "{[1, 2]: 1, [[3], 4]: 2}")
+        self.assertEqual([value.elements[i].value for i in (7, 8, 9, 12)], [1, 1, 0, 2])
+
+    def test_errors(self):
+        for code in ('{func() -> 1: 1}', 'get([], 1)', 'set({}, {}, 1)', 'delete({}, 1)', 'keys(1)'):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, RTError, code)
+        value, error = run('<stdin>', '{1 2}')
+        self.assertIsInstance(error, InvalidSyntaxError)
+
+    def test_string_equality(self):
+        value, error = run('<stdin>', '"ab" == "ab"\n"ab" != "ab"\n"a" == "b"')
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements], [1, 0, 0])
+
+
+class TestDequeAndHeap(unittest.TestCase):
+    def test_deque_ends(self):
+        value, error = run('<stdin>', "\n".join([
+            "var dq_a = deque([2, 3])",
+            "push_front(dq_a, 1)",
+            "push_back(dq_a, 4)",
+            "append(dq_a, 5)",
+            "extend(dq_a, [6])",
+            "pop_front(dq_a)",
+            "pop_back(dq_a)",
+            "pop(dq_a, 0)",
+            "pop(dq_a, -1)",
+            "dq_a / 1",
+            "dq_a",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in range(5, 10)], [1, 6, 2, 5, 4])
+        self.assertEqual(str(value.elements[10]), "deque([3, 4])")
+
+    def test_breadth_first_search(self):
+        value, error = run('<stdin>', "\n".join([
+            "var dq_dist = {1: 0}",
+            "var dq_queue = deque([1])",
+            "func dq_visit(node, d)",
+            "    if not has(dq_dist, node) then",
+            "        set(dq_dist, node, d)",
+            "        push_back(dq_queue, node)",
+            "    end",
+            "end",
+            "var dq_count = 1",
+            "while dq_count > 0 then",
+            "    var node = pop_front(dq_queue)",
+            "    var dq_count = dq_count - 1",
+            "    var d = get(dq_dist, node) + 1",
+            "    if node * 2 <= 20 then",
+            "        var before = has(dq_dist, node * 2)",
+            "        dq_visit(node * 2, d)",
+            "        if not before then var dq_count = dq_count + 1",
+            "    end",
+            "    var before = has(dq_dist, node + 1)",
+            "    if node + 1 <= 20 then",
+            "        dq_visit(node + 1, d)",
+            "        if not before then var dq_count = dq_count + 1",
+            "    end",
+            "end",
+            "get(dq_dist, 20)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 5)
+
+    def test_heap_order(self):
+        value, error = run('<stdin>', "\n".join([
+            "var hp_a = heap()",
+            "heap_push(hp_a, 5)",
+            "heap_push(hp_a, 1)",
+            "heap_push(hp_a, 3)",
+            "heap_peek(hp_a)",
+            "heap_pop(hp_a)",
+            "heap_pop(hp_a)",
+            "heap_pop(hp_a)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements[4:]], [1, 1, 3, 5])
+
+    def test_heap_key_function(self):
+        value, error = run('<stdin>', "\n".join([
+            "var hp_b = heap(func(task) -> task / 1)",
+            'heap_push(hp_b, ["write", 2])',
+            'heap_push(hp_b, ["plan", 1])',
+            'heap_push(hp_b, ["ship", 2])',
+            "print_return(hp_b)",
+            "heap_pop(hp_b) / 0",
+            "heap_pop(hp_b) / 0",
+            "heap_pop(hp_b) / 0",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[4]), 'heap([["plan", 1], ["write", 2], ["ship", 2]])')
+        self.assertEqual([str(element) for element in value.elements[5:]], ["plan", "write", "ship"])
+
+    def test_errors(self):
+        for code in ("pop_front(deque())", "heap_pop(heap())", "push_back([], 1)", "heap(1)",
+                     "var hp_c = heap()\nheap_push(hp_c, 1)\nheap_push(hp_c, \"a\")",
+                     "heap_push(heap(func(x) -> x / 0), 1)"):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, RTError, code)
+
+
+class TestStringRope(unittest.TestCase):
+    def test_repeated_concatenation_stays_unflattened(self):
+        value, error = run('<stdin>', "\n".join([
+            "var rp_out = \"\"",
+            "for i = 0 to 100 then",
+            "    var rp_out = rp_out + \"line\" + \"\\n\"",
+            "end",
+            "rp_out",
+        ]))
+        self.assertIsNone(error)
+        rope = value.elements[-1]
+        self.assertIsNotNone(rope.parts)
+        self.assertEqual(rope.size(), 500)
+        self.assertEqual(rope.value, "line\n" * 100)
+        self.assertIsNone(rope.parts)
+
+    def test_branches_of_one_rope_are_independent(self):
+        value, error = run('<stdin>', "\n".join([
+            "var rp_base = \"a\" * 300",
+            "var rp_base = rp_base + \"b\"",
+            "var rp_x = rp_base + \"x\"",
+            "var rp_y = rp_base + \"y\"",
+            "var rp_xx = rp_x + \"x\"",
+            "rp_base",
+            "rp_x",
+            "rp_y",
+            "rp_xx",
+        ]))
+        self.assertIsNone(error)
+        prefix = "a" * 300 + "b"
+        self.assertEqual([s.value for s in value.elements[-4:]], [prefix, prefix + "x", prefix + "y", prefix + "xx"])
+
+    def test_reads_flatten(self):
+        value, error = run('<stdin>', "\n".join([
+            "var rp_long = \"c\" * 300",
+            "var rp_long = rp_long + \"d\"",
+            "rp_long == \"c\" * 300 + \"d\"",
+            "var rp_map = {rp_long: 1}",
+            "get(rp_map, \"c\" * 300 + \"d\")",
+            "rp_long + \"e\" != rp_long",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in (2, 4, 5)], [1, 1, 1])
+
+    def test_short_strings_stay_flat(self):
+        value, error = run('<stdin>', 'var rp_short = "ab"\nrp_short + "cd"')
+        self.assertIsNone(error)
+        self.assertIsNone(value.elements[-1].parts)
+        self.assertEqual(value.elements[-1].value, "abcd")
+
+class TestStringBuiltins(unittest.TestCase):
+    def test_string_builtins(self):
+        value, error = run('<stdin>', "\n".join([
+            "var sb_s = \"hello, big world\"",
+            "len(sb_s)",
+            "find(sb_s, \"o\")",
+            "find(sb_s, \"o\", 5)",
+            "find(sb_s, \"xyz\")",
+            "split(\"a,b,,c\", \",\")",
+            "split(\"  x  y \")",
+            "join([\"a\", \"b\", \"c\"], \"-\")",
+            "replace(sb_s, \"o\", \"0\")",
+            "upper(\"big\")",
+            "lower(\"ABC\")",
+        ]))
+        self.assertIsNone(error)
+        results = value.elements[1:]
+        self.assertEqual([number.value for number in results[:4]], [16, 4, 12, -1])
+        self.assertEqual([str(element) for element in results[4].elements], ["a", "b", "", "c"])
+        self.assertEqual([str(element) for element in results[5].elements], ["x", "y"])
+        self.assertEqual([str(string) for string in results[6:]], ["a-b-c", "hell0, big w0rld", "BIG", "abc"])
+
+    def test_substrings_are_views(self):
+        value, error = run('<stdin>', "\n".join([
+            "var sb_text = \"hello, big world\"",
+            "var sb_sub = substr(sb_text, 7, 3)",
+            "var sb_tail = substr(sb_text, -5)",
+            "len(sb_sub)",
+            "find(substr(sb_text, 5), \"o\", 4)",
+            "substr(sb_tail, 1, 2)",
+            "sb_sub == \"big\"",
+        ]))
+        self.assertIsNone(error)
+        view = value.elements[1]
+        self.assertEqual((view.offset, view.length), (7, 3))
+        self.assertEqual([value.elements[i].value for i in (3, 4, 6)], [3, 7, 1])
+        nested = value.elements[5]
+        self.assertEqual((nested.offset, nested.length), (12, 2))
+        self.assertEqual(str(nested), "or")
+        self.assertEqual(str(value.elements[2]), "world")
+
+    def test_len_of_containers(self):
+        value, error = run('<stdin>', 'len([1, 2, 3])\nlen({1: 2})\nlen(deque([1]))\nlen(heap())')
+        self.assertIsNone(error)
+        self.assertEqual([number.value for number in value.elements], [3, 1, 1, 0])
+
+    def test_string_builtin_errors(self):
+        for code, details in [
+            ('substr("abc", 4)', "Substring could not be taken because start index out of range"),
+            ('substr("abc", 0, -1)', "Third arg must be a non-negative integer"),
+            ('find("abc", 1)', "Second arg must be string"),
+            ('split("abc", "")', "Second arg must be a non-empty string"),
+            ('join([1], ",")', "First arg must be list of strings"),
+            ('len(1)', "Arg must be string, list, deque, map, heap or array"),
+        ]:
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+class TestListBuiltins(unittest.TestCase):
+    def test_higher_order_builtins(self):
+        value, error = run('<stdin>', "\n".join([
+            "var lb_xs = [5, 3, 8, 1]",
+            "map(lb_xs, func(x) -> x * 2)",
+            "filter(lb_xs, func(x) -> x > 2)",
+            "reduce(lb_xs, func(a, b) -> a + b)",
+            "reduce([], func(a, b) -> a + b, 10)",
+            "sum(lb_xs)",
+            "sum(deque([1.5, 2]))",
+            "len(lb_xs)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[1]), "[10, 6, 16, 2]")
+        self.assertEqual(str(value.elements[2]), "[5, 3, 8]")
+        self.assertEqual([value.elements[i].value for i in range(3, 8)], [17, 10, 17, 3.5, 4])
+
+    def test_sort(self):
+        value, error = run('<stdin>', "\n".join([
+            "var lb_ys = [5, 3, 8, 1]",
+            "sort(lb_ys)",
+            "sort(lb_ys, func(x) -> 0 - x)",
+            "sort([\"bb\", \"a\", \"ccc\"], func(s) -> len(s), func(a, b) -> b - a)",
+            "sort([[2, \"b\"], [1, \"a\"], [2, \"a\"]], func(pair) -> pair / 0)",
+            "lb_ys",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements[1:]], [
+            "[1, 3, 5, 8]",
+            "[8, 5, 3, 1]",
+            '["ccc", "bb", "a"]',
+            '[[1, "a"], [2, "b"], [2, "a"]]',
+            "[5, 3, 8, 1]",
+        ])
+
+    def test_index_of_and_slice(self):
+        value, error = run('<stdin>', "\n".join([
+            "var lb_zs = [5, \"x\", [1, 2], 8]",
+            "index_of(lb_zs, 8)",
+            "index_of(lb_zs, \"x\")",
+            "index_of(lb_zs, [1, 2])",
+            "index_of(lb_zs, \"8\")",
+            "slice(lb_zs, 1, 3)",
+            "slice(lb_zs, -2)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in range(1, 5)], [3, 1, 2, -1])
+        self.assertEqual(str(value.elements[5]), '["x", [1, 2]]')
+        self.assertEqual(str(value.elements[6]), "[[1, 2], 8]")
+
+    def test_slice_keeps_structural_sharing(self):
+        value, error = run('<stdin>', "\n".join([
+            "var lb_shared = [0, 1, 2, 3] * [4, 5]",
+            "append(lb_shared, 6)",
+            "slice(lb_shared, 3, -1)",
+            "slice(lb_shared, -3)",
+            "slice(lb_shared, 5, 1)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements[2:]], ["[3, 4, 5]", "[4, 5, 6]", "[]"])
+        shared = basic.global_symbol_table.get("lb_shared")
+        self.assertEqual(len(shared.vector), 6)
+        self.assertEqual(len(shared.tail), 1)
+
+    def test_callbacks_can_change_the_container(self):
+        value, error = run('<stdin>', "\n".join([
+            "var lb_dq = deque([3, 1, 2])",
+            "reduce(lb_dq, func(acc, x) -> pop_front(lb_dq) + acc, 0)",
+            "var lb_dq2 = deque([1, 2])",
+            "map(lb_dq2, func(x) -> append(lb_dq2, x))",
+            "len(lb_dq2)",
+            "var lb_ys = [1, 2, 3]",
+            "filter(lb_ys, func(x) -> append(lb_ys, x))",
+            "len(lb_ys)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in (1, 4, 7)], [6, 4, 6])
+
+    def test_callback_errors_propagate(self):
+        value, error = run('<stdin>', 'sort([1, 2, 3], none, func(a, b) -> a / 0)')
+        self.assertIsInstance(error, basic.RTError)
+        self.assertEqual(error.details, "Division by zero")
+
+        for code, details in [
+            ('sort([1, "a"])', "Sort keys must be all numbers or all strings"),
+            ('sort([1, 2], none, func(a, b) -> "x")', "Compare function must return a number"),
+            ('reduce([], func(a, b) -> a)', "Cannot reduce an empty list without an initial value"),
+            ('map([1], 2)', "Second arg must be function"),
+            ('sum(["a"])', "Arg must be list of numbers or array"),
+        ]:
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+class TestIndexedAssignment(unittest.TestCase):
+    def test_parses_index_and_compound_assignment(self):
+        tokens, error = basic.Lexer('<stdin>', 'xs / 1 += 2').make_tokens()
+        self.assertEqual([token.type for token in tokens[:4]], [basic.TT_IDENTIFIER, basic.TT_DIV, basic.TT_INT, basic.TT_PLUSEQ])
+        ast = basic.Parser(tokens).parse()
+        node = ast.node.element_nodes[0]
+        self.assertIsInstance(node, basic.IndexAssignNode)
+        self.assertEqual(node.op_token.type, basic.TT_PLUS)
+
+        tokens, error = basic.Lexer('<stdin>', 'var n -= 1\nn *= 2').make_tokens()
+        nodes = basic.Parser(tokens).parse().node.element_nodes
+        self.assertEqual([node.op_token.type for node in nodes], [basic.TT_MINUS, basic.TT_MUL])
+
+    def test_index_store_mutates_in_place(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ia_xs = [1, 2, 3]",
+            "var ia_alias = ia_xs",
+            "var ia_sum = ia_xs + 4",
+            "ia_xs / 0 = 10",
+            "ia_xs / -1 += 5",
+            "set(ia_xs, 1, \"two\")",
+            "var ia_grid = [[0, 0], [0, 0]]",
+            "ia_grid / 1 / 0 = 9",
+            "ia_sum / 3 = 40",
+            "ia_alias",
+            "ia_sum",
+            "ia_grid",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[9]), '[10, "two", 8]')
+        self.assertEqual(str(value.elements[10]), "[1, 2, 3, 40]")
+        self.assertEqual(str(value.elements[11]), "[[0, 0], [9, 0]]")
+
+    def test_compound_assignment(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ca_n = 5",
+            "ca_n += 2",
+            "var ca_n *= 3",
+            "ca_n -= 1",
+            "var ca_xs = [1, 2]",
+            "var ca_alias = ca_xs",
+            "ca_xs += 3",
+            "ca_xs -= 0",
+            "ca_xs *= [4]",
+            "var ca_s = \"ab\"",
+            "ca_s += \"cd\"",
+            "ca_alias",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in range(1, 4)], [7, 21, 20])
+        self.assertEqual(value.elements[10].value, "abcd")
+        self.assertEqual(str(value.elements[11]), "[2, 3, 4]")
+
+    @unittest.skipIf(basic.numpy is None, "NumPy is not installed")
+    def test_array_updates_in_place(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ca_arr = array(3, 1)",
+            "var ca_view = ca_arr",
+            "ca_arr / 1 = 5",
+            "ca_arr += 1",
+            "to_list(ca_view)",
+            "ca_arr / 2 = 0.5",
+            "ca_arr",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[4]), "[2, 6, 2]")
+        self.assertIs(value.elements[6], value.elements[1])
+        self.assertEqual(value.elements[6].values.tolist(), [2.0, 6.0, 0.5])
+
+    def test_compiled_sieve(self):
+        value, error = run('<stdin>', "\n".join([
+            "func ia_sieve(n)",
+            "    var flags = []",
+            "    for i = 0 to n then",
+            "        append(flags, 1)",
+            "    end",
+            "    var count = 0",
+            "    for i = 2 to n then",
+            "        if flags / i == 1 then",
+            "            var count += 1",
+            "            for j = i * i to n step i then",
+            "                flags / j = 0",
+            "            end",
+            "        end",
+            "    end",
+            "    return count",
+            "end",
+            "ia_sieve(5000)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 669)
+
+    def test_assignment_errors(self):
+        for code, details in [
+            ('var ae_xs = [1]\nae_xs / 3 = 1', "Element at this index could not be assigned because list index out of range"),
+            ('ae_undefined += 1', "'ae_undefined' is not defined"),
+            ('var ae_n = 1\nae_n / 0 = 1', "Illegal operation"),
+            ('set(1, 2, 3)', "First arg must be map, list, deque or array"),
+        ]:
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+class TestForIn(unittest.TestCase):
+    def test_parses_for_in(self):
+        tokens, error = basic.Lexer('<stdin>', 'for x in xs then x').make_tokens()
+        node = basic.Parser(tokens).parse().node.element_nodes[0]
+        self.assertIsInstance(node, basic.ForInNode)
+        self.assertEqual(node.var_name_token.value, "x")
+        self.assertIsInstance(node.iterable_node, basic.VarAccessNode)
+
+    def test_iterates_each_type(self):
+        value, error = run('<stdin>', "\n".join([
+            "for fi_x in [1, 2, 3] then fi_x * 10",
+            "for fi_x in [1] + 2 then fi_x",
+            "for fi_c in \"abc\" then upper(fi_c)",
+            "for fi_k in {\"a\": 1, \"b\": 2} then fi_k",
+            "for fi_v in deque([4, 5]) then fi_v * 2",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements], [
+            "[10, 20, 30]", "[1, 2]", '["A", "B", "C"]', '["a", "b"]', "[8, 10]",
+        ])
+
+    def test_iterates_a_snapshot(self):
+        value, error = run('<stdin>', "\n".join([
+            "var fi_xs = [1, 2, 3]",
+            "for fi_x in fi_xs then append(fi_xs, fi_x)",
+            "var fi_ys = [1] * [2]",
+            "for fi_y in fi_ys then append(fi_ys, fi_y)",
+            "var fi_dq = deque([1, 2])",
+            "for fi_z in fi_dq then append(fi_dq, fi_z)",
+            "var fi_big = make_list(1000, 1)",
+            "for fi_b in fi_big then append(fi_big, fi_b)",
+            "[len(fi_xs), len(fi_ys), len(fi_dq), len(fi_big)]",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), "[6, 4, 4, 2000]")
+
+    def test_continue_and_break(self):
+        value, error = run('<stdin>', "\n".join([
+            "var fi_seen = []",
+            "for fi_y in [1, 2, 3, 4, 5] then",
+            "    if fi_y == 2 then continue",
+            "    if fi_y == 4 then break",
+            "    append(fi_seen, fi_y)",
+            "end",
+            "fi_seen",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), "[1, 3]")
+
+    def test_hot_loop_is_compiled_mid_iteration(self):
+        tokens, error = basic.Lexer('<stdin>', "\n".join([
+            "var fi_big = []",
+            "for i = 0 to 2000 then append(fi_big, i)",
+            "var fi_total = 0",
+            "for fi_n in fi_big then",
+            "    if fi_n == 1500 then break",
+            "    var fi_total += fi_n",
+            "end",
+            "fi_total",
+        ])).make_tokens()
+        ast = basic.Parser(tokens).parse()
+        context = basic.Context('<program>')
+        context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+        result = basic.Interpreter().visit(ast.node, context)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.value.elements[-1].value, sum(range(1500)))
+        self.assertIsNotNone(ast.node.element_nodes[3].tier.compiled)
+
+    def test_not_iterable(self):
+        value, error = run('<stdin>', 'for fi_q in 5 then 1')
+        self.assertIsInstance(error, basic.RTError)
+        self.assertEqual(error.details, "Value is not iterable")
+        self.assertEqual((error.pos_start.col, error.pos_end.col), (12, 13))
+
+class TestGenerators(unittest.TestCase):
+    def test_func_def_marks_generators(self):
+        tokens, error = basic.Lexer('<stdin>', "\n".join([
+            "func outer(xs)",
+            "    var inner = func(x) -> x",
+            "    for x in xs then",
+            "        yield inner(x)",
+            "    end",
+            "end",
+            "func plain() -> func() -> if 1 then yield 2",
+        ])).make_tokens()
+        outer, plain = basic.Parser(tokens).parse().node.element_nodes
+        self.assertIn(outer.body_node, outer.yielding)
+        self.assertEqual(len([node for node in outer.yielding if isinstance(node, basic.ForInNode)]), 1)
+        self.assertIsNone(outer.body_node.element_nodes[0].value_node.yielding)
+        self.assertIsNone(plain.yielding)
+        self.assertIsNotNone(plain.body_node.yielding)
+
+    def test_pipeline(self):
+        value, error = run('<stdin>', "\n".join([
+            "func gn_count(n)",
+            "    var i = 0",
+            "    while i < n then",
+            "        yield i",
+            "        var i += 1",
+            "    end",
+            "end",
+            "func gn_squares(xs)",
+            "    for x in xs then yield x * x",
+            "end",
+            "func gn_until(xs, limit)",
+            "    for x in xs then",
+            "        if x > limit then return",
+            "        yield x",
+            "    end",
+            "end",
+            "for gn_v in gn_count(4) then gn_v",
+            "sum(gn_squares(gn_count(10)))",
+            "to_list(gn_until(gn_squares(gn_count(100)), 20))",
+            "map(gn_squares([2, 3]), func(x) -> x + 1)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-4]), "[0, 1, 2, 3]")
+        self.assertEqual(value.elements[-3].value, 285)
+        self.assertEqual(str(value.elements[-2]), "[0, 1, 4, 9, 16]")
+        self.assertEqual(str(value.elements[-1]), "[5, 10]")
+
+    def test_runs_lazily_and_once(self):
+        value, error = run('<stdin>', "\n".join([
+            "var gn_log = []",
+            "func gn_logged()",
+            "    append(gn_log, 1)",
+            "    yield 1",
+            "    append(gn_log, 2)",
+            "    yield 2",
+            "end",
+            "var gn_g = gn_logged()",
+            "len(gn_log)",
+            "for gn_x in gn_g then if gn_x == 1 then break",
+            "len(gn_log)",
+            "to_list(gn_g)",
+            "to_list(gn_g)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in (3, 5)], [0, 1])
+        self.assertEqual(str(value.elements[6]), "[2]")
+        self.assertEqual(str(value.elements[7]), "[]")
+
+    def test_memoized_generators_are_not_cached(self):
+        value, error = run('<stdin>', "\n".join([
+            "memo func gn_memo(n)",
+            "    yield n",
+            "end",
+            "func gn_plain(n)",
+            "    yield n",
+            "end",
+            "var gn_wrapped = memoize(gn_plain)",
+            "[to_list(gn_memo(1)), to_list(gn_memo(1)), to_list(gn_wrapped(2)), to_list(gn_wrapped(2))]",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), "[[1], [1], [2], [2]]")
+
+    def test_errors_propagate_to_the_consumer(self):
+        run('<stdin>', "func gn_fail()\n    yield 1\n    yield 1 / 0\nend")
+        for code in ['for gn_y in gn_fail() then gn_y', 'sum(gn_fail())', 'to_list(gn_fail())']:
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, "Division by zero")
+            self.assertEqual(error.context.display_name, "gn_fail")
+
+        value, error = run('<stdin>', 'yield 5')
+        self.assertEqual(error.details, "'yield' used outside of a function")
+
+    def test_compiled_consumer(self):
+        saved = basic.HOT_FUNCTION_THRESHOLD
+        basic.HOT_FUNCTION_THRESHOLD = 2
+        try:
+            value, error = run('<stdin>', "\n".join([
+                "func gn_each(n, d)",
+                "    for i = 0 to n then yield 10 / d",
+                "end",
+                "func gn_total(n, d)",
+                "    var t = 0",
+                "    for x in gn_each(n, d) then var t += x",
+                "    return t",
+                "end",
+                "gn_total(2, 5)",
+                "gn_total(2, 5)",
+                "gn_total(3, 5)",
+            ]))
+            self.assertIsNone(error)
+            self.assertEqual(value.elements[-1].value, 6)
+            total = basic.global_symbol_table.get("gn_total")
+            self.assertIn("except CallbackFailed", total.tier.compiled.source)
+
+            value, error = run('<stdin>', "gn_total(3, 0)")
+            self.assertIsInstance(error, basic.RTError)
+            self.assertEqual(error.details, "Division by zero")
+        finally:
+            basic.HOT_FUNCTION_THRESHOLD = saved
+
+class TestIntegerOperators(unittest.TestCase):
+    def test_lexes_operators(self):
+        tokens, error = basic.Lexer('<stdin>', '% // & | << >> <= /').make_tokens()
+        self.assertIsNone(error)
+        self.assertEqual([token.type for token in tokens[:-1]], [
+            basic.TT_MOD, basic.TT_FLOORDIV, basic.TT_BITAND, basic.TT_BITOR,
+            basic.TT_LSHIFT, basic.TT_RSHIFT, basic.TT_LTE, basic.TT_DIV,
+        ])
+
+    def test_values_and_precedence(self):
+        value, error = run('<stdin>', "\n".join([
+            "-7 % 3",
+            "7.5 // 2",
+            "2 * 7 % 4",
+            "1 + 2 << 1",
+            "6 & 3 | 8",
+            "3 < 1 << 2",
+            "to_list(to_array([6, 5, 4]) & 3)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(element) for element in value.elements], [
+            "2", "3.0", "2", "6", "10", "1", "[2, 1, 0]",
+        ])
+
+    def test_errors(self):
+        for code, details in (
+            ("5 % 0", "Modulo by zero"),
+            ("5 // 0", "Division by zero"),
+            ("1.5 & 1", "Bitwise operations need integers"),
+            ("1 << -1", "Negative shift count"),
+            ("\"a\" % 2", "Illegal operation"),
+        ):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+    def test_compiled_loop_falls_back_on_bad_operands(self):
+        tokens, error = basic.Lexer('<stdin>', "\n".join([
+            "var io_hash = 0",
+            "for io_i = 0 to 2000 then",
+            "    var io_hash = (io_hash * 31 + io_i) % 65521",
+            "    var io_hash = io_hash & 4095 | io_i >> 3 << 1",
+            "end",
+            "io_hash",
+            "var io_d = 0",
+            "for io_i = 0 to 2000 then var io_d = 10 % (1000 - io_i)",
+        ])).make_tokens()
+        ast = basic.Parser(tokens).parse()
+        context = basic.Context('<program>')
+        context.symbol_table = basic.SymbolTable(basic.global_symbol_table)
+        result = basic.Interpreter().visit(ast.node, context)
+
+        expected = 0
+        for i in range(2000):
+            expected = (expected * 31 + i) % 65521
+            expected = expected & 4095 | i >> 3 << 1
+        self.assertIsNotNone(ast.node.element_nodes[1].tier.compiled)
+        self.assertIsInstance(result.error, basic.RTError)
+        self.assertEqual(result.error.details, "Modulo by zero")
+        self.assertEqual(context.symbol_table.get("io_hash").value, expected)
+
+class TestMatch(unittest.TestCase):
+    def test_parses_jump_table(self):
+        tokens, error = basic.Lexer('<stdin>', "\n".join([
+            "match x then",
+            "    case 1, -2 then 10",
+            "    case \"a\" then",
+            "        20",
+            "    else 30",
+            "end",
+        ])).make_tokens()
+        node = basic.Parser(tokens).parse().node.element_nodes[0]
+        self.assertIsInstance(node, basic.MatchNode)
+        self.assertEqual(node.table, {1: 0, -2: 0, "a": 1})
+        self.assertEqual([should_return_none for _, should_return_none in node.cases], [False, True])
+        self.assertIsNotNone(node.else_case)
+
+    def test_dispatch(self):
+        value, error = run('<stdin>', "\n".join([
+            "func ma_name(x)",
+            "    var ma_r = match x then",
+            "        case 1 then \"one\"",
+            "        case 2, 3 then \"few\"",
+            "        case -1.5 then \"neg\"",
+            "        case \"b\" then",
+            "            return \"bee\"",
+            "        else \"other\"",
+            "    end",
+            "    return ma_r",
+            "end",
+            "[ma_name(1), ma_name(3), ma_name(2.0), ma_name(-1.5), ma_name(\"b\"), ma_name(\"1\"), ma_name([1])]",
+            "match 4 then",
+            "    case 5 then 50",
+            "end",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[1]), '["one", "few", "few", "neg", "bee", "other", "other"]')
+        self.assertEqual(value.elements[2].value, 0)
+
+    def test_syntax_errors(self):
+        for code, details in (
+            ("match 1 then\ncase 1, 1 then 2\nend", "Duplicate case label"),
+            ("match 1 then\ncase x then 2\nend", "Expected int, float or string"),
+            ("match 1 then\ncase 1 then 2\n", "Expected 'case', 'else' or 'end'"),
+        ):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.InvalidSyntaxError, code)
+            self.assertEqual(error.details, details)
+
+    def test_hot_function_is_compiled(self):
+        value, error = run('<stdin>', "\n".join([
+            "func mh_f(x)",
+            "    var mh_r = match x then",
+            "        case 0 then 1",
+            "        case 1 then 2",
+            "        case 2 then 3",
+            "        case 3 then 4",
+            "        case 4 then",
+            "            if x == 4 then return 50",
+            "        else 0",
+            "    end",
+            "    return mh_r",
+            "end",
+            "var mh_total = 0",
+            "for i = 0 to 300 then var mh_total += mh_f(i % 6)",
+            "mh_total",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 50 * 60)
+        compiled = basic.global_symbol_table.get("mh_f").tier.compiled
+        self.assertIn(".table.get(", compiled.source)
+
+    def test_yield_inside_case(self):
+        value, error = run('<stdin>', "\n".join([
+            "func my_fizz(n)",
+            "    for i = 0 to n then",
+            "        match i % 3 then",
+            "            case 0 then yield \"fizz\"",
+            "            else",
+            "                yield i",
+            "        end",
+            "    end",
+            "end",
+            "to_list(my_fizz(5))",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), '["fizz", 1, 2, "fizz", 4]')
+
+class TestTypeAnnotations(unittest.TestCase):
+    def test_parses_annotations(self):
+        assign, func_def = parse("var x: float = 1\nfunc f(a: int, b, c: list) -> a").element_nodes
+        self.assertEqual(assign.type_token.value, "float")
+        self.assertEqual([token and token.value for token in func_def.arg_type_tokens], ["int", None, "list"])
+
+        tokens, error = basic.Lexer('<stdin>', "var x: dict = 1").make_tokens()
+        ast = basic.Parser(tokens).parse()
+        self.assertIsInstance(ast.error, basic.InvalidSyntaxError)
+        self.assertEqual(ast.error.details, "Expected 'int', 'float', 'str' or 'list'")
+
+    def test_assignments_are_checked(self):
+        value, error = run('<stdin>', "\n".join([
+            "var ta_f: float = 3",
+            "var ta_s: str = \"a\"",
+            "var ta_l: list = [1]",
+            "var ta_l += 2",
+            "var ta_f = ta_f * 2",
+            "[ta_f, ta_s, ta_l]",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), '[6.0, "a", [1, 2]]')
+
+        for code, details in (
+            ("var ta_i: int = 1.5", "'ta_i' must be int"),
+            ("var ta_s = 5", "'ta_s' must be str"),
+            ("var ta_l = \"x\"", "'ta_l' must be list"),
+        ):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+    def test_arguments_are_checked(self):
+        value, error = run('<stdin>', "\n".join([
+            "func ta_scale(x: float, n: int) -> x * n",
+            "func ta_bad(x: int)",
+            "    var x = \"s\"",
+            "end",
+            "ta_scale(2, 3)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[-1]), "6.0")
+
+        value, error = run('<stdin>', "ta_scale(1, 2.5)")
+        self.assertEqual(error.details, "Arg 'n' of 'ta_scale' must be int")
+        self.assertEqual((error.pos_start.col, error.pos_end.col), (0, 15))
+
+        value, error = run('<stdin>', "ta_bad(1)")
+        self.assertEqual(error.details, "'x' must be int")
+
+    def test_static_types(self):
+        tree = parse("\n".join([
+            "func f(n: int, x: float, y: int)",
+            "    var a = x * n",
+            "    var acc: float = 0.0",
+            "    for y = 0 to n then var acc = acc + x / 2.0",
+            "    func g() -> x",
+            "    var b = y + 1",
+            "    return n < 3",
+            "end",
+        ]))
+        body = tree.element_nodes[0].body_node.element_nodes
+        product = body[0].value_node
+        self.assertEqual(product.static_type, float)
+        self.assertIsNone(product.quickened)
+
+        loop_body = body[2].body_node
+        self.assertEqual(loop_body.static_type, float)
+        self.assertEqual(loop_body.value_node.right_node.quickened[1], float)
+        self.assertIsNone(body[3].body_node.static_type)
+        self.assertIsNone(body[4].value_node.static_type)
+        self.assertEqual(body[5].node_to_return.static_type, int)
+
+    def test_typed_kernel_is_compiled_without_guards(self):
+        kernel = "\n".join([
+            "func {name}(n{int}, x{float})",
+            "    var acc{float} = 0.0",
+            "    for i = 0 to n then var acc = acc + x * 3 - x / 4",
+            "    return acc",
+            "end",
+            "{name}(1000, 0.5)",
+        ])
+        results = []
+        for name, int_type, float_type in (("tk_untyped", "", ""), ("tk_typed", ": int", ": float")):
+            value, error = run('<stdin>', kernel.format(name=name, int=int_type, float=float_type))
+            self.assertIsNone(error)
+            results.append(value.elements[-1].value)
+        self.assertEqual(results[0], results[1])
+
+        function = basic.global_symbol_table.get("tk_typed")
+        source = function.body_node.element_nodes[1].tier.compiled.source
+        self.assertIn("Number(t", source)
+        self.assertIn("symbols['x']", source)
+        self.assertNotIn("type(", source)
+
+class TestListRepetition(unittest.TestCase):
+    def test_repetition_and_make_list(self):
+        value, error = run('<stdin>', "\n".join([
+            "[0] * 3",
+            "[1, 2] * 2",
+            "[1] * 0",
+            "[1] * [2]",
+            "make_list(3, \"a\")",
+            "var lr_table = make_list(4, 0)",
+            "lr_table / 1 = 5",
+            "lr_table",
+            "var lr_xs = [1, 2]",
+            "var lr_alias = lr_xs",
+            "var lr_xs *= 2",
+            "lr_alias",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([str(value.elements[i]) for i in (0, 1, 2, 3, 4, 7, 11)], [
+            "[0, 0, 0]", "[1, 2, 1, 2]", "[]", "[1, 2]", '["a", "a", "a"]', "[0, 5, 0, 0]", "[1, 2, 1, 2]",
+        ])
+
+    def test_large_table_in_one_allocation(self):
+        value, error = run('<stdin>', "var lr_big = [0] * 1000000\nlr_big / 999999 = 1\nlen(lr_big)")
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 1000000)
+        self.assertEqual(len(basic.global_symbol_table.get("lr_big").tail), 1000000)
+
+    def test_errors(self):
+        for code, details in (
+            ("[1] * -1", "List can only be repeated a non-negative integer number of times"),
+            ("[1] * 1.5", "List can only be repeated a non-negative integer number of times"),
+            ("make_list(-1, 0)", "First arg must be a non-negative integer"),
+            ("make_list(\"a\", 0)", "First arg must be a non-negative integer"),
+            ("make_list(100000000000000000000, 0)", "List is too large to allocate"),
+            ("[0] * 100000000000000000000", "List is too large to allocate"),
+            ("var lr_grow = [0]\nvar lr_grow *= 100000000000000000000", "List is too large to allocate"),
+        ):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertEqual(error.details, details)
+
+class TestConstants(unittest.TestCase):
+    def test_declaration_and_rebinding_errors(self):
+        value, error = run('<stdin>', "const ct_limit = 10\nconst ct_name: str = \"x\"\nct_limit * 2")
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, 20)
+
+        for code in (
+            "var ct_limit = 1",
+            "var ct_limit += 1",
+            "const ct_limit = 1",
+            "for ct_limit = 0 to 2 then 1",
+            "for ct_limit in [1] then 1",
+            "func ct_limit() -> 1",
+            "func ct_local()\n  const ct_inner = 1\n  var ct_inner = 2\nend\nct_local()",
+        ):
+            value, error = run('<stdin>', code)
+            self.assertIsInstance(error, basic.RTError, code)
+            self.assertTrue(error.details.startswith("Can't assign to constant"), code)
+        self.assertEqual(basic.global_symbol_table.get("ct_limit").value, 10)
+
+    def test_hot_loop_reads_are_folded(self):
+        value, error = run('<stdin>', "\n".join([
+            "const ct_scale = 3",
+            "const ct_offset = ct_scale * 2 + 1",
+            "func ct_kernel(n) -> n * ct_scale + ct_offset - -ct_scale",
+            "var ct_total = 0",
+            "for ct_i = 0 to 200 then var ct_total += ct_kernel(ct_i)",
+            "ct_total",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[-1].value, sum(i * 3 + 10 for i in range(200)))
+
+        source = basic.global_symbol_table.get("ct_kernel").tier.compiled.source
+        self.assertNotIn("'ct_scale'", source.split("else:")[0])
+        self.assertIn("root.constants_version ==", source)
+
+    def test_folding_respects_shadowing_arguments(self):
+        value, error = run('<stdin>', "\n".join([
+            "const ct_base = 5",
+            "func ct_read() -> ct_base + 1",
+            "func ct_shadow(ct_base) -> ct_read()",
+            "var ct_sums = []",
+            "for ct_j = 0 to 100 then append(ct_sums, ct_read())",
+            "ct_shadow(100)",
+            "ct_read()",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[-2].value, value.elements[-1].value], [101, 6])
+
+class TestSpecialization(unittest.TestCase):
+    def test_literal_arguments_decide_branches(self):
+        value, error = run('<stdin>', "\n".join([
+            "func sz_cell(kind, sep, x)",
+            "    if kind == 0 then",
+            "        return x",
+            "    elif kind == 1 and sep == \",\" then",
+            "        return x + 1",
+            "    end",
+            "    var sz_r = match kind then case 2 then x * 10 else -x end",
+            "    return sz_r",
+            "end",
+            "func sz_bump(n, x)",
+            "    var n = n + x",
+            "    return n",
+            "end",
+            "var sz_rows = []",
+            "for sz_i = 0 to 30 then append(sz_rows, [sz_cell(0, \",\", sz_i), sz_cell(1, \",\", sz_i), sz_cell(1, \";\", sz_i), sz_cell(2, \"\", sz_i), sz_cell(-1, \"\", sz_i), sz_bump(1, sz_i)])",
+            "sz_rows / 29",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual([element.value for element in value.elements[-1].elements], [29, 30, -29, 290, -29, 30])
+
+    def test_specialized_body_is_a_folded_copy(self):
+        run('<stdin>', "func sz_f(mode, x)\n    if mode == 1 or x then\n        return x + 1\n    end\n    return x\nend")
+        function = global_symbol_table.get("sz_f")
+
+        specialized = basic.specialize(function, parse("sz_f(1, y)").element_nodes[0])
+        self.assertEqual(specialized.body_node.element_nodes[0].cases, [])
+        self.assertEqual(len(function.body_node.element_nodes[0].cases), 1)
+        self.assertIsNone(basic.specialize(function, parse("sz_f(y, 1)").element_nodes[0]))
+
+    def test_call_site_caches_specialization(self):
+        node = parse("\n".join([
+            "func sz_g(flag) -> if flag then 1 else 2",
+            "var sz_sum = 0",
+            "for sz_j = 0 to 100 then var sz_sum = sz_sum + sz_g(1)",
+            "sz_sum",
+        ]))
+        context = Context('<program>')
+        context.symbol_table = SymbolTable(global_symbol_table)
+        result = Interpreter().visit(node, context)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.value.elements[-1].value, 100)
+
+        call = node.element_nodes[2].body_node.value_node.right_node
+        function = context.symbol_table.get("sz_g")
+        self.assertIs(call.specialization[0], function.tier)
+        self.assertIsInstance(call.specialization[1].body_node, NumberNode)
+
+class TestInlineCaches(unittest.TestCase):
+    def setUp(self):
+        self.root = SymbolTable()
+        self.root.set('answer', Number(42))
+        self.interpreter = Interpreter()
+        self.node = VarAccessNode(Token(TT_IDENTIFIER, 'answer', Position(0, 0, 0, '<stdin>', 'answer')))
+
+    def test_global_lookup_is_cached(self):
+        local = SymbolTable(SymbolTable(self.root))
+        self.assertEqual(self.interpreter.lookup(self.node, local).value, 42)
+        self.assertEqual(self.node.cache, (self.root, self.root.version))
+
+        self.root.set('answer', Number(43))
+        self.assertEqual(self.node.cache[1], self.root.version)
+        self.assertEqual(self.interpreter.lookup(self.node, local).value, 43)
+
+    def test_shadowing_binding_invalidates_cache(self):
+        self.interpreter.lookup(self.node, SymbolTable(self.root))
+        version = self.root.version
+
+        caller = SymbolTable(self.root)
+        caller.set('answer', Number(7))
+        self.assertNotEqual(self.root.version, version)
+        self.assertEqual(self.interpreter.lookup(self.node, SymbolTable(caller)).value, 7)
+        self.assertIsNone(self.node.cache)
+
+    def test_remove_invalidates_cache(self):
+        self.interpreter.lookup(self.node, self.root)
+        self.root.remove('answer')
+        self.assertIsNone(self.interpreter.lookup(self.node, self.root))
+
+    def test_dynamic_scope_still_respected(self):
+        value, error = run('<stdin>', 'var ic_val = 1\nfunc ic_show() -> ic_val\nic_show()\nfunc ic_wrap(ic_val) -> ic_show()\nic_wrap(5)\nic_show()')
+        self.assertIsNone(error)
+        self.assertEqual([value.elements[i].value for i in (2, 4, 5)], [1, 5, 1])
+
+
+class TestMemoization(unittest.TestCase):
+    def test_memo_func_caches_recursive_calls(self):
+        value, error = run('<stdin>', 'memo func mm_fib(n) -> if n < 2 then n else mm_fib(n - 1) + mm_fib(n - 2)\nmm_fib(60)\nmemo_stats(mm_fib)')
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[1].value, 1548008755920)
+        hits, misses, size = [element.value for element in value.elements[2].elements]
+        self.assertEqual(misses, 61)
+        self.assertEqual(hits, 58)
+        self.assertEqual(size, 61)
+
+    def test_memoize_builtin_evicts_least_recently_used(self):
+        value, error = run('<stdin>', 'var mm_sq = memoize(func(x) -> x * x, 2)\nmm_sq(1)\nmm_sq(2)\nmm_sq(1)\nmm_sq(3)\nmm_sq(2)\nmemo_stats(mm_sq)')
+        self.assertIsNone(error)
+        stats = [element.value for element in value.elements[-1].elements]
+        self.assertEqual(stats, [1, 4, 2])
+
+    def test_list_arguments_are_hashed_by_contents(self):
+        value, error = run('<stdin>', 'var mm_first = memoize(func(l) -> l / 0)\nmm_first([1, "a"])\nmm_first([1, "a"])\nmm_first([2, "a"])\nmemo_stats(mm_first)')
+        self.assertIsNone(error)
+        stats = [element.value for element in value.elements[-1].elements]
+        self.assertEqual(stats, [1, 2, 2])
+
+    def test_unhashable_arguments_bypass_cache(self):
+        value, error = run('<stdin>', 'var mm_call = memoize(func(f) -> f())\nmm_call(func() -> 5)\nmemo_stats(mm_call)')
+        self.assertIsNone(error)
+        self.assertEqual(value.elements[1].value, 5)
+        self.assertEqual([element.value for element in value.elements[-1].elements], [0, 0, 0])
+
+    def test_mutable_results_are_not_shared(self):
+        value, error = run('<stdin>', "\n".join([
+            "memo func mm_wrap(n) -> [n]",
+            "var mm_a = mm_wrap(1)",
+            "append(mm_a, 2)",
+            "mm_wrap(1)",
+            "memo_stats(mm_wrap)",
+        ]))
+        self.assertIsNone(error)
+        self.assertEqual(str(value.elements[3]), "[1]")
+        self.assertEqual([element.value for element in value.elements[-1].elements], [0, 2, 0])
+
+    def test_memoize_rejects_non_functions(self):
+        value, error = run('<stdin>', 'memoize(1)')
+        self.assertIsInstance(error, RTError)
+
+
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
     runner = unittest.TextTestRunner(verbosity=2)